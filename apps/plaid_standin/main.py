@@ -0,0 +1,436 @@
+# MARK: Imports
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import time
+import urllib.request
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import jwt
+import uvicorn
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# MARK: Config
+
+
+@dataclass
+class StandinConfig:
+    """
+    Knobs for the generated Plaid data and failure behaviour.
+
+    - `history`: transactions generated per account
+    - `page_size`: default `/transactions/sync` page when the client sends no count
+    - `latency_ms`: delay added to every response
+    - `error_rate`: probability (0..1) that a request fails with a Plaid error
+    - `webhook_url`: where fired webhooks go when the link token set none
+    """
+
+    history: int = 1000
+    accounts: int = 2
+    page_size: int = 100
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    webhook_url: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "StandinConfig":
+        return cls(
+            history=int(os.getenv("STANDIN_HISTORY", cls.history)),
+            accounts=int(os.getenv("STANDIN_ACCOUNTS", cls.accounts)),
+            page_size=int(os.getenv("STANDIN_PAGE_SIZE", cls.page_size)),
+            latency_ms=float(os.getenv("STANDIN_LATENCY_MS", cls.latency_ms)),
+            error_rate=float(os.getenv("STANDIN_ERROR_RATE", cls.error_rate)),
+            seed=int(os.getenv("STANDIN_SEED", cls.seed)),
+            webhook_url=os.getenv("STANDIN_WEBHOOK_URL"),
+        )
+
+
+# MARK: Data Generation
+
+MERCHANTS = [
+    "Whole Foods",
+    "Shell",
+    "Netflix",
+    "Amazon",
+    "Uber",
+    "Starbucks",
+    "Target",
+    "Spotify",
+]
+ACCOUNT_KINDS = [
+    ("depository", "checking", "Plaid Checking"),
+    ("credit", "credit card", "Plaid Credit Card"),
+    ("depository", "savings", "Plaid Saving"),
+]
+MAX_SYNC_COUNT = 500  # Plaid's documented ceiling for `count`
+
+
+def _digest(*parts: object) -> str:
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode()
+
+
+def _post_json(url: str, payload: dict, headers: dict | None = None) -> int:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json", **(headers or {})},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status
+
+
+def _decode_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    return int(base64.urlsafe_b64decode(cursor.encode()).decode().split(":")[1])
+
+
+class WebhookSigner:
+    """
+    Signs fired webhooks the way Plaid does: an ES256 JWT in the
+    `Plaid-Verification` header over the body's SHA-256, verifiable with
+    the key served by `/webhook_verification_key/get`.
+    """
+
+    def __init__(self, key_id: str):
+        self.key_id = key_id
+        self._private_key = ec.generate_private_key(ec.SECP256R1())
+        self.created_at = int(time.time())
+
+    def jwk(self) -> dict:
+        public = jwt.algorithms.ECAlgorithm.to_jwk(
+            self._private_key.public_key(), as_dict=True
+        )
+        return {
+            **public,
+            "alg": "ES256",
+            "kid": self.key_id,
+            "use": "sig",
+            "created_at": self.created_at,
+            "expired_at": None,
+        }
+
+    def sign(self, body: bytes) -> str:
+        claims = {
+            "iat": int(time.time()),
+            "request_body_sha256": hashlib.sha256(body).hexdigest(),
+        }
+        return jwt.encode(
+            claims,
+            self._private_key,
+            algorithm="ES256",
+            headers={"kid": self.key_id},
+        )
+
+
+class StandinData:
+    """
+    Deterministic per-item history so repeated runs see identical pages.
+    """
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self._items: dict[str, dict] = {}
+
+    def item(self, access_token: str) -> dict:
+        if access_token not in self._items:
+            self._items[access_token] = self.__generate(access_token)
+        return self._items[access_token]
+
+    def __generate(self, access_token: str) -> dict:
+        rng = random.Random(f"{self.config.seed}:{access_token}")
+        item_id = f"item-{_digest(access_token)[:12]}"
+
+        accounts = []
+        for index in range(self.config.accounts):
+            type_, subtype, name = ACCOUNT_KINDS[index % len(ACCOUNT_KINDS)]
+            accounts.append(
+                {
+                    "account_id": f"acc-{_digest(item_id, index)[:16]}",
+                    "balances": {
+                        "available": None,
+                        "current": round(rng.uniform(10, 5000), 2),
+                        "iso_currency_code": "USD",
+                        "limit": None,
+                        "unofficial_currency_code": None,
+                    },
+                    "mask": f"{rng.randint(0, 9999):04d}",
+                    "name": name,
+                    "official_name": f"{name} {index}",
+                    "type": type_,
+                    "subtype": subtype,
+                }
+            )
+
+        start = date.today() - timedelta(days=365 * 2)
+        transactions = []
+        for account in accounts:
+            for n in range(self.config.history):
+                merchant = rng.choice(MERCHANTS)
+                day = start + timedelta(days=rng.randint(0, 365 * 2))
+                transactions.append(
+                    _transaction(
+                        transaction_id=f"txn-{_digest(account['account_id'], n)}",
+                        account_id=account["account_id"],
+                        # Positive amounts are money leaving the account
+                        amount=round(rng.uniform(-200, 400), 2),
+                        day=day,
+                        name=f"{merchant.upper()} #{rng.randint(100, 999)}",
+                        merchant_name=merchant if rng.random() < 0.8 else None,
+                    )
+                )
+
+        transactions.sort(key=lambda txn: txn["date"])
+        return {
+            "item_id": item_id,
+            "webhook": None,
+            "institution_id": "ins_standin",
+            "accounts": accounts,
+            "transactions": transactions,
+        }
+
+
+def _transaction(
+    transaction_id: str,
+    account_id: str,
+    amount: float,
+    day: date,
+    name: str,
+    merchant_name: str | None,
+) -> dict:
+    # Full field set so the Plaid SDK's strict response models deserialize it
+    return {
+        "account_id": account_id,
+        "account_owner": None,
+        "amount": amount,
+        "authorized_date": day.isoformat(),
+        "authorized_datetime": None,
+        "category": None,
+        "category_id": None,
+        "check_number": None,
+        "counterparties": [],
+        "date": day.isoformat(),
+        "datetime": None,
+        "iso_currency_code": "USD",
+        "location": {
+            "address": None,
+            "city": None,
+            "country": None,
+            "lat": None,
+            "lon": None,
+            "postal_code": None,
+            "region": None,
+            "store_number": None,
+        },
+        "logo_url": None,
+        "merchant_entity_id": None,
+        "merchant_name": merchant_name,
+        "name": name,
+        "payment_channel": "in store",
+        "payment_meta": {
+            "by_order_of": None,
+            "payee": None,
+            "payer": None,
+            "payment_method": None,
+            "payment_processor": None,
+            "ppd_id": None,
+            "reason": None,
+            "reference_number": None,
+        },
+        "pending": False,
+        "pending_transaction_id": None,
+        "personal_finance_category": None,
+        "transaction_code": None,
+        "transaction_id": transaction_id,
+        "transaction_type": "place",
+        "unofficial_currency_code": None,
+        "website": None,
+    }
+
+
+# MARK: App
+
+
+def create_app(config: StandinConfig | None = None) -> FastAPI:
+    config = config or StandinConfig.from_env()
+    data = StandinData(config)
+    rng = random.Random(config.seed)
+    app = FastAPI(title="Plaid Stand-in")
+    app.state.config = config
+    app.state.data = data
+    # Webhook from the latest link token; applied to the next exchanged item
+    app.state.link_webhook = None
+    app.state.signer = WebhookSigner(f"standin-{rng.getrandbits(64):016x}")
+
+    def request_id() -> str:
+        return f"req-{rng.getrandbits(48):012x}"
+
+    @app.middleware("http")
+    async def latency_and_errors(request: Request, call_next):
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    "error_type": "API_ERROR",
+                    "error_code": "INTERNAL_SERVER_ERROR",
+                    "error_message": "injected failure from the Plaid stand-in",
+                    "display_message": None,
+                    "request_id": request_id(),
+                },
+            )
+        return await call_next(request)
+
+    @app.post("/link/token/create")
+    async def link_token_create(request: Request):
+        body = await request.json()
+        app.state.link_webhook = body.get("webhook")
+        return {
+            "link_token": f"link-standin-{rng.getrandbits(64):016x}",
+            "expiration": "2099-01-01T00:00:00Z",
+            "request_id": request_id(),
+        }
+
+    @app.post("/item/public_token/exchange")
+    async def item_public_token_exchange(request: Request):
+        body = await request.json()
+        access_token = f"access-standin-{_digest(body['public_token'])[:24]}"
+        data.item(access_token)["webhook"] = app.state.link_webhook
+        return {
+            "access_token": access_token,
+            "item_id": data.item(access_token)["item_id"],
+            "request_id": request_id(),
+        }
+
+    @app.post("/accounts/get")
+    async def accounts_get(request: Request):
+        body = await request.json()
+        item = data.item(body["access_token"])
+        return {
+            "accounts": item["accounts"],
+            "item": {
+                "item_id": item["item_id"],
+                "institution_id": item["institution_id"],
+                "webhook": item["webhook"],
+                "error": None,
+                "available_products": [],
+                "billed_products": ["transactions"],
+                "products": ["transactions"],
+                "consent_expiration_time": None,
+                "update_type": "background",
+            },
+            "request_id": request_id(),
+        }
+
+    @app.post("/transactions/sync")
+    async def transactions_sync(request: Request):
+        body = await request.json()
+        item = data.item(body["access_token"])
+        count = min(int(body.get("count") or config.page_size), MAX_SYNC_COUNT)
+        offset = _decode_cursor(body.get("cursor"))
+        page = item["transactions"][offset : offset + count]
+        next_offset = offset + len(page)
+        return {
+            "accounts": item["accounts"],
+            "added": page,
+            "modified": [],
+            "removed": [],
+            "next_cursor": _encode_cursor(next_offset),
+            "has_more": next_offset < len(item["transactions"]),
+            "transactions_update_status": "HISTORICAL_UPDATE_COMPLETE",
+            "request_id": request_id(),
+        }
+
+    @app.post("/webhook_verification_key/get")
+    async def webhook_verification_key_get(request: Request):
+        body = await request.json()
+        if body.get("key_id") != app.state.signer.key_id:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "error_type": "INVALID_INPUT",
+                    "error_code": "INVALID_WEBHOOK_VERIFICATION_KEY_ID",
+                    "error_message": "unknown webhook verification key id",
+                    "display_message": None,
+                    "request_id": request_id(),
+                },
+            )
+        return {"key": app.state.signer.jwk(), "request_id": request_id()}
+
+    @app.post("/sandbox/item/fire_webhook")
+    async def sandbox_item_fire_webhook(request: Request):
+        body = await request.json()
+        item = data.item(body["access_token"])
+        url = item["webhook"] or config.webhook_url
+        if not url:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "error_type": "INVALID_REQUEST",
+                    "error_code": "MISSING_WEBHOOK",
+                    "error_message": "item has no webhook configured",
+                    "display_message": None,
+                    "request_id": request_id(),
+                },
+            )
+
+        payload = {
+            "webhook_type": body.get("webhook_type", "TRANSACTIONS"),
+            "webhook_code": body.get("webhook_code", "SYNC_UPDATES_AVAILABLE"),
+            "item_id": item["item_id"],
+            "initial_update_complete": True,
+            "historical_update_complete": True,
+            "environment": "sandbox",
+        }
+        # Signed over the exact bytes `_post_json` sends
+        signature = app.state.signer.sign(json.dumps(payload).encode())
+        await asyncio.to_thread(
+            _post_json, url, payload, {"Plaid-Verification": signature}
+        )
+        return {"webhook_fired": True, "request_id": request_id()}
+
+    return app
+
+
+# MARK: Dev Entrypoint
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local Plaid stand-in.")
+    parser.add_argument("--history", type=int, default=StandinConfig.history)
+    parser.add_argument("--accounts", type=int, default=StandinConfig.accounts)
+    parser.add_argument("--page-size", type=int, default=StandinConfig.page_size)
+    parser.add_argument("--latency-ms", type=float, default=StandinConfig.latency_ms)
+    parser.add_argument("--error-rate", type=float, default=StandinConfig.error_rate)
+    parser.add_argument("--seed", type=int, default=StandinConfig.seed)
+    parser.add_argument("--webhook-url", default=None)
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+
+    app = create_app(
+        StandinConfig(
+            history=args.history,
+            accounts=args.accounts,
+            page_size=args.page_size,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            seed=args.seed,
+            webhook_url=args.webhook_url,
+        )
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -1,31 +1,41 @@
 # MARK: Imports
-import csv
+import asyncio
 import os
-from io import StringIO
+import shutil
+from collections.abc import AsyncIterator, Iterator
 from contextlib import asynccontextmanager
-from datetime import datetime
+from dataclasses import asdict
 from pathlib import Path
 from typing import Annotated
+from uuid import uuid4
 
 import uvicorn
+from anyio import from_thread
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Depends,
     FastAPI,
     File,
     Form,
+    Header,
     HTTPException,
     Query,
     Request,
     UploadFile,
 )
-from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import TypeAdapter
 
 from core.datastore.db import Sqlite3
+from core.datastore.model import ImportJob, IngestStatus
 from core.model import AppleTransaction
+from core.scheduler import SyncScheduler
 from core.service import Service
+from core.streams import gunzip, parse_ndjson
 from core.utils import cents_to_dollars, derive_month_context
 
 # MARK: App Setup & Lifespan
@@ -44,7 +54,24 @@ def resolve_db_path(db_path: Path | None = None) -> Path:
 async def startup(app: FastAPI):
     db_path = resolve_db_path(getattr(app.state, "database_path", None))
     app.state.service = Service(Sqlite3(db_path))
+    app.state.scheduler = SyncScheduler(
+        app.state.service,
+        interval=float(os.getenv("BUTTY_SYNC_INTERVAL", "3600")),
+        jitter=float(os.getenv("BUTTY_SYNC_JITTER", "300")),
+    )
+    app.state.import_dir = db_path.parent / "imports"
+    app.state.import_dir.mkdir(exist_ok=True)
+    await app.state.scheduler.start()
+    # Pick up Apple uploads and CSV imports that were queued or mid-flight
+    # at shutdown, and upgrade any fingerprints left from before version 2
+    backlog = asyncio.gather(
+        asyncio.to_thread(app.state.service.resume_apple_ingest_queue),
+        asyncio.to_thread(app.state.service.resume_import_jobs),
+        asyncio.to_thread(app.state.service.migrate_fingerprints),
+    )
     yield
+    await app.state.scheduler.stop()
+    await backlog
 
 
 app = FastAPI(title="Budget Dashboard", lifespan=startup)
@@ -57,12 +84,20 @@ link_router = APIRouter(prefix="/link")
 account_router = APIRouter(prefix="/accounts")
 transactions_router = APIRouter(prefix="/transactions")
 tag_router = APIRouter(prefix="/tags")
+webhook_router = APIRouter(prefix="/webhooks")
 
 
 def get_service():
     yield app.state.service
 
 
+def get_scheduler():
+    yield app.state.scheduler
+
+
+APPLE_PAYLOAD = TypeAdapter(list[AppleTransaction])
+PLAID_WEBHOOK_PAYLOAD = TypeAdapter(dict)
+
 templates = Jinja2Templates(directory="apps/web/templates")
 app.mount("/static", StaticFiles(directory="apps/web/static"), name="static")
 
@@ -70,6 +105,16 @@ app.mount("/static", StaticFiles(directory="apps/web/static"), name="static")
 # MARK: Shared Helpers
 
 
+def _iter_from_thread(stream: AsyncIterator[bytes]) -> Iterator[bytes]:
+    # Lets sync service code running in the threadpool pull from an
+    # async request body one network chunk at a time
+    while True:
+        try:
+            yield from_thread.run(anext, stream)
+        except StopAsyncIteration:
+            return
+
+
 def _base_context(service: Service) -> dict:
     return {"summary": service.summary_card}
 
@@ -92,6 +137,9 @@ def _activity_context(
     return {
         "recent_transactions": recent_transactions,
         "transactions": transactions,
+        "unassigned_count": service.count_unassigned_transactions(
+            mth_ctx["current_month"], mth_ctx["year"]
+        ),
         "accounts": accounts,
         "budgets": service.get_all_budgets(mth_ctx["current_month"], mth_ctx["year"]),
         **mth_ctx,
@@ -104,12 +152,15 @@ def _explorer_response(
     month: int | None = None,
     year: int | None = None,
 ):
+    # Renders the stored balances; fresh ones show up on the next view
+    app.state.scheduler.refresh_balances()
     return templates.TemplateResponse(
         "partials/explorer/index.html",
         {
             "request": request,
             **_activity_context(service, month, year),
             **_base_context(service),
+            "sync": app.state.scheduler.status(),
         },
     )
 
@@ -134,6 +185,7 @@ def _budget_lines_response(
         },
     )
 
+
 # MARK: Root Routes
 
 
@@ -217,6 +269,24 @@ def explorer_search(
     return templates.TemplateResponse("partials/explorer/search.html", context)
 
 
+@root_router.get("/explorer/unassigned", response_class=HTMLResponse)
+def explorer_unassigned(
+    request: Request,
+    service: Annotated[Service, Depends(get_service)],
+    month: int | None = Query(None),
+    year: int | None = Query(None),
+) -> HTMLResponse:
+    mth_ctx = _month_context(month, year)
+    context = {
+        "request": request,
+        "transactions": service.get_unassigned_transactions(
+            mth_ctx["current_month"], mth_ctx["year"]
+        ),
+        **_base_context(service),
+    }
+    return templates.TemplateResponse("partials/explorer/unassigned.html", context)
+
+
 # MARK: - Budget CRUD
 
 
@@ -587,99 +657,180 @@ def transaction_remove_budget(
     return _explorer_response(request, service, month, year)
 
 
+@transactions_router.post("/budget/bulk", response_class=HTMLResponse)
+def transactions_assign_budget(
+    request: Request,
+    service: Annotated[Service, Depends(get_service)],
+    transaction_ids: Annotated[list[int], Form()],
+    budget_id: int = Form(...),
+    month: int = Form(...),
+    year: int = Form(...),
+) -> HTMLResponse:
+    try:
+        service.assign_transactions_to_budget(budget_id, transaction_ids, month, year)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return _explorer_response(request, service, month, year)
+
+
+@transactions_router.delete("/budget/bulk", response_class=HTMLResponse)
+def transactions_remove_budget(
+    request: Request,
+    service: Annotated[Service, Depends(get_service)],
+    transaction_ids: Annotated[list[int], Form()],
+    month: int = Form(...),
+    year: int = Form(...),
+    budget_id: int | None = Form(None),
+) -> HTMLResponse:
+    service.unassign_transactions(transaction_ids, budget_id)
+    return _explorer_response(request, service, month, year)
+
+
+def _sync_status_response(request: Request, scheduler: SyncScheduler) -> HTMLResponse:
+    status = scheduler.status()
+    response = templates.TemplateResponse(
+        "partials/explorer/sync_status.html", {"request": request, "sync": status}
+    )
+    if not status["running"]:
+        # Run finished; let the explorer pick up the new rows
+        response.headers["HX-Trigger"] = "refresh-explorer"
+    return response
+
+
 @transactions_router.get("/sync", response_class=HTMLResponse)
 def sync_transactions(
     request: Request,
-    service: Annotated[Service, Depends(get_service)],
+    scheduler: Annotated[SyncScheduler, Depends(get_scheduler)],
 ) -> HTMLResponse:
-    service.sync_all_transactions()
-    return _explorer_response(request, service)
+    scheduler.enqueue()
+    return _sync_status_response(request, scheduler)
+
+
+@transactions_router.get("/sync/status", response_class=HTMLResponse)
+def sync_status(
+    request: Request,
+    scheduler: Annotated[SyncScheduler, Depends(get_scheduler)],
+) -> HTMLResponse:
+    return _sync_status_response(request, scheduler)
+
+
+def _import_status_response(request: Request, job: ImportJob) -> HTMLResponse:
+    response = templates.TemplateResponse(
+        "partials/explorer/import_status.html", {"request": request, "job": job}
+    )
+    if job.status == IngestStatus.DONE:
+        # Import finished; let the explorer pick up the new rows
+        response.headers["HX-Trigger"] = "refresh-explorer"
+    return response
+
+
+def _get_import_job(service: Service, job_id: int) -> ImportJob:
+    job = service.get_import_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown import job.")
+    return job
 
 
 @transactions_router.post("/import", response_class=HTMLResponse)
-async def import_transactions(
+def import_transactions(
     request: Request,
     service: Annotated[Service, Depends(get_service)],
-    file: UploadFile = File(...),
+    background_tasks: BackgroundTasks,
+    file: Annotated[UploadFile, File()],
 ) -> HTMLResponse:
     if not file.filename:
-        raise HTTPException(status_code=400, detail="CSV file is required.")
-
-    content = (await file.read()).decode("utf-8-sig")
-    reader = csv.DictReader(StringIO(content))
-    if not reader.fieldnames:
-        raise HTTPException(status_code=400, detail="CSV headers are missing.")
-
-    normalized_headers = {header.strip().lower(): header for header in reader.fieldnames}
-    expected = {
-        "date": "Date",
-        "description": "Description",
-        "amount": "Amount",
-        "account name": "Account Name",
-        "budget": "Budget",
-    }
-    missing = [
-        expected[key]
-        for key in expected
-        if key not in normalized_headers
-    ]
-    if missing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Missing required columns: {', '.join(missing)}",
-        )
-
-    rows: list[dict[str, object]] = []
-    for index, row in enumerate(reader, start=1):
-        date_raw = row.get(normalized_headers["date"], "").strip()
-        description = row.get(normalized_headers["description"], "").strip()
-        amount_raw = row.get(normalized_headers["amount"], "").strip()
-        account_name = row.get(normalized_headers["account name"], "").strip()
-        budget_name = row.get(normalized_headers["budget"], "").strip()
-
-        if not date_raw or not description or not amount_raw or not account_name:
-            continue
+        raise HTTPException(status_code=400, detail="CSV or OFX file is required.")
 
-        try:
-            occurred_at = datetime.fromisoformat(date_raw)
-        except ValueError as exc:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid date format: {date_raw}",
-            ) from exc
-
-        sanitized_amount = amount_raw.replace("$", "").replace(",", "")
-        try:
-            amount = float(sanitized_amount)
-        except ValueError as exc:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid amount: {amount_raw}",
-            ) from exc
-
-        rows.append(
-            {
-                "occurred_at": occurred_at,
-                "description": description,
-                "amount": amount,
-                "account_name": account_name,
-                "budget_name": budget_name,
-                "csv_index": index,
-            }
-        )
-
-    if not rows:
-        raise HTTPException(status_code=400, detail="No valid rows to import.")
-
-    service.import_transactions_from_csv(rows)
-    return _explorer_response(request, service)
+    # Spool to disk so the job can be resumed after a failure or restart;
+    # the job picks the CSV or OFX parser from the uploaded filename
+    path = app.state.import_dir / f"{uuid4().hex}{Path(file.filename).suffix}"
+    with path.open("wb") as spool:
+        shutil.copyfileobj(file.file, spool, Service.CSV_READ_SIZE)
 
+    job_id = service.create_import_job(file.filename, str(path))
+    background_tasks.add_task(service.run_import_job, job_id)
+    return _import_status_response(request, service.get_import_job(job_id))
+
+
+@transactions_router.get("/import/{job_id}")
+def import_job(service: Annotated[Service, Depends(get_service)], job_id: int) -> dict:
+    return asdict(_get_import_job(service, job_id))
+
+
+@transactions_router.get("/import/{job_id}/status", response_class=HTMLResponse)
+def import_job_status(
+    request: Request, service: Annotated[Service, Depends(get_service)], job_id: int
+) -> HTMLResponse:
+    return _import_status_response(request, _get_import_job(service, job_id))
 
-@transactions_router.post("/sync/apple", response_class=HTMLResponse)
-def sync_transactions_apple_webhook(
-    service: Annotated[Service, Depends(get_service)], payload: list[AppleTransaction]
-):
-    service.sync_apple_transactions(payload)
+
+@transactions_router.post("/import/{job_id}/resume", response_class=HTMLResponse)
+def resume_import_job(
+    request: Request,
+    service: Annotated[Service, Depends(get_service)],
+    background_tasks: BackgroundTasks,
+    job_id: int,
+) -> HTMLResponse:
+    job = _get_import_job(service, job_id)
+    if job.status == IngestStatus.FAILED:
+        background_tasks.add_task(service.run_import_job, job_id)
+    return _import_status_response(request, job)
+
+
+@transactions_router.post("/sync/apple", status_code=202)
+async def sync_transactions_apple_webhook(
+    request: Request,
+    service: Annotated[Service, Depends(get_service)],
+    background_tasks: BackgroundTasks,
+    idempotency_key: Annotated[str | None, Header()] = None,
+) -> JSONResponse:
+    """
+    Accepts either a JSON array of transactions or a streamed
+    `application/x-ndjson` body (optionally `Content-Encoding: gzip`),
+    one transaction per line.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/x-ndjson"):
+            gzipped = request.headers.get("content-encoding") == "gzip"
+
+            def enqueue_stream() -> tuple[str, bool]:
+                body = _iter_from_thread(request.stream())
+                transactions = parse_ndjson(
+                    gunzip(body) if gzipped else body, AppleTransaction
+                )
+                return service.enqueue_apple_transactions(transactions, idempotency_key)
+
+            key, created = await run_in_threadpool(enqueue_stream)
+        else:
+            payload = APPLE_PAYLOAD.validate_json(await request.body())
+            key, created = await run_in_threadpool(
+                service.enqueue_apple_transactions, payload, idempotency_key
+            )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    if created:
+        background_tasks.add_task(service.process_apple_ingest_queue)
+
+    status_url = f"/transactions/sync/apple/{key}"
+    return JSONResponse(
+        status_code=202,
+        content={"idempotency_key": key, "status_url": status_url},
+        headers={"Location": status_url},
+    )
+
+
+@transactions_router.get("/sync/apple/{idempotency_key}")
+def sync_transactions_apple_status(
+    service: Annotated[Service, Depends(get_service)], idempotency_key: str
+) -> dict:
+    job = service.get_apple_ingest_job(idempotency_key)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown Apple upload.")
+
+    return asdict(job)
 
 
 # MARK: Plaid
@@ -699,13 +850,47 @@ def link_by_plaid(
 def create_account_by_plaid(
     request: Request,
     service: Annotated[Service, Depends(get_service)],
+    scheduler: Annotated[SyncScheduler, Depends(get_scheduler)],
     public_token: str = Form(...),
 ) -> HTMLResponse:
     service.create_accounts_by_plaid(public_token)
-    service.sync_all_transactions()
+    scheduler.enqueue()
     return _explorer_response(request, service)
 
 
+# MARK: Webhooks
+
+
+@webhook_router.post("/plaid")
+async def plaid_webhook(
+    request: Request,
+    service: Annotated[Service, Depends(get_service)],
+    scheduler: Annotated[SyncScheduler, Depends(get_scheduler)],
+    plaid_verification: Annotated[str | None, Header()] = None,
+) -> dict:
+    # Plaid signs every webhook; the JWT covers the raw body, so it is
+    # checked before the body is parsed
+    body = await request.body()
+    verified = await run_in_threadpool(
+        service.verify_plaid_webhook, body, plaid_verification
+    )
+    if not verified:
+        raise HTTPException(status_code=403, detail="Invalid webhook signature.")
+    try:
+        payload = PLAID_WEBHOOK_PAYLOAD.validate_json(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    plaid_id = await run_in_threadpool(service.resolve_plaid_webhook, payload)
+    if plaid_id is None:
+        return {"status": "ignored"}
+
+    scheduler.enqueue(
+        plaid_id, debounce=float(os.getenv("BUTTY_WEBHOOK_DEBOUNCE", "5"))
+    )
+    return {"status": "queued"}
+
+
 # MARK: Router Registration
 
 
@@ -715,6 +900,7 @@ app.include_router(tag_router)
 app.include_router(link_router)
 app.include_router(account_router)
 app.include_router(transactions_router)
+app.include_router(webhook_router)
 
 
 # MARK: Dev Entrypoint
@@ -0,0 +1,48 @@
+import math
+from collections.abc import Iterable
+
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and a tunable false-positive rate.
+
+    - Sized for `capacity` keys at `error_rate`; adding more keys still
+      works but the false-positive rate climbs
+    - Keys must end in a 16-byte digest (e.g. `build_fingerprint` output):
+      they are already uniformly distributed, so bit positions are read
+      straight off the key with double hashing instead of hashing it again
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_keys(
+        cls, keys: Iterable[bytes], capacity: int, error_rate: float = 0.01
+    ) -> "BloomFilter":
+        bloom = cls(capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def __positions(self, key: bytes) -> list[int]:
+        h1 = int.from_bytes(key[-16:-8])
+        h2 = int.from_bytes(key[-8:]) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: bytes):
+        bits = self._bits
+        for position in self.__positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self._bits
+        for position in self.__positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
@@ -0,0 +1,115 @@
+import zipfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import BinaryIO
+
+from core.csv_import import parse_import_file
+from core.ofx_import import OFX_SUFFIXES
+from core.service import Service
+
+IMPORT_SUFFIXES = (".csv", *OFX_SUFFIXES)
+
+
+@dataclass(frozen=True)
+class ImportSource:
+    """
+    One statement to import (CSV, OFX or QFX): a file on disk, or a
+    `member` of a zip archive.
+    """
+
+    path: str
+    member: str | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.path}:{self.member}" if self.member else self.path
+
+
+@dataclass
+class BulkImportResult:
+    files: int = 0
+    rows: int = 0
+    inserted: int = 0
+    linked: int = 0
+    probable_duplicates: int = 0
+    false_positives: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def find_import_sources(paths: Iterable[str]) -> list[ImportSource]:
+    """
+    Expand the given paths into import sources. Zip archives contribute
+    every CSV/OFX/QFX member; other paths are imported as they are.
+    """
+    sources = []
+    for path in paths:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                sources.extend(
+                    ImportSource(path, info.filename)
+                    for info in archive.infolist()
+                    if not info.is_dir()
+                    and info.filename.lower().endswith(IMPORT_SUFFIXES)
+                )
+        else:
+            sources.append(ImportSource(path))
+    return sources
+
+
+@contextmanager
+def _open_source(source: ImportSource) -> Iterator[BinaryIO]:
+    if source.member is None:
+        with open(source.path, "rb") as file:
+            yield file
+    else:
+        with (
+            zipfile.ZipFile(source.path) as archive,
+            archive.open(source.member) as file,
+        ):
+            yield file
+
+
+def parse_import_source(
+    source: ImportSource,
+) -> tuple[ImportSource, list[dict[str, object]], str | None]:
+    """
+    Parse and fingerprint a whole file. Runs in a worker process, so a bad
+    file is reported back as an error rather than raised.
+    """
+    try:
+        with _open_source(source) as file:
+            blocks = iter(partial(file.read, Service.CSV_READ_SIZE), b"")
+            rows = parse_import_file(source.member or source.path, blocks)
+            return source, [Service.prepare_import_row(row) for row in rows], None
+    except (OSError, UnicodeDecodeError, ValueError, zipfile.BadZipFile) as exc:
+        return source, [], str(exc)
+
+
+def bulk_import(
+    service: Service,
+    sources: list[ImportSource],
+    workers: int | None = None,
+    chunk_size: int | None = None,
+) -> BulkImportResult:
+    """
+    Parse `sources` in a process pool and write them from this process,
+    which stays the only SQLite writer. A file that fails to parse writes
+    nothing; the others are still imported.
+    """
+    result = BulkImportResult()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for source, rows, error in pool.map(parse_import_source, sources):
+            if error:
+                result.failed[source.name] = error
+                continue
+            written = service.import_prepared_rows(rows, chunk_size)
+            result.files += 1
+            result.rows += written["rows"]
+            result.inserted += written["inserted"]
+            result.linked += written["linked"]
+            result.probable_duplicates += written["probable_duplicates"]
+            result.false_positives += written["false_positives"]
+    return result
@@ -0,0 +1,178 @@
+# MARK: Imports
+import argparse
+import os
+import time
+from pathlib import Path
+
+from core.bulk_import import bulk_import, find_import_sources
+from core.datastore.db import Sqlite3
+from core.service import Service
+
+# MARK: Commands
+
+
+def replay_plaid(service: Service, args: argparse.Namespace):
+    started = time.perf_counter()
+    result = service.replay_plaid_pages(args.item)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Replayed {result['pages']} staged pages, "
+        f"inserted {result['inserted']} transactions, "
+        f"updated {result['updated']} in {elapsed:.2f}s"
+    )
+
+
+def import_statements(service: Service, args: argparse.Namespace):
+    sources = find_import_sources(args.files)
+    service.dedupe_prefilter = not args.no_prefilter
+    started = time.perf_counter()
+    result = bulk_import(service, sources, args.workers, args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Imported {result.rows} rows from {result.files} files "
+        f"({result.inserted} new, {result.linked} linked to budgets) "
+        f"in {elapsed:.2f}s, {result.rows / elapsed:,.0f} rows/sec"
+    )
+    # False positives are rows the duplicate filter sent to a lookup that
+    # turned out to be new; the rate is over all new rows
+    new_rows = result.rows - result.probable_duplicates + result.false_positives
+    print(
+        f"Duplicate pre-check: {result.rows - result.probable_duplicates} lookups "
+        f"skipped, {result.probable_duplicates} rows looked up, "
+        f"{result.false_positives} false positives "
+        f"({result.false_positives / max(new_rows, 1):.2%} of new rows)"
+    )
+    for name, error in result.failed.items():
+        print(f"Failed {name}: {error}")
+    if result.failed:
+        raise SystemExit(1)
+
+
+def migrate_fingerprints(service: Service, args: argparse.Namespace):
+    started = time.perf_counter()
+    result = service.migrate_fingerprints(args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Upgraded {result['transactions']} transaction and {result['accounts']} "
+        f"account fingerprints in {elapsed:.2f}s; {result['legacy']} stay legacy "
+        "until an import or relink matches them"
+    )
+
+
+def recompute_spent(service: Service, args: argparse.Namespace):
+    if (args.month is None) != (args.year is None):
+        raise SystemExit("--month and --year go together")
+    started = time.perf_counter()
+    changed = service.recompute_budgets_spent(args.month, args.year)
+    elapsed = time.perf_counter() - started
+    scope = f"{args.year}-{args.month:02}" if args.month else "all months"
+    print(f"Recomputed spent totals for {scope} in {elapsed:.3f}s; {changed} changed")
+
+
+def project_budgets(service: Service, args: argparse.Namespace):
+    started = time.perf_counter()
+    try:
+        created = service.project_budgets(
+            args.month, args.year, args.through_month, args.through_year
+        )
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    elapsed = time.perf_counter() - started
+    print(
+        f"Projected {args.year}-{args.month:02} through "
+        f"{args.through_year}-{args.through_month:02} in {elapsed:.3f}s; "
+        f"{created} budgets created"
+    )
+
+
+# MARK: Entrypoint
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="butty", description="Butty maintenance commands."
+    )
+    parser.add_argument(
+        "--db-path",
+        default=os.getenv("BUTTY_DB_PATH"),
+        required=os.getenv("BUTTY_DB_PATH") is None,
+        help="Path to the SQLite database file. Defaults to BUTTY_DB_PATH.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay = commands.add_parser(
+        "replay-plaid",
+        help="Re-run the Plaid transform-and-insert pipeline from staged pages.",
+    )
+    replay.add_argument("--item", type=int, help="Only replay this Plaid item id.")
+    replay.set_defaults(handler=replay_plaid)
+
+    bulk = commands.add_parser(
+        "import",
+        help="Bulk import CSV/OFX/QFX statements, or zips of them, from disk.",
+    )
+    bulk.add_argument("files", nargs="+", help="CSV/OFX/QFX files or zip archives.")
+    bulk.add_argument(
+        "--workers",
+        type=int,
+        help="Parser processes. Defaults to the number of CPUs.",
+    )
+    bulk.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="Rows written per insert batch.",
+    )
+    bulk.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        help="Look up every row instead of only the ones the duplicate "
+        "filter flags, to time what the filter saves.",
+    )
+    bulk.set_defaults(handler=import_statements)
+
+    fingerprints = commands.add_parser(
+        "migrate-fingerprints",
+        help="Upgrade legacy transaction and account fingerprints to version 2.",
+    )
+    fingerprints.add_argument(
+        "--batch-size",
+        type=int,
+        default=Service.FINGERPRINT_MIGRATION_BATCH,
+        help="Rows upgraded per write.",
+    )
+    fingerprints.set_defaults(handler=migrate_fingerprints)
+
+    spent = commands.add_parser(
+        "recompute-spent",
+        help="Recompute every budget's spent total from its transactions.",
+    )
+    spent.add_argument("--month", type=int, help="Only budgets of this month.")
+    spent.add_argument("--year", type=int, help="Year of --month.")
+    spent.set_defaults(handler=recompute_spent)
+
+    project = commands.add_parser(
+        "project-budgets",
+        help="Copy a month's budgets into each following month through a target.",
+    )
+    project.add_argument("--month", type=int, required=True, help="Source month.")
+    project.add_argument("--year", type=int, required=True, help="Year of --month.")
+    project.add_argument(
+        "--through-month", type=int, required=True, help="Last month to fill."
+    )
+    project.add_argument(
+        "--through-year", type=int, required=True, help="Year of --through-month."
+    )
+    project.set_defaults(handler=project_budgets)
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    service = Service(Sqlite3(Path(args.db_path).expanduser()))
+    args.handler(service, args)
+
+
+if __name__ == "__main__":
+    main()
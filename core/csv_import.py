@@ -0,0 +1,106 @@
+import csv
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from core.bloom import BloomFilter
+from core.ofx_import import OFX_SUFFIXES, parse_ofx_transactions
+from core.streams import iter_text_lines
+from core.utils import parse_cents
+
+# Normalized header -> display name used in error messages
+REQUIRED_COLUMNS = {
+    "date": "Date",
+    "description": "Description",
+    "amount": "Amount",
+    "account name": "Account Name",
+    "budget": "Budget",
+}
+
+
+@dataclass
+class ImportSession:
+    """
+    State shared by every chunk of one import: accounts, month budget maps
+    and month duplicate filters are resolved once, and budget links are
+    collected so they can be written in one batch with one spent recompute
+    per touched budget.
+    """
+
+    account_ids: dict[str, int] = field(default_factory=dict)
+    # (month, year) -> lowercased budget name -> budget id
+    budgets_by_month: dict[tuple[int, int], dict[str, int]] = field(
+        default_factory=dict
+    )
+    # (budget_id, transaction_id) pairs not yet written
+    links: list[tuple[int, int]] = field(default_factory=list)
+    touched_budgets: set[int] = field(default_factory=set)
+    # Links the store actually wrote, not counting ones that already existed
+    linked: int = 0
+    # (month, year) -> fingerprints already stored for that month, or None
+    # when the pre-check is off
+    seen_by_month: dict[tuple[int, int], BloomFilter | None] = field(
+        default_factory=dict
+    )
+    # Months that still hold version 1 fingerprints
+    legacy_months: set[tuple[int, int]] = field(default_factory=set)
+    # Rows the filters flagged, and how many of those were new after all
+    probable_duplicates: int = 0
+    false_positives: int = 0
+
+
+def parse_csv_transactions(lines: Iterable[str]) -> Iterator[dict[str, object]]:
+    """
+    Validate a transactions CSV export row by row.
+
+    Yields the row dicts `Service.import_transactions_from_csv` expects.
+    Rows missing a date, description, amount or account are skipped;
+    a malformed header, date or amount raises ValueError.
+    """
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames:
+        raise ValueError("CSV headers are missing.")
+
+    headers = {header.strip().lower(): header for header in reader.fieldnames}
+    missing = [name for key, name in REQUIRED_COLUMNS.items() if key not in headers]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    for index, row in enumerate(reader, start=1):
+        date_raw = (row.get(headers["date"]) or "").strip()
+        description = (row.get(headers["description"]) or "").strip()
+        amount_raw = (row.get(headers["amount"]) or "").strip()
+        account_name = (row.get(headers["account name"]) or "").strip()
+        budget_name = (row.get(headers["budget"]) or "").strip()
+
+        if not date_raw or not description or not amount_raw or not account_name:
+            continue
+
+        try:
+            occurred_at = datetime.fromisoformat(date_raw)
+        except ValueError as exc:
+            raise ValueError(f"Invalid date format: {date_raw}") from exc
+
+        amount_cents = parse_cents(amount_raw)
+
+        yield {
+            "occurred_at": occurred_at,
+            "description": description,
+            "amount": amount_cents / 100,
+            "amount_cents": amount_cents,
+            "account_name": account_name,
+            "budget_name": budget_name,
+            "csv_index": index,
+        }
+
+
+def parse_import_file(
+    filename: str, blocks: Iterable[bytes]
+) -> Iterator[dict[str, object]]:
+    """
+    Parse an uploaded statement by its file extension: OFX/QFX downloads
+    go through `parse_ofx_transactions`, anything else is read as CSV.
+    """
+    if filename.lower().endswith(OFX_SUFFIXES):
+        return parse_ofx_transactions(blocks)
+    return parse_csv_transactions(iter_text_lines(blocks))
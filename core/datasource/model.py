@@ -5,6 +5,16 @@ from dataclasses import dataclass
 class PlaidAccountBase:
     account_id: int
     name: str
-    fingerprint: str
+    fingerprint: bytes
     type: str
     balance: float
+    # Version 1 fingerprint, to recognize accounts linked before version 2
+    legacy_fingerprint: bytes | None = None
+
+
+@dataclass(frozen=True)
+class PlaidSyncPage:
+    cursor: str  # Cursor sent to /transactions/sync ("" = start of history)
+    next_cursor: str
+    raw: bytes  # Response body exactly as Plaid returned it
+    data: dict
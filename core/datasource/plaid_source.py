@@ -1,10 +1,13 @@
+import json
 import os
+from collections.abc import Iterator
 
 try:  # pragma: no cover - import guard exercised by tests
     from plaid import Environment
     from plaid.api.plaid_api import PlaidApi
     from plaid.api_client import ApiClient
     from plaid.configuration import Configuration
+    from plaid.exceptions import ApiException
     from plaid.model.accounts_get_request import AccountsGetRequest
     from plaid.model.country_code import CountryCode
     from plaid.model.item_public_token_exchange_request import (
@@ -13,13 +16,16 @@ try:  # pragma: no cover - import guard exercised by tests
     from plaid.model.link_token_create_request import LinkTokenCreateRequest
     from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
     from plaid.model.products import Products
-    from plaid.model.transaction import Transaction
     from plaid.model.transactions_sync_request import TransactionsSyncRequest
+    from plaid.model.webhook_verification_key_get_request import (
+        WebhookVerificationKeyGetRequest,
+    )
 except ModuleNotFoundError:  # pragma: no cover - exercised by tests
     Environment = None
     PlaidApi = None
     ApiClient = None
     Configuration = None
+    ApiException = None
     AccountsGetRequest = None
     CountryCode = None
     ItemPublicTokenExchangeRequest = None
@@ -27,10 +33,14 @@ except ModuleNotFoundError:  # pragma: no cover - exercised by tests
     LinkTokenCreateRequestUser = None
     Products = None
     TransactionsSyncRequest = None
-    Transaction = type("Transaction", (), {})
+    WebhookVerificationKeyGetRequest = None
 
-from core.datasource.model import PlaidAccountBase
-from core.utils import build_fingerprint
+from core.datasource.model import PlaidAccountBase, PlaidSyncPage
+from core.utils import (
+    FINGERPRINT_VERSION,
+    LEGACY_FINGERPRINT_VERSION,
+    build_fingerprint,
+)
 
 
 class Plaid:
@@ -40,6 +50,7 @@ class Plaid:
             PlaidApi,
             ApiClient,
             Configuration,
+            ApiException,
             AccountsGetRequest,
             CountryCode,
             ItemPublicTokenExchangeRequest,
@@ -47,14 +58,17 @@ class Plaid:
             LinkTokenCreateRequestUser,
             Products,
             TransactionsSyncRequest,
+            WebhookVerificationKeyGetRequest,
         ):
             raise ImportError(
                 "Plaid SDK is required. Install the 'plaid-python' package to use this datasource."
             )
 
         isProd = os.environ["ENV"] == "prod"
+        default_host = Environment.Production if isProd else Environment.Sandbox
         config = Configuration(
-            host=Environment.Production if isProd else Environment.Sandbox,
+            # PLAID_HOST points the client elsewhere (e.g. the local stand-in)
+            host=os.getenv("PLAID_HOST") or default_host,
             api_key={
                 "clientId": os.environ["PLAID_CLIENT"],
                 "secret": os.environ[
@@ -65,10 +79,22 @@ class Plaid:
         self.client = PlaidApi(ApiClient(config))
 
     @staticmethod
-    def __build_fingerprint(inst_id: str, name: str, subtype: str, mask: str):
-        return build_fingerprint(inst_id, name, subtype, mask)
+    def __build_fingerprint(
+        inst_id: str,
+        name: str,
+        subtype: str,
+        mask: str,
+        version: int = FINGERPRINT_VERSION,
+    ):
+        return build_fingerprint(inst_id, name, subtype, mask, version=version)
 
     def create_link(self) -> str:
+        options = {}
+        webhook = os.getenv("PLAID_WEBHOOK_URL")
+        if webhook:
+            # Plaid posts item events here (see /webhooks/plaid)
+            options["webhook"] = webhook
+
         request = LinkTokenCreateRequest(
             client_name="Butty",
             language="en",
@@ -77,27 +103,54 @@ class Plaid:
                 client_user_id="Butty"  # Since personal will just be the same all around
             ),
             products=[Products("transactions")],
+            **options,
         )
         return self.client.link_token_create(request)["link_token"]
 
-    def add_financial_item(self, public_token: str):
+    def add_financial_item(self, public_token: str) -> tuple[str, str]:
         exchange_request = ItemPublicTokenExchangeRequest(public_token=public_token)
         exchange_response = self.client.item_public_token_exchange(exchange_request)
-        return exchange_response["access_token"]
+        return exchange_response["access_token"], exchange_response["item_id"]
+
+    def retrieve_item_id(self, access_token: str) -> str:
+        request = AccountsGetRequest(access_token=access_token)
+        return self.client.accounts_get(request)["item"]["item_id"]
+
+    def retrieve_webhook_verification_key(self, key_id: str) -> dict | None:
+        """
+        The public JWK Plaid signs webhooks with, by the `kid` of the
+        webhook's JWT, or None when Plaid does not know the key.
+        """
+        request = WebhookVerificationKeyGetRequest(key_id=key_id)
+        try:
+            response = self.client.webhook_verification_key_get(request)
+        except ApiException:
+            return None
+        return response["key"].to_dict()
 
-    def retrieve_transactions(self, access_token: str) -> list[Transaction]:
-        request = TransactionsSyncRequest(access_token=access_token)
-        response = self.client.transactions_sync(request)
-        transactions = response["added"]
+    def retrieve_transaction_pages(
+        self, access_token: str, cursor: str | None = None
+    ) -> Iterator[PlaidSyncPage]:
+        """
+        Yield raw `/transactions/sync` pages starting after `cursor`.
 
-        while response["has_more"]:
-            request = TransactionsSyncRequest(
-                access_token=access_token, cursor=response["next_cursor"]
+        Responses are not deserialized into SDK models; callers get the
+        body bytes (for staging) and the decoded JSON.
+        """
+        cursor = cursor or ""
+        while True:
+            request = (
+                TransactionsSyncRequest(access_token=access_token, cursor=cursor)
+                if cursor
+                else TransactionsSyncRequest(access_token=access_token)
             )
-            response = self.client.transactions_sync(request)
-            transactions += response["added"]
+            raw = self.client.transactions_sync(request, _preload_content=False).data
+            data = json.loads(raw)
+            yield PlaidSyncPage(cursor, data["next_cursor"], raw, data)
 
-        return transactions
+            if not data["has_more"]:
+                break
+            cursor = data["next_cursor"]
 
     def retrieve_accounts(self, access_token: str) -> list[PlaidAccountBase]:
         request = AccountsGetRequest(access_token=access_token)
@@ -105,18 +158,22 @@ class Plaid:
 
         accounts = []
         for acc in response["accounts"]:
+            identity = (
+                response["item"]["institution_id"],
+                acc.official_name or acc.name,
+                acc.subtype.value,
+                acc.mask,
+            )
             accounts.append(
                 PlaidAccountBase(
                     acc.account_id,
                     acc.name,
-                    Plaid.__build_fingerprint(
-                        response["item"]["institution_id"],
-                        acc.official_name or acc.name,
-                        acc.subtype.value,
-                        acc.mask,
-                    ),
+                    Plaid.__build_fingerprint(*identity),
                     acc.type.value,
                     acc["balances"]["current"],
+                    Plaid.__build_fingerprint(
+                        *identity, version=LEGACY_FINGERPRINT_VERSION
+                    ),
                 )
             )
 
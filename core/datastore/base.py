@@ -3,7 +3,9 @@ from datetime import datetime
 
 from .model import (
     Account,
+    AppleIngestJob,
     Budget,
+    ImportJob,
     PartialAccount,
     PartialBudget,
     PartialTransaction,
@@ -27,9 +29,25 @@ class DataStore(ABC):
         override_create_date: datetime | None = None,
     ): ...
 
+    @abstractmethod
+    def update_budget_definition(
+        self,
+        id: int,
+        name: str | None = None,
+        amount_allocated: float | None = None,
+    ): ...
+
     @abstractmethod
     def delete_budget(self, id: int): ...
 
+    @abstractmethod
+    def materialize_budgets(self, start: datetime, end: datetime) -> int: ...
+
+    @abstractmethod
+    def project_budgets(
+        self, start: datetime, end: datetime, months: list[datetime]
+    ) -> int: ...
+
     @abstractmethod
     def select_budget(self, id: int) -> Budget: ...
 
@@ -39,13 +57,31 @@ class DataStore(ABC):
     @abstractmethod
     def retrieve_budgets(self) -> list[Budget]: ...
 
+    @abstractmethod
+    def recompute_budgets_spent(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> int: ...
+
     # -------- Transactions --------
+    @abstractmethod
+    def update_transactions_by_external_id(
+        self, objs: list[PartialTransaction]
+    ) -> int: ...
+
     @abstractmethod
     def update_transaction_note(self, id: int, note: str): ...
 
     @abstractmethod
     def insert_transaction(self, obj: PartialTransaction) -> int | None: ...
 
+    @abstractmethod
+    def insert_transactions(self, objs: list[PartialTransaction]) -> int: ...
+
+    @abstractmethod
+    def insert_transactions_returning_ids(
+        self, objs: list[PartialTransaction]
+    ) -> dict[bytes, int]: ...
+
     @abstractmethod
     def delete_transaction(self, id: int): ...
 
@@ -54,9 +90,30 @@ class DataStore(ABC):
 
     @abstractmethod
     def select_transaction_id_by_fingerprint_or_external_id(
-        self, fingerprint: str, external_id: str | None
+        self, fingerprint: bytes, external_id: str | None
     ) -> int | None: ...
 
+    @abstractmethod
+    def select_transaction_dates(self, ids: list[int]) -> dict[int, datetime]: ...
+
+    @abstractmethod
+    def select_transaction_ids_by_fingerprints(
+        self, fingerprints: list[bytes]
+    ) -> dict[bytes, int]: ...
+
+    @abstractmethod
+    def select_transaction_fingerprints(
+        self, start: datetime, end: datetime
+    ) -> list[bytes]: ...
+
+    @abstractmethod
+    def select_legacy_fingerprint_transactions(
+        self, after_id: int, limit: int
+    ) -> list[Transaction]: ...
+
+    @abstractmethod
+    def update_transaction_fingerprints(self, updates: list[tuple[int, bytes]]): ...
+
     @abstractmethod
     def retrieve_transactions(self) -> list[TransactionView]: ...
 
@@ -65,6 +122,14 @@ class DataStore(ABC):
         self, start: datetime, end: datetime
     ) -> list[TransactionView]: ...
 
+    @abstractmethod
+    def filter_unassigned_transactions(
+        self, start: datetime, end: datetime
+    ) -> list[TransactionView]: ...
+
+    @abstractmethod
+    def count_unassigned_transactions(self, start: datetime, end: datetime) -> int: ...
+
     # -------- Tags --------
     @abstractmethod
     def update_tag(self, obj: Tag): ...
@@ -93,7 +158,13 @@ class DataStore(ABC):
 
     # -------- Plaid Accounts --------
     @abstractmethod
-    def insert_plaid_account(self, token: str) -> int: ...
+    def insert_plaid_account(self, token: str, item_id: str | None = None) -> int: ...
+
+    @abstractmethod
+    def update_plaid_account_item_id(self, id: int, item_id: str): ...
+
+    @abstractmethod
+    def select_plaid_account_id_by_item_id(self, item_id: str) -> int | None: ...
 
     @abstractmethod
     def delete_plaid_account(self, id: int): ...
@@ -104,13 +175,96 @@ class DataStore(ABC):
     @abstractmethod
     def retrieve_plaid_accounts(self) -> list[PlaidAccount]: ...
 
+    # -------- Plaid Sync Pages --------
+    @abstractmethod
+    def insert_plaid_sync_page(
+        self, plaid_id: int, cursor: str, next_cursor: str, payload: bytes
+    ): ...
+
+    @abstractmethod
+    def select_plaid_sync_cursor(self, plaid_id: int) -> str | None: ...
+
+    @abstractmethod
+    def retrieve_plaid_sync_page_ids(
+        self, plaid_id: int | None = None
+    ) -> list[int]: ...
+
+    @abstractmethod
+    def select_plaid_sync_page(self, id: int) -> tuple[int, bytes]: ...
+
+    # -------- Apple Ingest Queue --------
+    @abstractmethod
+    def insert_apple_ingest_chunk(
+        self, idempotency_key: str, seq: int, received: int, payload: bytes
+    ): ...
+
+    @abstractmethod
+    def release_apple_ingest_chunks(self, idempotency_key: str) -> int: ...
+
+    @abstractmethod
+    def discard_apple_ingest_chunks(self, idempotency_key: str): ...
+
+    @abstractmethod
+    def claim_apple_ingest_chunk(self) -> tuple[int, bytes] | None: ...
+
+    @abstractmethod
+    def finish_apple_ingest_chunk(
+        self, id: int, inserted: int, error: str | None = None
+    ): ...
+
+    @abstractmethod
+    def requeue_apple_ingest_chunks(self) -> int: ...
+
+    @abstractmethod
+    def select_apple_ingest_job(
+        self, idempotency_key: str
+    ) -> AppleIngestJob | None: ...
+
+    # -------- Import Jobs --------
+    @abstractmethod
+    def insert_import_job(self, filename: str, path: str) -> int: ...
+
+    @abstractmethod
+    def select_import_job(self, id: int) -> ImportJob | None: ...
+
+    @abstractmethod
+    def claim_import_job(self, id: int) -> bool: ...
+
+    @abstractmethod
+    def checkpoint_import_job(
+        self,
+        id: int,
+        checkpoint: int,
+        parsed: int,
+        inserted: int,
+        deduplicated: int,
+        linked: int,
+    ): ...
+
+    @abstractmethod
+    def finish_import_job(self, id: int, error: str | None = None): ...
+
+    @abstractmethod
+    def requeue_import_jobs(self) -> list[int]: ...
+
     # -------- Accounts --------
     @abstractmethod
-    def account_exists_by_fingerprint(self, fingerprint: str) -> int | None: ...
+    def account_exists_by_fingerprint(self, fingerprint: bytes) -> int | None: ...
+
+    @abstractmethod
+    def select_legacy_fingerprint_accounts(
+        self, after_id: int, limit: int
+    ) -> list[Account]: ...
+
+    @abstractmethod
+    def update_account_fingerprints(self, updates: list[tuple[int, bytes]]): ...
 
     @abstractmethod
     def insert_account(self, obj: PartialAccount) -> int: ...
 
+    @abstractmethod
+    def update_account_balances(self, balances: dict[int, int]): ...
+
     @abstractmethod
     def delete_account(self, id: int): ...
 
@@ -127,9 +281,20 @@ class DataStore(ABC):
     @abstractmethod
     def insert_budget_transaction(self, budget_id: int, transaction_id: int): ...
 
+    @abstractmethod
+    def insert_budget_transactions(self, links: list[tuple[int, int]]) -> int: ...
+
     @abstractmethod
     def delete_budget_transaction(self, budget_id: int, transaction_id: int): ...
 
+    @abstractmethod
+    def delete_budget_transactions(self, links: list[tuple[int, int]]) -> int: ...
+
+    @abstractmethod
+    def select_budget_transaction_links(
+        self, transaction_ids: list[int]
+    ) -> list[tuple[int, int]]: ...
+
     @abstractmethod
     def retrieve_budget_transactions(self, budget_id: int) -> list[TransactionView]: ...
 
@@ -1,27 +1,95 @@
 # MARK: Imports
+import zlib
 from datetime import datetime
+from enum import StrEnum
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy import MetaData, create_engine, delete, insert, or_, select, update
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    TypeDecorator,
+    and_,
+    bindparam,
+    case,
+    create_engine,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    true,
+    union_all,
+    update,
+)
 
 from core.datastore.base import DataStore
 from core.datastore.model import (
+    STORAGE_CODES,
     Account,
+    AppleIngestJob,
     Budget,
+    BudgetLevel,
+    ImportJob,
+    IngestStatus,
     PartialAccount,
     PartialBudget,
     PartialTransaction,
     PlaidAccount,
     Tag,
     Transaction,
+    TransactionDirection,
+    TransactionSource,
+    TransactionType,
     TransactionView,
 )
-from core.utils import dollars_to_cents
+from core.utils import (
+    FINGERPRINT_VERSION,
+    dollars_to_cents,
+    legacy_fingerprint_from_hex,
+)
+
+
+class EnumCode(TypeDecorator):
+    """
+    A StrEnum column stored as its small-integer code from STORAGE_CODES.
+    Binds accept the member or its string value; results are members.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, enum: type[StrEnum]):
+        super().__init__()
+        self.enum = enum
+        self.codes = STORAGE_CODES[enum]
+        self.members = {code: member for member, code in self.codes.items()}
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self.codes[self.enum(value)]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.members[value]
 
 
 # MARK: SQLite Datastore
 class Sqlite3(DataStore):
+    # Columns stored as STORAGE_CODES integers rather than their TEXT value
+    ENUM_COLUMNS = {
+        "transactions": {"direction": TransactionDirection},
+        "accounts": {"source": TransactionSource, "account_type": TransactionType},
+        "budgets": {"level": BudgetLevel},
+    }
+    LINK_TABLES = ("budgets_transactions",)
+    # Columns computed by SQLite; older databases stored them as ordinary
+    # columns kept current by a trigger
+    GENERATED_COLUMNS = {"budgets": ("amount_saved",)}
+    DROPPED_TRIGGERS = ("budgets_amount_saved", "trg_accounts_last_updated")
+
     def __init__(self, db_path: Path):
         self.engine = create_engine(f"sqlite:///{db_path}", future=True)
 
@@ -29,23 +97,260 @@ class Sqlite3(DataStore):
             import sqlite3
 
             conn: sqlite3.Connection = conn.connection.driver_connection
+            Sqlite3.__migrate(conn)
             conn.executescript(open("schema/tags.sql").read())
+            conn.executescript(open("schema/budget_definitions.sql").read())
             conn.executescript(open("schema/budgets.sql").read())
-            conn.executescript(open("schema/budgets_tags.sql").read())
+            conn.executescript(open("schema/budget_definitions_tags.sql").read())
             conn.executescript(open("schema/transactions.sql").read())
             conn.executescript(open("schema/plaid_accounts.sql").read())
             conn.executescript(open("schema/accounts.sql").read())
             conn.executescript(open("schema/budgets_transactions.sql").read())
+            conn.executescript(open("schema/transactions_read_model.sql").read())
+            conn.executescript(open("schema/plaid_sync_pages.sql").read())
+            conn.executescript(open("schema/apple_ingest_queue.sql").read())
+            conn.executescript(open("schema/import_jobs.sql").read())
 
         self.meta = MetaData()
+        for table, columns in Sqlite3.ENUM_COLUMNS.items():
+            Table(
+                table,
+                self.meta,
+                *(Column(name, EnumCode(enum)) for name, enum in columns.items()),
+                autoload_with=self.engine,
+                extend_existing=True,
+            )
         self.meta.reflect(bind=self.engine)
         self.budgets = self.meta.tables["budgets"]
         self.tags = self.meta.tables["tags"]
-        self.budgets_tags = self.meta.tables["budgets_tags"]
+        self.budget_definitions = self.meta.tables["budget_definitions"]
+        self.budget_definitions_tags = self.meta.tables["budget_definitions_tags"]
         self.budgets_transactions = self.meta.tables["budgets_transactions"]
         self.transactions = self.meta.tables["transactions"]
         self.plaid_accounts = self.meta.tables["plaid_accounts"]
         self.accounts = self.meta.tables["accounts"]
+        self.plaid_sync_pages = self.meta.tables["plaid_sync_pages"]
+        self.apple_ingest_queue = self.meta.tables["apple_ingest_queue"]
+        self.import_jobs = self.meta.tables["import_jobs"]
+
+    @staticmethod
+    def __migrate(conn: Any):
+        """
+        Bring databases created by older schema files up to date.
+        Runs before the schema scripts so their indexes can rely on
+        the columns added here; tables that do not exist yet are skipped.
+        """
+        added_columns = {
+            "plaid_accounts": {"item_id": "TEXT"},
+            "budgets": {"definition_id": "INTEGER"},
+            "transactions": {
+                "account_name": "TEXT",
+                "budget_id": "INTEGER",
+                "budget_name": "TEXT",
+            },
+        }
+        added = set()
+        for table, columns in added_columns.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if not existing:
+                continue
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+                    added.add(table)
+
+        # Both triggers re-updated the row they fired on, doubling every write
+        for trigger in Sqlite3.DROPPED_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        Sqlite3.__compact_tables(conn)
+
+        # Fingerprints used to be stored as SHA-256 hex text. Converting
+        # them to the version 1 BLOB form needs no hashing, so it is done
+        # here in one pass; `Service.migrate_fingerprints` then upgrades
+        # what it can to version 2 in the background.
+        for table in ("transactions", "accounts"):
+            if not conn.execute(f"PRAGMA table_info({table})").fetchall():
+                continue
+            rows = conn.execute(
+                f"SELECT id, fingerprint FROM {table} "
+                "WHERE typeof(fingerprint) = 'text'"
+            ).fetchall()
+            conn.executemany(
+                f"UPDATE {table} SET fingerprint = ? WHERE id = ?",
+                [(legacy_fingerprint_from_hex(fp), id) for id, fp in rows],
+            )
+
+        if "transactions" in added:
+            Sqlite3.__backfill_read_model(conn)
+        if "budgets" in added:
+            Sqlite3.__backfill_budget_definitions(conn)
+
+    @staticmethod
+    def __backfill_read_model(conn: Any):
+        """
+        Fill the explorer columns on `transactions` in one pass; from then
+        on inserts and the `transactions_read_model.sql` triggers keep
+        them current.
+        """
+        conn.execute(
+            """
+            UPDATE transactions
+            SET
+                account_name = (
+                    SELECT name FROM accounts WHERE id = transactions.account_id
+                ),
+                (budget_id, budget_name) = (
+                    SELECT bt.budget_id, b.name
+                    FROM budgets_transactions bt
+                    JOIN budgets b ON b.id = bt.budget_id
+                    WHERE bt.transaction_id = transactions.id
+                    LIMIT 1
+                )
+            """
+        )
+
+    @staticmethod
+    def __backfill_budget_definitions(conn: Any):
+        """
+        Turn budgets copied month to month into recurring definitions, one
+        per name. A definition starts in the name's first month and takes
+        its newest allocation; names missing from the newest budgeted month
+        stop recurring after their last one. Tags move from each budget to
+        its definition.
+        """
+        conn.executescript(open("schema/budget_definitions.sql").read())
+        conn.executescript(open("schema/budget_definitions_tags.sql").read())
+        conn.execute(
+            """
+            INSERT INTO budget_definitions (name, amount_allocated, starts_on, ends_on)
+            SELECT
+                name,
+                amount_allocated,
+                first_month,
+                CASE
+                    WHEN month = newest_month THEN NULL
+                    ELSE strftime('%Y-%m', month || '-01', '+1 month')
+                END
+            FROM (
+                SELECT
+                    name,
+                    amount_allocated,
+                    substr(created_at, 1, 7) AS month,
+                    min(substr(created_at, 1, 7)) OVER (PARTITION BY name) AS first_month,
+                    max(substr(created_at, 1, 7)) OVER () AS newest_month,
+                    row_number() OVER (
+                        PARTITION BY name ORDER BY created_at DESC, id DESC
+                    ) AS newest
+                FROM budgets
+            )
+            WHERE newest = 1
+            ORDER BY first_month, name
+            """
+        )
+        conn.execute(
+            """
+            UPDATE budgets
+            SET definition_id = (
+                SELECT id FROM budget_definitions WHERE name = budgets.name
+            )
+            """
+        )
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'budgets_tags'"
+        ).fetchone():
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO budget_definitions_tags (tag_id, definition_id)
+                SELECT bt.tag_id, b.definition_id
+                FROM budgets_tags bt
+                JOIN budgets b ON b.id = bt.budget_id
+                """
+            )
+            conn.execute("DROP TABLE budgets_tags")
+
+    @staticmethod
+    def __compact_tables(conn: Any):
+        """
+        Rebuild tables still in the pre-compact layout: enum columns stored
+        as TEXT, link tables with a rowid, or generated columns stored as
+        ordinary ones. `table_info` leaves generated columns out, so they
+        are never copied.
+        """
+        tables = dict.fromkeys(
+            (*Sqlite3.ENUM_COLUMNS, *Sqlite3.LINK_TABLES, *Sqlite3.GENERATED_COLUMNS)
+        )
+        for table in tables:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (table,),
+            ).fetchone()
+            if row is None:
+                continue
+            columns = {
+                info[1]: info[2] for info in conn.execute(f"PRAGMA table_info({table})")
+            }
+            enums = Sqlite3.ENUM_COLUMNS.get(table, {})
+            if table in Sqlite3.LINK_TABLES:
+                stale = "WITHOUT ROWID" not in row[0].upper()
+            else:
+                stale = any(columns[name].upper() == "TEXT" for name in enums)
+            generated = Sqlite3.GENERATED_COLUMNS.get(table, ())
+            stale = stale or any(name in columns for name in generated)
+            if stale:
+                Sqlite3.__rebuild_table(
+                    conn,
+                    table,
+                    [name for name in columns if name not in generated],
+                    enums,
+                )
+
+    @staticmethod
+    def __rebuild_table(
+        conn: Any, table: str, columns: list[str], enums: dict[str, type[StrEnum]]
+    ):
+        """
+        Recreate `table` from its schema file and copy its rows over,
+        mapping enum columns to their codes. Runs as one script so it
+        commits or rolls back as a whole. `legacy_alter_table` keeps other
+        tables' foreign keys on the table name instead of following the
+        rename; triggers and indexes are dropped so the schema file
+        recreates them on the new table.
+        """
+        values = []
+        for name in columns:
+            if name in enums:
+                whens = " ".join(
+                    f"WHEN '{member.value}' THEN {code}"
+                    for member, code in STORAGE_CODES[enums[name]].items()
+                )
+                values.append(f"CASE {name} {whens} END")
+            else:
+                values.append(name)
+        drops = "".join(
+            f"DROP {kind} {name};\n"
+            for kind, name in conn.execute(
+                "SELECT type, name FROM sqlite_master "
+                "WHERE tbl_name = ? AND type IN ('trigger', 'index') AND sql IS NOT NULL",
+                (table,),
+            )
+        )
+        conn.executescript(
+            f"""
+            BEGIN;
+            PRAGMA legacy_alter_table = ON;
+            {drops}
+            ALTER TABLE {table} RENAME TO {table}_old;
+            {open(f"schema/{table}.sql").read()};
+            INSERT INTO {table} ({", ".join(columns)})
+            SELECT {", ".join(values)} FROM {table}_old;
+            UPDATE sqlite_sequence
+            SET seq = (SELECT seq FROM sqlite_sequence WHERE name = '{table}_old')
+            WHERE name = '{table}';
+            DROP TABLE {table}_old;
+            PRAGMA legacy_alter_table = OFF;
+            COMMIT;
+            """
+        )
 
     @staticmethod
     def __rows_to_transaction_views(rows: Any) -> list[TransactionView]:
@@ -54,6 +359,7 @@ class Sqlite3(DataStore):
             data = dict(row._mapping)
             occurred = data.get("occurred_at")
             data.pop("account_id")
+            data.pop("budget_id")
             data.pop("fingerprint")
             if isinstance(occurred, str):
                 data["occurred_at"] = datetime.fromisoformat(occurred)
@@ -67,13 +373,27 @@ class Sqlite3(DataStore):
         amount_allocated: float,
         override_create_date: datetime | None = None,
     ):
+        """
+        Create a recurring budget starting in the month of
+        `override_create_date` (default now), along with that month's
+        budget. Later months get theirs from `materialize_budgets`.
+        """
         with self.engine.begin() as conn:
             values = {
                 "name": name,
                 "amount_allocated": dollars_to_cents(amount_allocated),
             }
+            created_at = (
+                override_create_date.isoformat() if override_create_date else "now"
+            )
+            definition_id = conn.execute(
+                insert(self.budget_definitions).values(
+                    **values, starts_on=func.strftime("%Y-%m", created_at)
+                )
+            ).inserted_primary_key[0]
+            values["definition_id"] = definition_id
             if override_create_date:
-                values["created_at"] = override_create_date.isoformat()
+                values["created_at"] = created_at
             conn.execute(insert(self.budgets).values(values))
 
     def update_budget(self, obj: PartialBudget):
@@ -91,10 +411,125 @@ class Sqlite3(DataStore):
                 .where(self.budgets.c.id == obj.id)
             )
 
+    def update_budget_definition(
+        self,
+        id: int,
+        name: str | None = None,
+        amount_allocated: float | None = None,
+    ):
+        """
+        Edit the recurring budget behind budget `id`: its definition and
+        every month from this budget's on. Earlier months keep their values.
+        """
+        values = {}
+        if name is not None:
+            values["name"] = name
+        if amount_allocated is not None:
+            values["amount_allocated"] = dollars_to_cents(amount_allocated)
+        if not values:
+            return
+        with self.engine.begin() as conn:
+            budget = self.__budget_month(conn, id)
+            if budget is None:
+                return
+            conn.execute(
+                update(self.budget_definitions)
+                .values(values)
+                .where(self.budget_definitions.c.id == budget.definition_id)
+            )
+            conn.execute(
+                update(self.budgets)
+                .values(values)
+                .where(self.__budget_and_later_months(budget))
+            )
+
     def delete_budget(self, id: int):
+        """
+        Delete budget `id` and its transaction links; other months are
+        left alone. When it was its recurring budget's newest month the
+        recurrence stops there, so the month is not materialized again;
+        otherwise viewing the month while it is current or upcoming
+        creates it again.
+        """
+        definitions = self.budget_definitions
+        link = self.budgets_transactions
         with self.engine.begin() as conn:
+            budget = self.__budget_month(conn, id)
+            if budget is None:
+                return
+            later = (
+                select(self.budgets.c.id)
+                .where(self.budgets.c.definition_id == definitions.c.id)
+                .where(func.substr(self.budgets.c.created_at, 1, 7) > budget.month)
+            )
+            conn.execute(
+                update(definitions)
+                .values(
+                    ends_on=func.min(
+                        func.coalesce(definitions.c.ends_on, budget.month),
+                        budget.month,
+                    )
+                )
+                .where(definitions.c.id == budget.definition_id)
+                .where(~exists(later))
+            )
+            # Links first, so the read model falls back to another budget
+            conn.execute(delete(link).where(link.c.budget_id == id))
             conn.execute(delete(self.budgets).where(self.budgets.c.id == id))
 
+    def __budget_month(self, conn: Any, id: int) -> Any:
+        return conn.execute(
+            select(
+                self.budgets.c.id,
+                self.budgets.c.definition_id,
+                func.substr(self.budgets.c.created_at, 1, 7).label("month"),
+            ).where(self.budgets.c.id == id)
+        ).fetchone()
+
+    def __budget_and_later_months(self, budget: Any):
+        if budget.definition_id is None:
+            return self.budgets.c.id == budget.id
+        return or_(
+            self.budgets.c.id == budget.id,
+            and_(
+                self.budgets.c.definition_id == budget.definition_id,
+                func.substr(self.budgets.c.created_at, 1, 7) >= budget.month,
+            ),
+        )
+
+    def materialize_budgets(self, start: datetime, end: datetime) -> int:
+        """
+        Create the month's budget, dated `start`, for every recurring
+        budget active in that month that has none in [start, end) yet.
+        One INSERT ... SELECT; returns how many were created, which is 0
+        every time after the month is first viewed.
+        """
+        definitions = self.budget_definitions
+        month = start.strftime("%Y-%m")
+        existing = (
+            select(self.budgets.c.id)
+            .where(self.budgets.c.definition_id == definitions.c.id)
+            .where(self.budgets.c.created_at >= start.date())
+            .where(self.budgets.c.created_at < end.date())
+        )
+        due = (
+            select(
+                definitions.c.name,
+                definitions.c.amount_allocated,
+                literal(start.isoformat()),
+                definitions.c.id,
+            )
+            .where(definitions.c.starts_on <= month)
+            .where(or_(definitions.c.ends_on.is_(None), definitions.c.ends_on > month))
+            .where(~exists(existing))
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(
+                insert(self.budgets).from_select(
+                    ["name", "amount_allocated", "created_at", "definition_id"], due
+                )
+            ).rowcount
+
     def select_budget(self, id: int) -> Budget:
         with self.engine.begin() as conn:
             return conn.execute(
@@ -113,16 +548,118 @@ class Sqlite3(DataStore):
                 .where(self.budgets.c.created_at < end.date())
             ).fetchall()
 
+    def project_budgets(
+        self, start: datetime, end: datetime, months: list[datetime]
+    ) -> int:
+        """
+        Copy the budgets created in [start, end) into each month starting
+        at one of `months`, with their recurring budget's current name and
+        allocation. A month is skipped when it already has a budget of the
+        same recurring budget or name, or when the recurring budget ended
+        by then. One INSERT ... SELECT over the target months; copies keep
+        their `definition_id`, so they share its tags. Returns how many
+        budgets were created.
+        """
+        if not months:
+            return 0
+        targets = union_all(
+            *(select(literal(month.isoformat()).label("start")) for month in months)
+        ).subquery("targets")
+        source = self.budgets.alias("source")
+        definitions = self.budget_definitions
+        name = func.coalesce(definitions.c.name, source.c.name)
+        taken = (
+            select(self.budgets.c.id)
+            .where(
+                or_(
+                    self.budgets.c.definition_id == source.c.definition_id,
+                    self.budgets.c.name == name,
+                )
+            )
+            .where(self.budgets.c.created_at >= func.date(targets.c.start))
+            .where(self.budgets.c.created_at < func.date(targets.c.start, "+1 month"))
+        )
+        rows = (
+            select(
+                name,
+                func.coalesce(
+                    definitions.c.amount_allocated, source.c.amount_allocated
+                ),
+                targets.c.start,
+                source.c.definition_id,
+            )
+            .select_from(
+                source.join(targets, true()).outerjoin(
+                    definitions, definitions.c.id == source.c.definition_id
+                )
+            )
+            .where(source.c.created_at >= start.date())
+            .where(source.c.created_at < end.date())
+            .where(
+                or_(
+                    definitions.c.ends_on.is_(None),
+                    definitions.c.ends_on > func.substr(targets.c.start, 1, 7),
+                )
+            )
+            .where(~exists(taken))
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(
+                insert(self.budgets).from_select(
+                    ["name", "amount_allocated", "created_at", "definition_id"], rows
+                )
+            ).rowcount
+
+    def recompute_budgets_spent(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> int:
+        """
+        Recompute `amount_spent` for every budget, or those created in
+        [start, end), with one grouped UPDATE. Sums the same transactions
+        `retrieve_budget_transactions` returns. Only budgets whose total
+        changed are written; returns how many were.
+        """
+        txn = self.transactions
+        link = self.budgets_transactions
+        spent = (
+            select(
+                self.budgets.c.id,
+                func.coalesce(func.sum(func.abs(txn.c.amount)), 0).label("spent"),
+            )
+            .select_from(self.budgets)
+            .outerjoin(link, link.c.budget_id == self.budgets.c.id)
+            .outerjoin(
+                txn,
+                (txn.c.id == link.c.transaction_id)
+                & (txn.c.direction == TransactionDirection.OUT)
+                & txn.c.account_name.is_not(None),
+            )
+            .group_by(self.budgets.c.id)
+        )
+        if start and end:
+            spent = spent.where(self.budgets.c.created_at >= start.date()).where(
+                self.budgets.c.created_at < end.date()
+            )
+        spent = spent.subquery()
+        with self.engine.begin() as conn:
+            return conn.execute(
+                update(self.budgets)
+                .values(amount_spent=spent.c.spent)
+                .where(self.budgets.c.id == spent.c.id)
+                .where(self.budgets.c.amount_spent.is_distinct_from(spent.c.spent))
+            ).rowcount
+
     # MARK: - Transactions
     def insert_transaction(self, obj: PartialTransaction) -> int | None:
         with self.engine.begin() as conn:
             values = {
                 "name": obj.name,
-                "amount": dollars_to_cents(obj.amount),
+                "amount": Sqlite3.__transaction_cents(obj),
                 "direction": obj.direction,
                 "external_id": obj.external_id,
                 "account_id": obj.account_id,
                 "fingerprint": obj.fingerprint,
+                "account_name": self.__account_name(obj.account_id),
             }
             if obj.occurred_at:
                 values["occurred_at"] = obj.occurred_at.isoformat()
@@ -135,6 +672,125 @@ class Sqlite3(DataStore):
                 return None
             return result.inserted_primary_key[0]
 
+    def insert_transactions(self, objs: list[PartialTransaction]) -> int:
+        if not objs:
+            return 0
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                self.__bulk_transaction_insert(), self.__bulk_transaction_params(objs)
+            )
+            return result.rowcount
+
+    def insert_transactions_returning_ids(
+        self, objs: list[PartialTransaction]
+    ) -> dict[bytes, int]:
+        if not objs:
+            return {}
+        stmt = self.__bulk_transaction_insert().returning(
+            self.transactions.c.fingerprint, self.transactions.c.id
+        )
+        with self.engine.begin() as conn:
+            rows = conn.execute(stmt, self.__bulk_transaction_params(objs))
+            # Ignored rows return nothing, so only new rows are mapped
+            return {row.fingerprint: row.id for row in rows}
+
+    def __bulk_transaction_insert(self):
+        # One executemany for the whole batch; NULLs fall back to the
+        # same defaults a single-row insert would get from the schema
+        return (
+            insert(self.transactions)
+            .prefix_with("OR IGNORE")
+            .values(
+                name=bindparam("txn_name"),
+                amount=bindparam("txn_amount"),
+                direction=bindparam("txn_direction"),
+                external_id=bindparam("txn_external_id"),
+                account_id=bindparam("txn_account_id"),
+                account_name=self.__account_name(bindparam("txn_account_id")),
+                fingerprint=bindparam("txn_fingerprint"),
+                occurred_at=func.coalesce(
+                    bindparam("txn_occurred_at"), func.datetime("now")
+                ),
+                note=func.coalesce(bindparam("txn_note"), ""),
+            )
+        )
+
+    def __account_name(self, account_id: Any):
+        # Set in the INSERT itself so the explorer column costs no extra write
+        return (
+            select(self.accounts.c.name)
+            .where(self.accounts.c.id == account_id)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def __transaction_cents(obj: PartialTransaction) -> int:
+        if obj.amount_cents is not None:
+            return obj.amount_cents
+        return dollars_to_cents(obj.amount)
+
+    @staticmethod
+    def __bulk_transaction_params(objs: list[PartialTransaction]) -> list[dict]:
+        return [
+            {
+                "txn_name": obj.name,
+                "txn_amount": Sqlite3.__transaction_cents(obj),
+                "txn_direction": obj.direction,
+                "txn_external_id": obj.external_id,
+                "txn_account_id": obj.account_id,
+                "txn_fingerprint": obj.fingerprint,
+                "txn_occurred_at": (
+                    obj.occurred_at.isoformat() if obj.occurred_at else None
+                ),
+                "txn_note": obj.note or None,
+            }
+            for obj in objs
+        ]
+
+    def update_transactions_by_external_id(self, objs: list[PartialTransaction]) -> int:
+        """
+        Rewrite the name, amount, direction and fingerprint of stored
+        transactions matched by `external_id`. Rows that already hold
+        those values are not written, and an update that would collide
+        with another row's fingerprint is skipped. Returns how many rows
+        changed.
+        """
+        objs = [obj for obj in objs if obj.external_id]
+        if not objs:
+            return 0
+        txn = self.transactions
+        stmt = (
+            update(txn)
+            .prefix_with("OR IGNORE")
+            .where(txn.c.external_id == bindparam("txn_external_id"))
+            .where(
+                or_(
+                    txn.c.name.is_distinct_from(bindparam("txn_name")),
+                    txn.c.amount.is_distinct_from(bindparam("txn_amount")),
+                    txn.c.direction.is_distinct_from(bindparam("txn_direction")),
+                    txn.c.fingerprint.is_distinct_from(bindparam("txn_fingerprint")),
+                )
+            )
+            .values(
+                name=bindparam("txn_name"),
+                amount=bindparam("txn_amount"),
+                direction=bindparam("txn_direction"),
+                fingerprint=bindparam("txn_fingerprint"),
+            )
+        )
+        params = [
+            {
+                "txn_external_id": obj.external_id,
+                "txn_name": obj.name,
+                "txn_amount": Sqlite3.__transaction_cents(obj),
+                "txn_direction": obj.direction,
+                "txn_fingerprint": obj.fingerprint,
+            }
+            for obj in objs
+        ]
+        with self.engine.begin() as conn:
+            return conn.execute(stmt, params).rowcount
+
     def update_transaction_note(self, id: int, note: str):
         with self.engine.begin() as conn:
             conn.execute(
@@ -154,7 +810,7 @@ class Sqlite3(DataStore):
             ).fetchone()
 
     def select_transaction_id_by_fingerprint_or_external_id(
-        self, fingerprint: str, external_id: str | None
+        self, fingerprint: bytes, external_id: str | None
     ) -> int | None:
         with self.engine.begin() as conn:
             if external_id:
@@ -169,26 +825,82 @@ class Sqlite3(DataStore):
             ).fetchone()
             return row[0] if row else None
 
-    def retrieve_transactions(self) -> list[TransactionView]:
+    def select_transaction_dates(self, ids: list[int]) -> dict[int, datetime]:
+        if not ids:
+            return {}
         with self.engine.begin() as conn:
             rows = conn.execute(
-                select(
-                    self.transactions,
-                    self.accounts.c.name.label("account_name"),
-                    self.budgets.c.name.label("budget_name"),
+                select(self.transactions.c.id, self.transactions.c.occurred_at).where(
+                    self.transactions.c.id.in_(ids)
                 )
-                .join(
-                    self.accounts, self.transactions.c.account_id == self.accounts.c.id
-                )
-                .outerjoin(
-                    self.budgets_transactions,
-                    self.transactions.c.id
-                    == self.budgets_transactions.c.transaction_id,
+            ).fetchall()
+            return {row.id: datetime.fromisoformat(row.occurred_at) for row in rows}
+
+    def select_transaction_ids_by_fingerprints(
+        self, fingerprints: list[bytes]
+    ) -> dict[bytes, int]:
+        if not fingerprints:
+            return {}
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(self.transactions.c.fingerprint, self.transactions.c.id).where(
+                    self.transactions.c.fingerprint.in_(fingerprints)
                 )
-                .outerjoin(
-                    self.budgets,
-                    self.budgets_transactions.c.budget_id == self.budgets.c.id,
+            ).fetchall()
+            return {row.fingerprint: row.id for row in rows}
+
+    def select_transaction_fingerprints(
+        self, start: datetime, end: datetime
+    ) -> list[bytes]:
+        with self.engine.begin() as conn:
+            return (
+                conn.execute(
+                    select(self.transactions.c.fingerprint)
+                    .where(self.transactions.c.occurred_at >= start.date())
+                    .where(self.transactions.c.occurred_at < end.date())
                 )
+                .scalars()
+                .all()
+            )
+
+    def select_legacy_fingerprint_transactions(
+        self, after_id: int, limit: int
+    ) -> list[Transaction]:
+        with self.engine.begin() as conn:
+            return conn.execute(
+                select(self.transactions)
+                .where(self.transactions.c.id > after_id)
+                .where(Sqlite3.__is_legacy_fingerprint(self.transactions))
+                .order_by(self.transactions.c.id)
+                .limit(limit)
+            ).fetchall()
+
+    def update_transaction_fingerprints(self, updates: list[tuple[int, bytes]]):
+        if not updates:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(self.transactions)
+                .where(self.transactions.c.id == bindparam("txn_id"))
+                .values(fingerprint=bindparam("txn_fingerprint")),
+                [
+                    {"txn_id": id, "txn_fingerprint": fingerprint}
+                    for id, fingerprint in updates
+                ],
+            )
+
+    @staticmethod
+    def __is_legacy_fingerprint(table):
+        # Version 2 and later sort from the version byte up; everything
+        # below it (version 1 BLOBs, and TEXT, which SQLite orders before
+        # any BLOB) predates it
+        return table.c.fingerprint < bytes((FINGERPRINT_VERSION,))
+
+    def retrieve_transactions(self) -> list[TransactionView]:
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(self.transactions)
+                .where(self.transactions.c.account_name.is_not(None))
                 .order_by(self.transactions.c.occurred_at.desc())
             ).fetchall()
 
@@ -199,23 +911,8 @@ class Sqlite3(DataStore):
     ) -> list[TransactionView]:
         with self.engine.begin() as conn:
             rows = conn.execute(
-                select(
-                    self.transactions,
-                    self.accounts.c.name.label("account_name"),
-                    self.budgets.c.name.label("budget_name"),
-                )
-                .join(
-                    self.accounts, self.transactions.c.account_id == self.accounts.c.id
-                )
-                .outerjoin(
-                    self.budgets_transactions,
-                    self.transactions.c.id
-                    == self.budgets_transactions.c.transaction_id,
-                )
-                .outerjoin(
-                    self.budgets,
-                    self.budgets_transactions.c.budget_id == self.budgets.c.id,
-                )
+                select(self.transactions)
+                .where(self.transactions.c.account_name.is_not(None))
                 .where(self.transactions.c.occurred_at >= start.date())
                 .where(self.transactions.c.occurred_at < end.date())
                 .order_by(self.transactions.c.occurred_at.desc())
@@ -223,6 +920,40 @@ class Sqlite3(DataStore):
 
             return Sqlite3.__rows_to_transaction_views(rows)
 
+    def __unassigned(self, start: datetime, end: datetime):
+        # Matches idx_transactions_unassigned term for term so the planner
+        # can use the partial index
+        return (
+            self.transactions.c.budget_id.is_(None),
+            self.transactions.c.account_name.is_not(None),
+            self.transactions.c.occurred_at >= start.date(),
+            self.transactions.c.occurred_at < end.date(),
+        )
+
+    def filter_unassigned_transactions(
+        self, start: datetime, end: datetime
+    ) -> list[TransactionView]:
+        """
+        Transactions in [start, end) that are not linked to any budget,
+        newest first.
+        """
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(self.transactions)
+                .where(*self.__unassigned(start, end))
+                .order_by(self.transactions.c.occurred_at.desc())
+            ).fetchall()
+
+            return Sqlite3.__rows_to_transaction_views(rows)
+
+    def count_unassigned_transactions(self, start: datetime, end: datetime) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(
+                select(func.count())
+                .select_from(self.transactions)
+                .where(*self.__unassigned(start, end))
+            ).scalar_one()
+
     # MARK: - Tags
     def insert_tag(self, name: str) -> int:
         with self.engine.begin() as conn:
@@ -250,39 +981,66 @@ class Sqlite3(DataStore):
             return conn.execute(select(self.tags)).fetchall()
 
     # MARK: - Budget ↔ Tag Links
+    # Tags belong to the recurring budget, so every month shares one set
+    def __definition_id(self, budget_id: int):
+        return (
+            select(self.budgets.c.definition_id)
+            .where(self.budgets.c.id == budget_id)
+            .scalar_subquery()
+        )
+
     def insert_budget_tag(self, budget_id: int, tag_id: int):
         with self.engine.begin() as conn:
             conn.execute(
-                insert(self.budgets_tags)
-                .values(tag_id=tag_id, budget_id=budget_id)
+                insert(self.budget_definitions_tags)
+                .values(tag_id=tag_id, definition_id=self.__definition_id(budget_id))
                 .prefix_with("OR IGNORE")
             )
 
     def delete_budget_tag(self, budget_id: int, tag_id: int):
+        links = self.budget_definitions_tags
         with self.engine.begin() as conn:
             conn.execute(
-                delete(self.budgets_tags)
-                .where(self.budgets_tags.c.tag_id == tag_id)
-                .where(self.budgets_tags.c.budget_id == budget_id)
+                delete(links)
+                .where(links.c.tag_id == tag_id)
+                .where(links.c.definition_id == self.__definition_id(budget_id))
             )
 
     def retrieve_budget_tags(self, id: int) -> list[Tag]:
+        links = self.budget_definitions_tags
         with self.engine.begin() as conn:
             return conn.execute(
                 select(self.tags)
-                .join(
-                    self.budgets_tags,
-                    self.tags.c.id == self.budgets_tags.c.tag_id,
-                )
-                .where(self.budgets_tags.c.budget_id == id)
+                .join(links, self.tags.c.id == links.c.tag_id)
+                .where(links.c.definition_id == self.__definition_id(id))
             ).fetchall()
 
     # MARK: - Plaid Accounts
-    def insert_plaid_account(self, token: str) -> int:
+    def insert_plaid_account(self, token: str, item_id: str | None = None) -> int:
         with self.engine.begin() as conn:
-            result = conn.execute(insert(self.plaid_accounts).values(token=token))
+            result = conn.execute(
+                insert(self.plaid_accounts).values(token=token, item_id=item_id)
+            )
             return result.inserted_primary_key[0]
 
+    def update_plaid_account_item_id(self, id: int, item_id: str):
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(self.plaid_accounts)
+                .values(item_id=item_id)
+                .where(self.plaid_accounts.c.id == id)
+            )
+
+    def select_plaid_account_id_by_item_id(self, item_id: str) -> int | None:
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(self.plaid_accounts.c.id).where(
+                    self.plaid_accounts.c.item_id == item_id
+                )
+            ).first()
+
+            return row.id if row else None
+
     def delete_plaid_account(self, id: int):
         with self.engine.begin() as conn:
             conn.execute(
@@ -299,8 +1057,266 @@ class Sqlite3(DataStore):
         with self.engine.begin() as conn:
             return conn.execute(select(self.plaid_accounts)).fetchall()
 
+    # MARK: - Plaid Sync Pages
+    def insert_plaid_sync_page(
+        self, plaid_id: int, cursor: str, next_cursor: str, payload: bytes
+    ):
+        with self.engine.begin() as conn:
+            conn.execute(
+                insert(self.plaid_sync_pages).values(
+                    plaid_id=plaid_id,
+                    cursor=cursor,
+                    next_cursor=next_cursor,
+                    payload=zlib.compress(payload),
+                )
+            )
+
+    def select_plaid_sync_cursor(self, plaid_id: int) -> str | None:
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(self.plaid_sync_pages.c.next_cursor)
+                .where(self.plaid_sync_pages.c.plaid_id == plaid_id)
+                .order_by(self.plaid_sync_pages.c.id.desc())
+                .limit(1)
+            ).first()
+
+            return row.next_cursor if row else None
+
+    def retrieve_plaid_sync_page_ids(self, plaid_id: int | None = None) -> list[int]:
+        query = select(self.plaid_sync_pages.c.id).order_by(self.plaid_sync_pages.c.id)
+        if plaid_id is not None:
+            query = query.where(self.plaid_sync_pages.c.plaid_id == plaid_id)
+        with self.engine.begin() as conn:
+            return list(conn.execute(query).scalars())
+
+    def select_plaid_sync_page(self, id: int) -> tuple[int, bytes]:
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(
+                    self.plaid_sync_pages.c.plaid_id, self.plaid_sync_pages.c.payload
+                ).where(self.plaid_sync_pages.c.id == id)
+            ).first()
+
+            return row.plaid_id, zlib.decompress(row.payload)
+
+    # MARK: - Apple Ingest Queue
+    def insert_apple_ingest_chunk(
+        self, idempotency_key: str, seq: int, received: int, payload: bytes
+    ):
+        # A chunk already stored under this key and seq is ignored, so a
+        # retried upload only fills in what is missing
+        with self.engine.begin() as conn:
+            conn.execute(
+                insert(self.apple_ingest_queue).values(
+                    idempotency_key=idempotency_key,
+                    seq=seq,
+                    received=received,
+                    payload=zlib.compress(payload),
+                    status=IngestStatus.RECEIVING,
+                )
+            )
+
+    def release_apple_ingest_chunks(self, idempotency_key: str) -> int:
+        queue = self.apple_ingest_queue
+        with self.engine.begin() as conn:
+            return conn.execute(
+                update(queue)
+                .where(
+                    queue.c.idempotency_key == idempotency_key,
+                    queue.c.status == IngestStatus.RECEIVING,
+                )
+                .values(status=IngestStatus.QUEUED)
+            ).rowcount
+
+    def discard_apple_ingest_chunks(self, idempotency_key: str):
+        queue = self.apple_ingest_queue
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(queue).where(
+                    queue.c.idempotency_key == idempotency_key,
+                    queue.c.status == IngestStatus.RECEIVING,
+                )
+            )
+
+    def claim_apple_ingest_chunk(self) -> tuple[int, bytes] | None:
+        queue = self.apple_ingest_queue
+        next_id = (
+            select(queue.c.id)
+            .where(queue.c.status == IngestStatus.QUEUED)
+            .order_by(queue.c.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                update(queue)
+                .where(queue.c.id == next_id)
+                .values(status=IngestStatus.PROCESSING)
+                .returning(queue.c.id, queue.c.payload)
+            ).first()
+
+            return (row.id, zlib.decompress(row.payload)) if row else None
+
+    def finish_apple_ingest_chunk(
+        self, id: int, inserted: int, error: str | None = None
+    ):
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(self.apple_ingest_queue)
+                .where(self.apple_ingest_queue.c.id == id)
+                .values(
+                    status=IngestStatus.FAILED if error else IngestStatus.DONE,
+                    inserted=inserted,
+                    error=error,
+                    finished_at=func.datetime("now"),
+                )
+            )
+
+    def requeue_apple_ingest_chunks(self) -> int:
+        # Chunks left PROCESSING were interrupted (e.g. by a restart)
+        with self.engine.begin() as conn:
+            return conn.execute(
+                update(self.apple_ingest_queue)
+                .where(self.apple_ingest_queue.c.status == IngestStatus.PROCESSING)
+                .values(status=IngestStatus.QUEUED)
+            ).rowcount
+
+    def select_apple_ingest_job(self, idempotency_key: str) -> AppleIngestJob | None:
+        queue = self.apple_ingest_queue
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(
+                    func.count().label("chunks"),
+                    func.sum(
+                        case((queue.c.status == IngestStatus.RECEIVING, 1), else_=0)
+                    ).label("receiving"),
+                    func.sum(
+                        case((queue.c.status == IngestStatus.QUEUED, 1), else_=0)
+                    ).label("queued"),
+                    func.sum(
+                        case(
+                            (
+                                queue.c.status.in_(
+                                    [IngestStatus.DONE, IngestStatus.FAILED]
+                                ),
+                                1,
+                            ),
+                            else_=0,
+                        )
+                    ).label("finished"),
+                    func.sum(queue.c.received).label("received"),
+                    func.sum(queue.c.inserted).label("inserted"),
+                    func.max(queue.c.error).label("error"),
+                ).where(queue.c.idempotency_key == idempotency_key)
+            ).first()
+
+        if not row.chunks:
+            return None
+        if row.receiving:
+            status = IngestStatus.RECEIVING
+        elif row.finished == row.chunks:
+            status = IngestStatus.FAILED if row.error else IngestStatus.DONE
+        elif row.queued == row.chunks:
+            status = IngestStatus.QUEUED
+        else:
+            status = IngestStatus.PROCESSING
+        return AppleIngestJob(
+            idempotency_key,
+            status,
+            row.chunks,
+            row.finished,
+            row.received,
+            row.inserted,
+            row.error,
+        )
+
+    # MARK: - Import Jobs
+    def insert_import_job(self, filename: str, path: str) -> int:
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                insert(self.import_jobs).values(filename=filename, path=path)
+            )
+            return result.inserted_primary_key[0]
+
+    def select_import_job(self, id: int) -> ImportJob | None:
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(self.import_jobs).where(self.import_jobs.c.id == id)
+            ).first()
+
+            return ImportJob(**row._mapping) if row else None
+
+    def claim_import_job(self, id: int) -> bool:
+        # Only one runner at a time; DONE jobs are never re-run
+        with self.engine.begin() as conn:
+            return (
+                conn.execute(
+                    update(self.import_jobs)
+                    .where(
+                        self.import_jobs.c.id == id,
+                        self.import_jobs.c.status.in_(
+                            [IngestStatus.QUEUED, IngestStatus.FAILED]
+                        ),
+                    )
+                    .values(status=IngestStatus.PROCESSING, error=None)
+                ).rowcount
+                == 1
+            )
+
+    def checkpoint_import_job(
+        self,
+        id: int,
+        checkpoint: int,
+        parsed: int,
+        inserted: int,
+        deduplicated: int,
+        linked: int,
+    ):
+        jobs = self.import_jobs
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(jobs)
+                .where(jobs.c.id == id)
+                .values(
+                    checkpoint=checkpoint,
+                    rows_parsed=jobs.c.rows_parsed + parsed,
+                    rows_inserted=jobs.c.rows_inserted + inserted,
+                    rows_deduplicated=jobs.c.rows_deduplicated + deduplicated,
+                    rows_linked=jobs.c.rows_linked + linked,
+                )
+            )
+
+    def finish_import_job(self, id: int, error: str | None = None):
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(self.import_jobs)
+                .where(self.import_jobs.c.id == id)
+                .values(
+                    status=IngestStatus.FAILED if error else IngestStatus.DONE,
+                    error=error,
+                    finished_at=func.datetime("now"),
+                )
+            )
+
+    def requeue_import_jobs(self) -> list[int]:
+        # Jobs left PROCESSING were interrupted (e.g. by a restart)
+        jobs = self.import_jobs
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(jobs)
+                .where(jobs.c.status == IngestStatus.PROCESSING)
+                .values(status=IngestStatus.QUEUED)
+            )
+            return list(
+                conn.execute(
+                    select(jobs.c.id)
+                    .where(jobs.c.status == IngestStatus.QUEUED)
+                    .order_by(jobs.c.id)
+                ).scalars()
+            )
+
     # MARK: - Accounts
-    def account_exists_by_fingerprint(self, fingerprint: str) -> int | None:
+    def account_exists_by_fingerprint(self, fingerprint: bytes) -> int | None:
         with self.engine.begin() as conn:
             row = conn.execute(
                 select(self.accounts.c.id)
@@ -310,6 +1326,35 @@ class Sqlite3(DataStore):
 
             return row.id if row else None
 
+    def select_legacy_fingerprint_accounts(
+        self, after_id: int, limit: int
+    ) -> list[Account]:
+        with self.engine.begin() as conn:
+            return conn.execute(
+                select(self.accounts)
+                .where(self.accounts.c.id > after_id)
+                .where(Sqlite3.__is_legacy_fingerprint(self.accounts))
+                .order_by(self.accounts.c.id)
+                .limit(limit)
+            ).fetchall()
+
+    def update_account_fingerprints(self, updates: list[tuple[int, bytes]]):
+        if not updates:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(self.accounts)
+                .where(self.accounts.c.id == bindparam("account_id"))
+                .values(
+                    fingerprint=bindparam("account_fingerprint"),
+                    last_updated_at=func.datetime("now"),
+                ),
+                [
+                    {"account_id": id, "account_fingerprint": fingerprint}
+                    for id, fingerprint in updates
+                ],
+            )
+
     def insert_account(self, obj: PartialAccount) -> int:
         values = {
             "name": obj.name,
@@ -327,6 +1372,22 @@ class Sqlite3(DataStore):
             )
             return result.inserted_primary_key[0]
 
+    def update_account_balances(self, balances: dict[int, int]):
+        # Balances are expected in cents already
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(self.accounts)
+                .where(self.accounts.c.id == bindparam("account_id"))
+                .values(
+                    balance=bindparam("new_balance"),
+                    last_updated_at=func.datetime("now"),
+                ),
+                [
+                    {"account_id": id, "new_balance": balance}
+                    for id, balance in balances.items()
+                ],
+            )
+
     def delete_account(self, id: int):
         with self.engine.begin() as conn:
             conn.execute(delete(self.accounts).where(self.accounts.c.id == id))
@@ -365,6 +1426,27 @@ class Sqlite3(DataStore):
                 .prefix_with("OR IGNORE")
             )
 
+    def insert_budget_transactions(self, links: list[tuple[int, int]]) -> int:
+        if not links:
+            return 0
+        stmt = (
+            insert(self.budgets_transactions)
+            .prefix_with("OR IGNORE")
+            .values(
+                budget_id=bindparam("link_budget_id"),
+                transaction_id=bindparam("link_transaction_id"),
+            )
+        )
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                stmt,
+                [
+                    {"link_budget_id": budget_id, "link_transaction_id": txn_id}
+                    for budget_id, txn_id in links
+                ],
+            )
+            return result.rowcount
+
     def delete_budget_transaction(self, budget_id: int, transaction_id: int):
         with self.engine.begin() as conn:
             conn.execute(
@@ -373,30 +1455,68 @@ class Sqlite3(DataStore):
                 .where(self.budgets_transactions.c.budget_id == budget_id)
             )
 
-    def retrieve_budget_transactions(self, budget_id: int) -> list[TransactionView]:
+    def delete_budget_transactions(self, links: list[tuple[int, int]]) -> int:
+        if not links:
+            return 0
+        stmt = (
+            delete(self.budgets_transactions)
+            .where(self.budgets_transactions.c.budget_id == bindparam("link_budget_id"))
+            .where(
+                self.budgets_transactions.c.transaction_id
+                == bindparam("link_transaction_id")
+            )
+        )
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                stmt,
+                [
+                    {"link_budget_id": budget_id, "link_transaction_id": txn_id}
+                    for budget_id, txn_id in links
+                ],
+            )
+            return result.rowcount
+
+    def select_budget_transaction_links(
+        self, transaction_ids: list[int]
+    ) -> list[tuple[int, int]]:
         """
-        Return all transactions linked to a given budget.
+        Return `(budget_id, transaction_id)` for every link of the given
+        transactions.
         """
+        if not transaction_ids:
+            return []
         with self.engine.begin() as conn:
             rows = conn.execute(
                 select(
-                    self.transactions,
-                    self.accounts.c.name.label("account_name"),
-                    self.budgets.c.name.label("budget_name"),
-                )
+                    self.budgets_transactions.c.budget_id,
+                    self.budgets_transactions.c.transaction_id,
+                ).where(self.budgets_transactions.c.transaction_id.in_(transaction_ids))
+            ).fetchall()
+            return [(row.budget_id, row.transaction_id) for row in rows]
+
+    def retrieve_budget_transactions(self, budget_id: int) -> list[TransactionView]:
+        """
+        Return all transactions linked to a given budget. The read model
+        names a transaction's first-linked budget, so the label is taken
+        from the budget being queried instead.
+        """
+        columns = [
+            column for column in self.transactions.c if column.name != "budget_name"
+        ]
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(*columns, self.budgets.c.name.label("budget_name"))
                 .join(
                     self.budgets_transactions,
                     self.transactions.c.id
                     == self.budgets_transactions.c.transaction_id,
                 )
                 .join(
-                    self.accounts, self.transactions.c.account_id == self.accounts.c.id
-                )
-                .outerjoin(
                     self.budgets,
-                    self.budgets_transactions.c.budget_id == self.budgets.c.id,
+                    self.budgets.c.id == self.budgets_transactions.c.budget_id,
                 )
                 .where(self.budgets_transactions.c.budget_id == budget_id)
+                .where(self.transactions.c.account_name.is_not(None))
                 .order_by(self.transactions.c.occurred_at.desc())
             ).fetchall()
 
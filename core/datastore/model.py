@@ -19,6 +19,14 @@ class TransactionSource(StrEnum):
     APPLE = "APPLE"
 
 
+class IngestStatus(StrEnum):
+    RECEIVING = "RECEIVING"
+    QUEUED = "QUEUED"
+    PROCESSING = "PROCESSING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
 class TransactionType(StrEnum):
     CREDIT = "CREDIT"
     DEPOSITORY = "DEPOSITORY"
@@ -26,6 +34,22 @@ class TransactionType(StrEnum):
     INVESTMENT = "INVESTMENT"
 
 
+# Small-integer codes the enum columns are stored as. They are persisted,
+# so a code is never reused or changed; new members take the next one.
+# 0 and 1 take no space at all in a SQLite record.
+STORAGE_CODES: dict[type[StrEnum], dict[StrEnum, int]] = {
+    BudgetLevel: {BudgetLevel.LOW: 0, BudgetLevel.MED: 1, BudgetLevel.HIGH: 2},
+    TransactionDirection: {TransactionDirection.IN: 0, TransactionDirection.OUT: 1},
+    TransactionSource: {TransactionSource.PLAID: 0, TransactionSource.APPLE: 1},
+    TransactionType: {
+        TransactionType.CREDIT: 0,
+        TransactionType.DEPOSITORY: 1,
+        TransactionType.LOAN: 2,
+        TransactionType.INVESTMENT: 3,
+    },
+}
+
+
 @dataclass(frozen=True)
 class Transaction:
     id: int
@@ -57,10 +81,13 @@ class PartialTransaction:
     amount: float
     direction: TransactionDirection
     account_id: int
-    fingerprint: str
+    fingerprint: bytes
     note: str | None = None
     external_id: str | None = None
     occurred_at: datetime | None = None
+    # Exact amount when the source parsed it to cents already; takes
+    # precedence over `amount`
+    amount_cents: int | None = None
 
 
 @dataclass(frozen=True)
@@ -69,7 +96,7 @@ class Budget:
     name: str
     amount_allocated: float
     amount_spent: float
-    amount_saved: float
+    amount_saved: float  # generated by SQLite: allocated - spent
     created_at: datetime
     level: BudgetLevel | None = None
 
@@ -93,6 +120,7 @@ class Tag:
 class PlaidAccount:
     id: int
     token: str
+    item_id: str | None = None
 
 
 @dataclass(frozen=True)
@@ -113,5 +141,32 @@ class PartialAccount:
     account_type: str
     name: str
     balance: int
-    fingerprint: str
+    fingerprint: bytes
     plaid_id: int | None = None
+
+
+@dataclass(frozen=True)
+class AppleIngestJob:
+    idempotency_key: str
+    status: IngestStatus
+    chunks: int
+    finished_chunks: int
+    received: int
+    inserted: int
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class ImportJob:
+    id: int
+    filename: str
+    path: str
+    status: IngestStatus
+    checkpoint: int
+    rows_parsed: int
+    rows_inserted: int
+    rows_deduplicated: int
+    rows_linked: int
+    error: str | None
+    created_at: str
+    finished_at: str | None
@@ -0,0 +1,159 @@
+import codecs
+import html
+import re
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+from core.utils import parse_cents
+
+OFX_SUFFIXES = (".ofx", ".qfx")
+
+# Aggregates that carry the statement's own account; BANKACCTTO inside a
+# transfer names the other side and is ignored
+ACCOUNT_AGGREGATES = {"BANKACCTFROM", "CCACCTFROM"}
+
+_OFX_DATE = re.compile(r"(\d{8})")
+
+
+def _decode(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Decode an OFX byte stream incrementally. OFX 1.x declares its charset
+    in the plain-text header (`CHARSET:1252` is common); anything else is
+    read as UTF-8.
+    """
+    decoder = None
+    header = b""
+    for chunk in chunks:
+        if decoder is None:
+            # The header ends where the markup starts
+            header += chunk
+            if b"<" not in header:
+                continue
+            encoding = (
+                "cp1252" if re.search(rb"CHARSET:\s*1252", header) else "utf-8-sig"
+            )
+            decoder = codecs.getincrementaldecoder(encoding)()
+            chunk, header = header, b""
+        yield decoder.decode(chunk)
+    if decoder is not None:
+        yield decoder.decode(b"", final=True)
+
+
+def _iter_tags(chunks: Iterable[bytes]) -> Iterator[tuple[str, bool, str]]:
+    """
+    Yield `(tag, closing, text)` for every element tag as the bytes arrive,
+    where `text` is the character data up to the next tag. Works for SGML
+    OFX 1.x, whose leaf elements are never closed, as well as XML OFX 2.x.
+    Only the unfinished tail of the stream is buffered.
+    """
+    pending = ""
+    for text in _decode(chunks):
+        pending += text
+        start = pending.find("<")
+        while start != -1:
+            end = pending.find(">", start)
+            following = pending.find("<", end + 1) if end != -1 else -1
+            if following == -1:
+                break  # the tag or its text is not complete yet
+            tag = pending[start + 1 : end].strip()
+            if tag and tag[0] not in "?!":  # XML declaration, OFX PI, comments
+                closing = tag.startswith("/")
+                yield tag.lstrip("/").upper(), closing, pending[end + 1 : following]
+            start = following
+        pending = pending[start:] if start != -1 else ""
+
+    end = pending.find(">")
+    if pending.startswith("<") and end != -1:
+        tag = pending[1:end].strip()
+        if tag and tag[0] not in "?!":
+            yield tag.lstrip("/").upper(), tag.startswith("/"), pending[end + 1 :]
+
+
+def _parse_date(raw: str) -> datetime:
+    # YYYYMMDD[HHMMSS[.XXX]][[offset:TZ]]; only the day is kept, as with CSV
+    match = _OFX_DATE.match(raw)
+    try:
+        return datetime.strptime(match.group(1), "%Y%m%d")
+    except (AttributeError, ValueError) as exc:
+        raise ValueError(f"Invalid OFX date: {raw}") from exc
+
+
+def _parse_amount(raw: str) -> int:
+    # OFX has no thousands separator; a comma is the decimal point
+    try:
+        return parse_cents(raw.replace(",", "."))
+    except ValueError as exc:
+        raise ValueError(f"Invalid OFX amount: {raw}") from exc
+
+
+def parse_ofx_transactions(chunks: Iterable[bytes]) -> Iterator[dict[str, object]]:
+    """
+    Stream the transactions out of an OFX/QFX statement download.
+
+    Yields the same row dicts as `parse_csv_transactions`, plus an
+    `external_id` built from the account and FITID so re-downloads dedupe
+    exactly. `csv_index` is the transaction's position in the file, so
+    import job checkpoints work as they do for CSV. Transactions missing a
+    FITID, date or amount are skipped; a malformed date or amount raises
+    ValueError.
+    """
+    stack: list[str] = []
+    org = ""
+    account_id = ""
+    txn: dict[str, str] | None = None
+    index = 0
+    seen_ofx = False
+
+    for tag, closing, text in _iter_tags(chunks):
+        value = html.unescape(text.strip())
+        if closing:
+            if tag in stack:  # leaf end tags (OFX 2.x) are not on the stack
+                while stack.pop() != tag:
+                    pass
+            if tag == "STMTTRN" and txn is not None:
+                index += 1
+                row = _build_row(txn, org, account_id, index)
+                if row is not None:
+                    yield row
+                txn = None
+            continue
+
+        seen_ofx = seen_ofx or tag == "OFX"
+        if not value:  # aggregate
+            stack.append(tag)
+            if tag == "STMTTRN":
+                txn = {}
+            continue
+
+        parent = stack[-1] if stack else ""
+        if txn is not None:
+            txn[f"{parent}.{tag}" if parent == "PAYEE" else tag] = value
+        elif tag == "ORG" and parent == "FI":
+            org = value
+        elif tag == "ACCTID" and parent in ACCOUNT_AGGREGATES:
+            account_id = value
+
+    if not seen_ofx:
+        raise ValueError("Not an OFX document.")
+
+
+def _build_row(
+    txn: dict[str, str], org: str, account_id: str, index: int
+) -> dict[str, object] | None:
+    fitid = txn.get("FITID")
+    if not fitid or not txn.get("DTPOSTED") or not txn.get("TRNAMT"):
+        return None
+
+    description = txn.get("NAME") or txn.get("PAYEE.NAME") or txn.get("MEMO")
+    last4 = account_id[-4:] or "0000"
+    amount_cents = _parse_amount(txn["TRNAMT"])
+    return {
+        "occurred_at": _parse_date(txn["DTPOSTED"]),
+        "description": description or txn.get("TRNTYPE", "Transaction"),
+        "amount": amount_cents / 100,
+        "amount_cents": amount_cents,
+        "account_name": f"{org} {last4}" if org else f"Account {last4}",
+        "budget_name": "",
+        "csv_index": index,
+        "external_id": f"ofx:{account_id}:{fitid}",
+    }
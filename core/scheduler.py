@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import random
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from core.service import Service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ItemSyncStatus:
+    pending: bool = False
+    running: bool = False
+    last_started_at: datetime | None = None
+    last_finished_at: datetime | None = None
+    last_error: str | None = None
+
+
+class SyncScheduler:
+    """
+    Periodically syncs every Plaid item off the request path.
+
+    - One worker task per item, each sleeping `interval` + random jitter
+      so items do not all hit Plaid at the same moment
+    - `enqueue` wakes a worker early and is safe to call from the
+      threadpool that runs sync route handlers
+    - A debounced enqueue holds the run for a short window so a burst of
+      requests for the same item (e.g. webhooks) collapses into one sync
+    - Plaid calls run in a worker thread so the event loop stays free
+    - `refresh_balances` pulls account balances in the background, one
+      run at a time, so a slow or failing Plaid never holds up a page
+    """
+
+    def __init__(
+        self,
+        service: Service,
+        interval: float,
+        jitter: float = 0.0,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.service = service
+        self.interval = interval
+        self.jitter = jitter
+        self.rng = rng
+        self.items: dict[int, ItemSyncStatus] = {}
+        self._wakeups: dict[int, asyncio.Event] = {}
+        self._debounce: dict[int, float] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self._balances: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        for item_id in await asyncio.to_thread(self.service.get_plaid_item_ids):
+            self.__ensure_worker(item_id)
+
+    async def stop(self):
+        workers = list(self._workers.values())
+        if self._balances is not None:
+            workers.append(self._balances)
+            self._balances = None
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._wakeups.clear()
+        self._debounce.clear()
+
+    def enqueue(self, item_id: int | None = None, debounce: float = 0.0):
+        """
+        Request a sync of one item, or every item when `item_id` is None.
+        Returns immediately; the run happens on the scheduler's loop after
+        `debounce` seconds.
+        """
+        item_ids = (
+            [item_id] if item_id is not None else self.service.get_plaid_item_ids()
+        )
+        for id in item_ids:
+            # Mark pending right away so a status poll issued straight
+            # after enqueue never reports idle before the run starts
+            self.items.setdefault(id, ItemSyncStatus()).pending = True
+            self._loop.call_soon_threadsafe(self.__wake, id, debounce)
+
+    def refresh_balances(self):
+        """
+        Start a background balance refresh unless one is already running.
+        Returns immediately and is safe to call from the threadpool; the
+        service's TTL cache keeps repeated calls from reaching Plaid.
+        """
+        self._loop.call_soon_threadsafe(self.__start_balance_refresh)
+
+    def status(self) -> dict:
+        return {
+            "running": any(s.pending or s.running for s in self.items.values()),
+            "items": dict(self.items),
+        }
+
+    def __next_delay(self) -> float:
+        return self.interval + self.jitter * self.rng()
+
+    def __ensure_worker(self, item_id: int):
+        if item_id in self._workers:
+            return
+        self.items.setdefault(item_id, ItemSyncStatus())
+        self._wakeups[item_id] = asyncio.Event()
+        self._workers[item_id] = asyncio.create_task(self.__run_item(item_id))
+
+    def __wake(self, item_id: int, debounce: float):
+        self.__ensure_worker(item_id)
+        if debounce:
+            self._debounce[item_id] = max(self._debounce.get(item_id, 0), debounce)
+        self._wakeups[item_id].set()
+
+    def __start_balance_refresh(self):
+        if self._balances is None or self._balances.done():
+            self._balances = asyncio.create_task(self.__refresh_balances())
+
+    async def __refresh_balances(self):
+        try:
+            await asyncio.to_thread(self.service.refresh_account_balances)
+        except Exception:  # Pages keep showing the stored balances
+            logger.exception("Plaid balance refresh failed")
+
+    async def __run_item(self, item_id: int):
+        wakeup = self._wakeups[item_id]
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.__next_delay())
+            except TimeoutError:
+                pass
+            delay = self._debounce.pop(item_id, 0)
+            if delay:
+                # Wakes that land during the window fold into this run
+                await asyncio.sleep(delay)
+                self._debounce.pop(item_id, None)
+            wakeup.clear()
+            await self.__sync(item_id)
+
+    async def __sync(self, item_id: int):
+        status = self.items[item_id]
+        status.pending = False
+        status.running = True
+        status.last_started_at = datetime.now()
+        try:
+            await asyncio.to_thread(self.service.sync_plaid_item, item_id)
+            status.last_error = None
+        except Exception as exc:  # Keep the worker alive for the next run
+            logger.exception("Plaid sync failed for item %s", item_id)
+            status.last_error = str(exc)
+        finally:
+            status.running = False
+            status.last_finished_at = datetime.now()
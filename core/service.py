@@ -1,31 +1,83 @@
 # MARK: Imports
-from datetime import datetime
-
+import hashlib
+import hmac
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime
+from functools import partial
+from pathlib import Path
+
+import jwt
+
+from core.bloom import BloomFilter
+from core.cache import TTLCache
+from core.csv_import import ImportSession, parse_import_file
 from core.datasource.plaid_source import Plaid
 from core.datastore.base import DataStore
 from core.datastore.model import (
+    AppleIngestJob,
+    ImportJob,
     PartialAccount,
     PartialBudget,
     PartialTransaction,
+    PlaidAccount,
     TransactionDirection,
     TransactionSource,
     TransactionType,
     TransactionView,
 )
 from core.model import AppleTransaction
+from core.singleflight import SingleFlight
+from core.streams import chunked
 from core.utils import (
+    FINGERPRINT_VERSION,
+    LEGACY_FINGERPRINT_VERSION,
     build_fingerprint,
     cents_to_dollars,
-    derive_direction,
+    dollars_to_cents,
     normalize,
 )
 
 
 # MARK: Service Layer
 class Service:
+    # (webhook_type, webhook_code) pairs that mean new data for an item
+    PLAID_SYNC_WEBHOOKS = {
+        ("TRANSACTIONS", "SYNC_UPDATES_AVAILABLE"),
+        ("TRANSACTIONS", "INITIAL_UPDATE"),
+        ("TRANSACTIONS", "HISTORICAL_UPDATE"),
+        ("TRANSACTIONS", "DEFAULT_UPDATE"),
+        ("TRANSACTIONS", "TRANSACTIONS_REMOVED"),
+        ("ITEM", "LOGIN_REPAIRED"),
+    }
+    # Plaid webhooks signed longer ago than this many seconds are rejected
+    PLAID_WEBHOOK_MAX_AGE = 5 * 60
+    # Apple uploads are queued and bulk inserted in chunks of this size
+    APPLE_INGEST_CHUNK_SIZE = 1000
+    # CSV imports are written in batches of this many rows
+    CSV_IMPORT_CHUNK_SIZE = 500
+    # Target false-positive rate of the per-month duplicate pre-check
+    CSV_DEDUPE_ERROR_RATE = 0.01
+    CSV_READ_SIZE = 64 * 1024
+    # Rows upgraded per transaction by `migrate_fingerprints`
+    FINGERPRINT_MIGRATION_BATCH = 1000
+
     def __init__(self, store: DataStore):
         self.store = store
-        self.plaid_client = Plaid()
+        self._plaid_client: Plaid | None = None
+        # Plaid `accounts_get` responses keyed by plaid item id
+        self.balance_cache = TTLCache(float(os.getenv("BUTTY_BALANCE_TTL", "900")))
+        # Plaid webhook verification keys (JWKs) keyed by their `kid`
+        self.webhook_key_cache = TTLCache(
+            float(os.getenv("BUTTY_WEBHOOK_KEY_TTL", "86400"))
+        )
+        # Concurrent syncs of the same item join the run already in flight
+        self.item_sync_flight = SingleFlight()
+        # Imports check rows against a per-month duplicate filter; without
+        # it every row pays for a lookup, which is kept to time the filter
+        self.dedupe_prefilter = True
 
         self.summary_card = {
             "status": "On Track",
@@ -33,6 +85,13 @@ class Service:
             "meta": "Spending 68% of allocation",
         }
 
+    @property
+    def plaid_client(self) -> Plaid:
+        # Built on first use so offline work (e.g. replay) needs no Plaid config
+        if self._plaid_client is None:
+            self._plaid_client = Plaid()
+        return self._plaid_client
+
     @staticmethod
     def __create_start_end_range(month: int, year: int, latest: bool = False):
         start = datetime(
@@ -52,6 +111,7 @@ class Service:
         direction: TransactionDirection,
         date: datetime,
         csv_index: int | None = None,
+        version: int = FINGERPRINT_VERSION,
     ):
         return build_fingerprint(
             name,
@@ -59,11 +119,35 @@ class Service:
             direction,
             date.isoformat(),
             str(csv_index) if csv_index is not None else None,
+            version=version,
         )
 
     @staticmethod
-    def __build_account_fingerprint(inst_id: str, name: str, subtype: float, mask: str):
-        return build_fingerprint(inst_id, name, subtype, mask)
+    def __build_account_fingerprint(
+        inst_id: str,
+        name: str,
+        subtype: float,
+        mask: str,
+        version: int = FINGERPRINT_VERSION,
+    ):
+        return build_fingerprint(inst_id, name, subtype, mask, version=version)
+
+    @staticmethod
+    def __build_import_fingerprint(
+        row: dict[str, object], version: int = FINGERPRINT_VERSION
+    ) -> bytes:
+        # Rows with a bank-issued id (OFX FITID) are identified by it alone,
+        # so fingerprint dedupe matches the external_id exactly
+        if row.get("external_id"):
+            return build_fingerprint(row["external_id"], version=version)
+        return Service.__build_transaction_fingerprint(
+            row["description"],
+            row["amount"],
+            row["direction"],
+            row["occurred_at"],
+            row.get("csv_index"),
+            version=version,
+        )
 
     # MARK: - Budget Management
 
@@ -73,25 +157,48 @@ class Service:
     def create_budget_from_copy(
         self, pre_month: int, pre_year: int, month: int, year: int
     ):
-        past_budgets = self.get_all_budgets(pre_month, pre_year)
-        current_budgets = self.get_all_budgets(month, year)
-        existing_names = {b.name for b in current_budgets}
-
-        for budget in past_budgets:
-            if budget.name not in existing_names:
-                self.store.insert_budget(
-                    budget.name,
-                    cents_to_dollars(budget.amount_allocated),
-                    datetime(year=year, month=month, day=1),
-                )
+        """
+        Budgets recur from the month they are created in, so last month's
+        are already this month's once it is viewed; there is nothing left
+        to copy beyond making sure the month is materialized. Past months
+        are never filled in.
+        """
+        self.get_all_budgets(month, year)
+
+    def project_budgets(
+        self, month: int, year: int, through_month: int, through_year: int
+    ) -> int:
+        """
+        Copy a month's budgets into every month after it, up to and
+        including `through_month`/`through_year`, with one set-based
+        insert. Names a target month already has are skipped. Returns how
+        many budgets were created.
+        """
+        first = year * 12 + month
+        last = through_year * 12 + through_month
+        if last <= first:
+            raise ValueError("Projection must end after the source month.")
+        source = Service.__create_start_end_range(month, year)
+        self.store.materialize_budgets(**source)
+        months = [
+            datetime(year=index // 12, month=index % 12 + 1, day=1)
+            for index in range(first, last)
+        ]
+        return self.store.project_budgets(**source, months=months)
 
     def delete_budget(self, id: int):
         self.store.delete_budget(id)
 
     def get_all_budgets(self, month: int, year: int):
-        return self.store.filter_budgets(
-            **Service.__create_start_end_range(month, year)
+        month_range = Service.__create_start_end_range(month, year)
+        # The first view of the current or a future month creates its
+        # recurring budgets; past months are shown as they were stored
+        this_month = datetime.now().replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
         )
+        if month_range["start"] >= this_month:
+            self.store.materialize_budgets(**month_range)
+        return self.store.filter_budgets(**month_range)
 
     def get_budget(self, id: int):
         budget = self.store.select_budget(id)
@@ -100,29 +207,12 @@ class Service:
     def get_transaction(self, id: int):
         return self.store.select_transaction(id)
 
+    # Edits carry forward to the following months; earlier ones keep theirs
     def edit_budget_name(self, id: int, name: str):
-        budget = self.store.select_budget(id)
-        self.store.update_budget(
-            PartialBudget(
-                id=budget.id,
-                name=name,
-                amount_allocated=cents_to_dollars(budget.amount_allocated),
-                amount_spent=budget.amount_spent,
-                level=budget.level,
-            )
-        )
+        self.store.update_budget_definition(id, name=name)
 
     def edit_budget_allocated(self, id: int, allocated: float):
-        budget = self.store.select_budget(id)
-        self.store.update_budget(
-            PartialBudget(
-                id=budget.id,
-                name=budget.name,
-                amount_allocated=allocated,
-                amount_spent=budget.amount_spent,
-                level=budget.level,
-            )
-        )
+        self.store.update_budget_definition(id, amount_allocated=allocated)
 
     def get_all_budget_transactions(self, budget_id: int) -> list[TransactionView]:
         return self.store.retrieve_budget_transactions(budget_id)
@@ -157,12 +247,29 @@ class Service:
         )
         return spent
 
+    def recompute_budgets_spent(
+        self, month: int | None = None, year: int | None = None
+    ) -> int:
+        """
+        Repair drifted `amount_spent` totals for every budget, or only a
+        month's, in one statement. Returns how many budgets changed.
+        """
+        if month is None or year is None:
+            return self.store.recompute_budgets_spent()
+        return self.store.recompute_budgets_spent(
+            **Service.__create_start_end_range(month, year)
+        )
+
     def _ensure_import_account(self, account_name: str) -> int:
         external_id = f"csv:{normalize(account_name)}"
-        fingerprint = Service.__build_account_fingerprint(
-            "CSV", account_name, TransactionType.DEPOSITORY, "0000"
+        identity = ("CSV", account_name, TransactionType.DEPOSITORY, "0000")
+        fingerprint = Service.__build_account_fingerprint(*identity)
+        account_id = self.__find_account(
+            fingerprint,
+            Service.__build_account_fingerprint(
+                *identity, version=LEGACY_FINGERPRINT_VERSION
+            ),
         )
-        account_id = self.store.account_exists_by_fingerprint(fingerprint)
         if account_id:
             return account_id
 
@@ -177,69 +284,263 @@ class Service:
             )
         )
 
-    def import_transactions_from_csv(self, rows: list[dict[str, object]]) -> int:
-        imported = 0
-        budgets_by_month: dict[tuple[int, int], dict[str, int]] = {}
-
-        for row in rows:
-            occurred_at = row["occurred_at"]
-            amount = row["amount"]
-            account_name = row["account_name"]
-            budget_name = row.get("budget_name", "")
-
-            account_id = self._ensure_import_account(account_name)
-            direction = (
+    @staticmethod
+    def prepare_import_row(row: dict[str, object]) -> dict[str, object]:
+        """
+        Add the direction, unsigned amount and fingerprint to a parsed
+        import row. Needs no store access, so bulk imports run it in worker
+        processes.
+        """
+        amount = row["amount"]
+        amount_cents = row.get("amount_cents")
+        prepared = {
+            **row,
+            "amount": abs(amount),
+            "amount_cents": abs(amount_cents) if amount_cents is not None else None,
+            "direction": (
                 TransactionDirection.OUT if amount < 0 else TransactionDirection.IN
-            )
-            normalized_amount = abs(amount)
-            fingerprint = Service.__build_transaction_fingerprint(
+            ),
+        }
+        prepared["fingerprint"] = Service.__build_import_fingerprint(prepared)
+        return prepared
+
+    def import_transactions_from_csv(self, rows: Iterable[dict[str, object]]) -> int:
+        """
+        Import parsed CSV rows, which may be a lazy stream.
+        Rows are written CSV_IMPORT_CHUNK_SIZE at a time so memory stays
+        bounded by one chunk regardless of the size of the export.
+        """
+        return self.import_prepared_rows(map(Service.prepare_import_row, rows))["rows"]
+
+    def import_prepared_rows(
+        self,
+        rows: Iterable[dict[str, object]],
+        chunk_size: int | None = None,
+    ) -> dict[str, int]:
+        """
+        Write rows that already went through `prepare_import_row`,
+        `chunk_size` (default CSV_IMPORT_CHUNK_SIZE) per insert batch.
+        """
+        result = {"rows": 0, "inserted": 0, "linked": 0}
+        session = ImportSession()
+
+        for chunk in chunked(rows, chunk_size or Service.CSV_IMPORT_CHUNK_SIZE):
+            result["rows"] += len(chunk)
+            result["inserted"] += self.__import_csv_chunk(chunk, session)
+
+        self.__finish_import_session(session)
+        result["linked"] = session.linked
+        result["probable_duplicates"] = session.probable_duplicates
+        result["false_positives"] = session.false_positives
+        return result
+
+    def create_import_job(self, filename: str, path: str) -> int:
+        return self.store.insert_import_job(filename, path)
+
+    def get_import_job(self, job_id: int) -> ImportJob | None:
+        return self.store.select_import_job(job_id)
+
+    def run_import_job(self, job_id: int) -> ImportJob | None:
+        """
+        Import a spooled CSV upload, checkpointing after every committed
+        chunk. A failed or interrupted job picks up after its checkpoint
+        when run again; a job that is already running or done is left
+        alone.
+        """
+        if not self.store.claim_import_job(job_id):
+            return self.store.select_import_job(job_id)
+
+        job = self.store.select_import_job(job_id)
+        session = ImportSession()
+        try:
+            with open(job.path, "rb") as file:
+                blocks = iter(partial(file.read, Service.CSV_READ_SIZE), b"")
+                rows = parse_import_file(job.filename, blocks)
+                pending = (
+                    Service.prepare_import_row(row)
+                    for row in rows
+                    if row["csv_index"] > job.checkpoint
+                )
+                for chunk in chunked(pending, Service.CSV_IMPORT_CHUNK_SIZE):
+                    inserted = self.__import_csv_chunk(chunk, session)
+                    # Links must land before the checkpoint moves past
+                    # their rows, or a resumed job would never write them
+                    linked = self.__apply_import_links(session)
+                    self.store.checkpoint_import_job(
+                        job_id,
+                        chunk[-1]["csv_index"],
+                        parsed=len(chunk),
+                        inserted=inserted,
+                        deduplicated=len(chunk) - inserted,
+                        linked=linked,
+                    )
+        except Exception as exc:  # Kept on the job for the status poll
+            self.store.finish_import_job(job_id, str(exc))
+            return self.store.select_import_job(job_id)
+        finally:
+            self.__finish_import_session(session)
+
+        if not self.store.select_import_job(job_id).rows_parsed:
+            self.store.finish_import_job(job_id, "No valid rows to import.")
+        else:
+            self.store.finish_import_job(job_id)
+            Path(job.path).unlink(missing_ok=True)
+        return self.store.select_import_job(job_id)
+
+    def resume_import_jobs(self) -> int:
+        job_ids = self.store.requeue_import_jobs()
+        for job_id in job_ids:
+            self.run_import_job(job_id)
+        return len(job_ids)
+
+    def __import_csv_chunk(
+        self, rows: list[dict[str, object]], session: ImportSession
+    ) -> int:
+        """
+        Write one chunk of prepared rows and queue their budget links on
+        the session. Returns how many rows were new.
+        """
+        for name in {row["account_name"] for row in rows}:
+            if name not in session.account_ids:
+                session.account_ids[name] = self._ensure_import_account(name)
+
+        partials = [
+            PartialTransaction(
                 row["description"],
-                normalized_amount,
-                direction,
-                occurred_at,
-                row.get("csv_index"),
+                row["amount"],
+                row["direction"],
+                session.account_ids[row["account_name"]],
+                row["fingerprint"],
+                external_id=row.get("external_id"),
+                occurred_at=row["occurred_at"],
+                amount_cents=row.get("amount_cents"),
             )
-            transaction_id = self.store.insert_transaction(
-                PartialTransaction(
-                    row["description"],
-                    normalized_amount,
-                    direction,
-                    account_id,
-                    fingerprint,
-                    occurred_at=occurred_at,
+            for row in rows
+        ]
+        # Only rows the month filter has (probably) seen pay for a lookup;
+        # the rest are known new and go straight to the insert. In months
+        # that still hold version 1 fingerprints a row may only match by
+        # its legacy fingerprint, which is checked against the same filter.
+        probable, fresh = [], []
+        legacy: dict[bytes, PartialTransaction] = {}
+        for row, txn in zip(rows, partials, strict=True):
+            seen = self.__import_month_filter(session, txn.occurred_at)
+            if seen is None or txn.fingerprint in seen:
+                probable.append(txn)
+                continue
+            if (txn.occurred_at.month, txn.occurred_at.year) in session.legacy_months:
+                old = Service.__build_import_fingerprint(
+                    row, LEGACY_FINGERPRINT_VERSION
                 )
+                if old in seen:
+                    legacy[old] = txn
+                    continue
+            fresh.append(txn)
+
+        existing = self.store.select_transaction_ids_by_fingerprints(
+            [txn.fingerprint for txn in probable]
+        )
+        fresh += [txn for txn in probable if txn.fingerprint not in existing]
+        if legacy:
+            # Legacy matches are upgraded to their version 2 fingerprint, so
+            # the next import of the same rows takes the direct path
+            matched = self.store.select_transaction_ids_by_fingerprints(list(legacy))
+            upgrades = [
+                (txn_id, legacy[old].fingerprint) for old, txn_id in matched.items()
+            ]
+            self.store.update_transaction_fingerprints(upgrades)
+            existing.update((fingerprint, txn_id) for txn_id, fingerprint in upgrades)
+            fresh += [txn for old, txn in legacy.items() if old not in matched]
+        looked_up = len(probable) + len(legacy)
+        session.probable_duplicates += looked_up
+        session.false_positives += looked_up - len(existing)
+
+        transaction_ids = self.store.insert_transactions_returning_ids(fresh)
+        inserted = len(transaction_ids)
+        transaction_ids.update(existing)
+
+        # Rows that already existed keep their id, so new and re-imported
+        # rows are linked the same way. Filters are loaded once per month,
+        # so a row this import already wrote passes as new and is ignored
+        # by the insert; those few are looked up as a fallback.
+        budgeted = [row for row in rows if row.get("budget_name")]
+        missing = [
+            row["fingerprint"]
+            for row in budgeted
+            if row["fingerprint"] not in transaction_ids
+        ]
+        if missing:
+            transaction_ids.update(
+                self.store.select_transaction_ids_by_fingerprints(missing)
             )
-            imported += 1
-            if transaction_id is None:
-                transaction_id = (
-                    self.store.select_transaction_id_by_fingerprint_or_external_id(
-                        fingerprint, None
-                    )
-                )
 
-            if not budget_name:
-                continue
+        for row in budgeted:
+            transaction_id = transaction_ids.get(row["fingerprint"])
             if transaction_id is None:
                 continue
 
+            # The budget is picked from the row's own month, so the link
+            # always passes the month check `assign_transaction_to_budget`
+            # would do
+            occurred_at = row["occurred_at"]
             key = (occurred_at.month, occurred_at.year)
-            if key not in budgets_by_month:
-                budgets = self.get_all_budgets(occurred_at.month, occurred_at.year)
-                budgets_by_month[key] = {
+            if key not in session.budgets_by_month:
+                budgets = self.get_all_budgets(*key)
+                session.budgets_by_month[key] = {
                     budget.name.lower(): budget.id for budget in budgets
                 }
-            budget_id = budgets_by_month[key].get(budget_name.lower())
-            if not budget_id:
-                continue
-
-            try:
-                self.assign_transaction_to_budget(
-                    budget_id, transaction_id, occurred_at.month, occurred_at.year
+            budget_id = session.budgets_by_month[key].get(row["budget_name"].lower())
+            if budget_id:
+                session.links.append((budget_id, transaction_id))
+
+        return inserted
+
+    def __import_month_filter(
+        self, session: ImportSession, occurred_at: datetime
+    ) -> BloomFilter | None:
+        """
+        The month's duplicate filter, or None when the pre-check is off and
+        every row is looked up. Months that still hold version 1
+        fingerprints always get a filter, since their rows may only match
+        by the legacy fingerprint checked against it.
+        """
+        key = (occurred_at.month, occurred_at.year)
+        if key not in session.seen_by_month:
+            fingerprints = self.store.select_transaction_fingerprints(
+                **Service.__create_start_end_range(*key)
+            )
+            if any(
+                fingerprint[0] == LEGACY_FINGERPRINT_VERSION
+                for fingerprint in fingerprints
+            ):
+                session.legacy_months.add(key)
+            session.seen_by_month[key] = (
+                BloomFilter.from_keys(
+                    fingerprints, len(fingerprints), Service.CSV_DEDUPE_ERROR_RATE
                 )
-            except ValueError:
-                continue
-
-        return imported
+                if self.dedupe_prefilter or key in session.legacy_months
+                else None
+            )
+        return session.seen_by_month[key]
+
+    def __apply_import_links(self, session: ImportSession) -> int:
+        """
+        Write the queued links. Returns how many were new; links that
+        already exist are ignored by the insert and not counted.
+        """
+        if not session.links:
+            return 0
+        linked = self.store.insert_budget_transactions(session.links)
+        session.linked += linked
+        session.touched_budgets.update(budget_id for budget_id, _ in session.links)
+        session.links.clear()
+        return linked
+
+    def __finish_import_session(self, session: ImportSession):
+        self.__apply_import_links(session)
+        for budget_id in sorted(session.touched_budgets):
+            self.refresh_budget_spent(budget_id)
+        session.touched_budgets.clear()
 
     # MARK: - Transactions
 
@@ -273,6 +574,16 @@ class Service:
     def get_all_transactions(self):
         return self.store.retrieve_transactions()
 
+    def get_unassigned_transactions(self, month: int, year: int):
+        return self.store.filter_unassigned_transactions(
+            **Service.__create_start_end_range(month, year)
+        )
+
+    def count_unassigned_transactions(self, month: int, year: int) -> int:
+        return self.store.count_unassigned_transactions(
+            **Service.__create_start_end_range(month, year)
+        )
+
     def update_transaction_note(self, id: int, note: str):
         self.store.update_transaction_note(id, note)
 
@@ -301,95 +612,454 @@ class Service:
         self.store.insert_budget_transaction(budget_id, transaction_id)
         self.refresh_budget_spent(budget_id)
 
-    def sync_all_transactions(self):
-        self.__sync_plaid_transactions()
+    def assign_transactions_to_budget(
+        self, budget_id: int, transaction_ids: list[int], month: int, year: int
+    ) -> int:
+        """
+        Link many transactions to a budget at once. Every transaction must
+        exist and fall in the given month, or nothing is linked. Returns
+        the number of new links.
+        """
+        dates = self.store.select_transaction_dates(transaction_ids)
+        missing = set(transaction_ids) - dates.keys()
+        if missing:
+            raise ValueError(f"Unknown transactions: {sorted(missing)}")
+        if any((d.month, d.year) != (month, year) for d in dates.values()):
+            raise ValueError("Transactions fall outside the selected month and year")
+
+        linked = self.store.insert_budget_transactions(
+            [(budget_id, id) for id in dates]
+        )
+        self.refresh_budget_spent(budget_id)
+        return linked
+
+    def unassign_transactions(
+        self, transaction_ids: list[int], budget_id: int | None = None
+    ) -> int:
+        """
+        Unlink many transactions from `budget_id`, or from every budget
+        when it is None. Each affected budget is recomputed once. Returns
+        the number of links removed.
+        """
+        links = self.store.select_budget_transaction_links(transaction_ids)
+        if budget_id is not None:
+            links = [link for link in links if link[0] == budget_id]
+
+        removed = self.store.delete_budget_transactions(links)
+        for affected in sorted({budget for budget, _ in links}):
+            self.refresh_budget_spent(affected)
+        return removed
+
+    def sync_all_transactions(self) -> int:
+        return self.__sync_plaid_transactions()
+
+    def sync_plaid_item(self, plaid_id: int) -> int:
+        item = self.store.select_plaid_account(plaid_id)
+        if item is None:
+            return 0
+        return self.item_sync_flight.do(
+            item.id,
+            self.__sync_plaid_item,
+            item,
+            self.__build_plaid_account_routes(),
+        )
+
+    def get_plaid_item_ids(self) -> list[int]:
+        return [item.id for item in self.store.retrieve_plaid_accounts()]
+
+    def verify_plaid_webhook(self, body: bytes, token: str | None) -> bool:
+        """
+        Check the JWT Plaid sends in the `Plaid-Verification` header of a
+        webhook: signed with ES256 by the key its `kid` names, issued at
+        most PLAID_WEBHOOK_MAX_AGE seconds ago, and carrying the SHA-256
+        of exactly `body`.
+        """
+        if not token:
+            return False
+        try:
+            header = jwt.get_unverified_header(token)
+            if header.get("alg") != "ES256" or not header.get("kid"):
+                return False
+            key = self.webhook_key_cache.get_or_load(
+                header["kid"],
+                lambda: self.plaid_client.retrieve_webhook_verification_key(
+                    header["kid"]
+                ),
+            )
+            if key is None or key.get("expired_at") is not None:
+                return False
+            claims = jwt.decode(
+                token,
+                jwt.PyJWK(key).key,
+                algorithms=["ES256"],
+                options={"require": ["iat", "request_body_sha256"]},
+            )
+        except jwt.PyJWTError:
+            return False
+
+        if time.time() - claims["iat"] > Service.PLAID_WEBHOOK_MAX_AGE:
+            return False
+        return hmac.compare_digest(
+            str(claims["request_body_sha256"]), hashlib.sha256(body).hexdigest()
+        )
+
+    def resolve_plaid_webhook(self, payload: dict) -> int | None:
+        """
+        Map a Plaid webhook to the local item that needs syncing, or None
+        when the event does not call for a sync (or the item is unknown).
+        """
+        event = (payload.get("webhook_type"), payload.get("webhook_code"))
+        if event not in Service.PLAID_SYNC_WEBHOOKS or not payload.get("item_id"):
+            return None
+
+        item_id = payload["item_id"]
+        plaid_id = self.store.select_plaid_account_id_by_item_id(item_id)
+        if plaid_id is not None:
+            return plaid_id
+
+        # Items linked before item ids were stored are resolved once
+        for item in self.store.retrieve_plaid_accounts():
+            if item.item_id is None:
+                resolved = self.plaid_client.retrieve_item_id(item.token)
+                self.store.update_plaid_account_item_id(item.id, resolved)
+                if resolved == item_id:
+                    plaid_id = item.id
+
+        return plaid_id
 
     # MARK: Transactions (Plaid Integration)
 
-    def __sync_plaid_transactions(self):
+    def __build_plaid_account_routes(self) -> dict[str, int]:
+        # Plaid account_id -> local account id
+        return {
+            account.external_id: account.id
+            for account in self.store.retrieve_accounts()
+        }
+
+    def __sync_plaid_transactions(self) -> int:
         # NOTE
         # Any APPLE CARDS will not be processed here but rather
         # elsewhere in own domain
 
-        for account in self.store.retrieve_plaid_accounts():
-            p = self.store.select_plaid_account(account.id)
-            acc = self.store.select_account_by_id(account.id)
-            account_type = acc.account_type
+        routes = self.__build_plaid_account_routes()
 
-            for transaction in self.plaid_client.retrieve_transactions(p.token):
-                # Depends on enrichment and not guranteed but ideal
-                merchant_name = transaction.merchant_name
-                name = merchant_name if merchant_name else transaction.name
+        return sum(
+            self.item_sync_flight.do(item.id, self.__sync_plaid_item, item, routes)
+            for item in self.store.retrieve_plaid_accounts()
+        )
 
-                amount = abs(transaction.amount)
-                date = transaction.date
-                direction = derive_direction(
-                    amount, account_type == TransactionType.CREDIT
-                )
-                # NOTE
-                # All transactions should be stored as cents
-                self.store.insert_transaction(
-                    PartialTransaction(
-                        name,
-                        amount,
-                        direction,
-                        account.id,
-                        Service.__build_transaction_fingerprint(
-                            name, amount, direction, date
-                        ),
-                        external_id=transaction.transaction_id,
-                        occurred_at=date,
-                    )
+    def __sync_plaid_item(self, item: PlaidAccount, routes: dict[str, int]) -> int:
+        inserted = 0
+        cursor = self.store.select_plaid_sync_cursor(item.id)
+
+        for page in self.plaid_client.retrieve_transaction_pages(item.token, cursor):
+            inserted += self.__ingest_plaid_page(page.data, routes)
+            # Staged after ingest so a crash never advances the cursor
+            # past transactions that were not written
+            self.store.insert_plaid_sync_page(
+                item.id, page.cursor, page.next_cursor, page.raw
+            )
+
+        return inserted
+
+    def __ingest_plaid_page(self, page: dict, routes: dict[str, int]) -> int:
+        return sum(
+            self.store.insert_transaction(transaction) is not None
+            for transaction in Service.__transform_plaid_page(page, routes)
+        )
+
+    @staticmethod
+    def __transform_plaid_page(
+        page: dict, routes: dict[str, int]
+    ) -> list[PartialTransaction]:
+        transactions = []
+        for transaction in page["added"]:
+            account_id = routes.get(transaction["account_id"])
+            if account_id is None:
+                # Account was skipped on link (already known by
+                # fingerprint) so there is nowhere to attribute it
+                continue
+
+            # Depends on enrichment and not guranteed but ideal
+            merchant_name = transaction.get("merchant_name")
+            name = merchant_name if merchant_name else transaction["name"]
+
+            amount = abs(transaction["amount"])
+            occurred_at = date.fromisoformat(transaction["date"])
+            # Plaid amounts are positive when money leaves the account,
+            # whatever the account type
+            direction = (
+                TransactionDirection.OUT
+                if transaction["amount"] > 0
+                else TransactionDirection.IN
+            )
+            # NOTE
+            # All transactions should be stored as cents
+            transactions.append(
+                PartialTransaction(
+                    name,
+                    amount,
+                    direction,
+                    account_id,
+                    Service.__build_transaction_fingerprint(
+                        name, amount, direction, occurred_at
+                    ),
+                    external_id=transaction["transaction_id"],
+                    occurred_at=occurred_at,
                 )
+            )
+
+        return transactions
+
+    def replay_plaid_pages(self, plaid_id: int | None = None) -> dict[str, int]:
+        """
+        Re-run the transform over staged sync pages, with no network access.
+        New rows are inserted. Rows already stored under the same Plaid
+        transaction id are rewritten with the name, amount, direction and
+        fingerprint the current transform derives, so a transform change
+        reaches history without a re-download. Budget spent totals are
+        recomputed when any row changed.
+        """
+        routes = self.__build_plaid_account_routes()
+        page_ids = self.store.retrieve_plaid_sync_page_ids(plaid_id)
+
+        inserted = updated = 0
+        for page_id in page_ids:
+            _, raw = self.store.select_plaid_sync_page(page_id)
+            stored = []
+            for transaction in Service.__transform_plaid_page(json.loads(raw), routes):
+                if self.store.insert_transaction(transaction) is None:
+                    stored.append(transaction)
+                else:
+                    inserted += 1
+            updated += self.store.update_transactions_by_external_id(stored)
+
+        if updated:
+            self.store.recompute_budgets_spent()
+        return {"pages": len(page_ids), "inserted": inserted, "updated": updated}
 
     # MARK: Transactions (Apple Card Integration)
 
-    def sync_apple_transactions(self, transactions: list[AppleTransaction]):
+    def sync_apple_transactions(self, transactions: list[AppleTransaction]) -> int:
         # NOTE
         # All Apple transactions are expected to be credit from
         # Apple Card
 
-        if transactions:
-            # Must use first trans to get account since no
-            # easy way to get accounts
+        if not transactions:
+            return 0
+
+        # Must use first trans to get account since no
+        # easy way to get accounts
+        transaction = transactions[0]
+        GENERIC_NAME = "Apple Card"
+        identity = (GENERIC_NAME, GENERIC_NAME, TransactionType.CREDIT, 0)
+        fingerprint = Service.__build_account_fingerprint(*identity)
+        account_id = self.__find_account(
+            fingerprint,
+            Service.__build_account_fingerprint(
+                *identity, version=LEGACY_FINGERPRINT_VERSION
+            ),
+        )
 
-            transaction = transactions[0]
-            GENERIC_NAME = "Apple Card"
-            fingerprint = Service.__build_account_fingerprint(
-                GENERIC_NAME, GENERIC_NAME, TransactionType.CREDIT, 0
-            )
-            account_id = self.store.account_exists_by_fingerprint(fingerprint)
-
-            if not account_id:
-                account_id = self.store.insert_account(
-                    PartialAccount(
-                        transaction.account_id,
-                        TransactionSource.APPLE,
-                        TransactionType.CREDIT,
-                        GENERIC_NAME,
-                        0,  # TODO add the correct balance
-                        fingerprint,
-                    )
+        if not account_id:
+            account_id = self.store.insert_account(
+                PartialAccount(
+                    transaction.account_id,
+                    TransactionSource.APPLE,
+                    TransactionType.CREDIT,
+                    GENERIC_NAME,
+                    0,  # TODO add the correct balance
+                    fingerprint,
                 )
-            for transaction in transactions:
-                # NOTE
-                # All transactions should be stored as cents
-                self.store.insert_transaction(
-                    PartialTransaction(
+            )
+
+        # NOTE
+        # All transactions should be stored as cents
+        return self.store.insert_transactions(
+            [
+                PartialTransaction(
+                    transaction.name,
+                    abs(transaction.amount),
+                    transaction.direction,
+                    account_id,
+                    Service.__build_transaction_fingerprint(
                         transaction.name,
                         abs(transaction.amount),
                         transaction.direction,
-                        account_id,
-                        Service.__build_transaction_fingerprint(
-                            transaction.name,
-                            abs(transaction.amount),
-                            transaction.direction,
-                            transaction.date,
-                        ),
-                        external_id=transaction.id,
-                        occurred_at=transaction.date,
-                    )
+                        transaction.date,
+                    ),
+                    external_id=transaction.id,
+                    occurred_at=transaction.date,
+                )
+                for transaction in transactions
+            ]
+        )
+
+    def enqueue_apple_transactions(
+        self,
+        transactions: Iterable[AppleTransaction],
+        idempotency_key: str | None = None,
+    ) -> tuple[str, bool]:
+        """
+        Persist an Apple upload to the ingestion queue in fixed-size chunks.
+
+        `transactions` may be a lazy stream; each chunk is stored as soon
+        as it fills, and the upload only becomes visible to the processor
+        once it has fully arrived. Returns the idempotency key (derived
+        from the payload when the client sent none) and whether anything
+        was newly queued; re-sending a known upload queues nothing.
+        """
+        chunks = Service.__serialize_apple_chunks(transactions)
+        if idempotency_key is None:
+            # The key is derived from the payload, so it must be seen whole
+            chunks = list(chunks)
+            digest = hashlib.sha256()
+            for _, payload in chunks:
+                digest.update(payload)
+            idempotency_key = digest.hexdigest()
+
+        try:
+            for seq, (received, payload) in enumerate(chunks):
+                self.store.insert_apple_ingest_chunk(
+                    idempotency_key, seq, received, payload
                 )
+        except Exception:
+            # Invalid or interrupted stream: drop what was staged for it
+            self.store.discard_apple_ingest_chunks(idempotency_key)
+            raise
+
+        created = self.store.release_apple_ingest_chunks(idempotency_key) > 0
+        return idempotency_key, created
+
+    @staticmethod
+    def __serialize_apple_chunks(
+        transactions: Iterable[AppleTransaction],
+    ) -> Iterator[tuple[int, bytes]]:
+        empty = True
+        for chunk in chunked(transactions, Service.APPLE_INGEST_CHUNK_SIZE):
+            empty = False
+            payload = json.dumps([t.model_dump(mode="json") for t in chunk])
+            yield len(chunk), payload.encode()
+        if empty:
+            yield 0, b"[]"
+
+    def process_apple_ingest_queue(self) -> int:
+        """
+        Drain queued Apple chunks, one bulk insert per chunk.
+        Chunks are claimed atomically so concurrent drains never overlap;
+        a chunk that fails is marked FAILED with its error and skipped.
+        """
+        inserted = 0
+        while True:
+            claimed = self.store.claim_apple_ingest_chunk()
+            if claimed is None:
+                return inserted
+
+            chunk_id, payload = claimed
+            try:
+                transactions = [
+                    AppleTransaction.model_validate(item)
+                    for item in json.loads(payload)
+                ]
+                count = self.sync_apple_transactions(transactions)
+            except Exception as exc:  # Recorded for the client's status poll
+                self.store.finish_apple_ingest_chunk(chunk_id, 0, str(exc))
+                continue
+
+            self.store.finish_apple_ingest_chunk(chunk_id, count)
+            inserted += count
+
+    def resume_apple_ingest_queue(self) -> int:
+        self.store.requeue_apple_ingest_chunks()
+        return self.process_apple_ingest_queue()
+
+    def get_apple_ingest_job(self, idempotency_key: str) -> AppleIngestJob | None:
+        return self.store.select_apple_ingest_job(idempotency_key)
+
+    # MARK: - Fingerprints
+
+    def migrate_fingerprints(self, batch_size: int | None = None) -> dict[str, int]:
+        """
+        Upgrade version 1 fingerprints to version 2, `batch_size` rows
+        (default FINGERPRINT_MIGRATION_BATCH) per write so the app keeps
+        serving while it runs. Safe to rerun.
+
+        A fingerprint is only rewritten when its inputs can be rebuilt from
+        the stored row and hash to the stored digest. CSV rows (whose
+        fingerprint includes their position in the file) and Plaid accounts
+        cannot be rebuilt; they stay legacy until an import or relink
+        matches them, which upgrades them then.
+        """
+        batch_size = batch_size or Service.FINGERPRINT_MIGRATION_BATCH
+        transactions, legacy_transactions = self.__migrate_fingerprint_batches(
+            self.store.select_legacy_fingerprint_transactions,
+            Service.__upgrade_transaction_fingerprint,
+            self.store.update_transaction_fingerprints,
+            batch_size,
+        )
+        accounts, legacy_accounts = self.__migrate_fingerprint_batches(
+            self.store.select_legacy_fingerprint_accounts,
+            Service.__upgrade_account_fingerprint,
+            self.store.update_account_fingerprints,
+            batch_size,
+        )
+        return {
+            "transactions": transactions,
+            "accounts": accounts,
+            "legacy": legacy_transactions + legacy_accounts,
+        }
+
+    @staticmethod
+    def __migrate_fingerprint_batches(
+        select_batch, upgrade, write, batch_size: int
+    ) -> tuple[int, int]:
+        upgraded = kept = 0
+        after_id = 0
+        while rows := select_batch(after_id, batch_size):
+            updates = []
+            for row in rows:
+                fingerprint = upgrade(row)
+                if fingerprint is not None:
+                    updates.append((row.id, fingerprint))
+            write(updates)
+            upgraded += len(updates)
+            kept += len(rows) - len(updates)
+            after_id = rows[-1].id
+        return upgraded, kept
+
+    @staticmethod
+    def __upgrade_transaction_fingerprint(row) -> bytes | None:
+        # The stored columns are what the fingerprint was built from, except
+        # the amount (a float, so "12.0" or "12" for whole dollars) and the
+        # CSV row index, which is not stored
+        candidates = [(row.external_id,)] if row.external_id else []
+        amounts = [str(row.amount / 100)]
+        if row.amount % 100 == 0:
+            amounts.append(str(row.amount // 100))
+        candidates += [
+            (row.name, amount, row.direction, row.occurred_at, None)
+            for amount in amounts
+        ]
+        return Service.__upgrade_fingerprint(row.fingerprint, candidates)
+
+    @staticmethod
+    def __upgrade_account_fingerprint(row) -> bytes | None:
+        if row.source == TransactionSource.APPLE:
+            identity = ("Apple Card", "Apple Card", TransactionType.CREDIT, 0)
+        elif row.external_id.startswith("csv:"):
+            identity = ("CSV", row.name, TransactionType.DEPOSITORY, "0000")
+        else:
+            return None
+        return Service.__upgrade_fingerprint(row.fingerprint, [identity])
+
+    @staticmethod
+    def __upgrade_fingerprint(
+        legacy: bytes, candidates: list[tuple[object, ...]]
+    ) -> bytes | None:
+        for values in candidates:
+            if build_fingerprint(*values, version=LEGACY_FINGERPRINT_VERSION) == legacy:
+                return build_fingerprint(*values)
+        return None
 
     # MARK: - Tags
 
@@ -423,13 +1093,55 @@ class Service:
     def get_plaid_token(self):
         return self.plaid_client.create_link()
 
+    def refresh_account_balances(self) -> int:
+        """
+        Pull balances for every Plaid item, at most once per TTL per item,
+        and persist the ones that changed in a single batched update.
+        """
+        current = {
+            account.external_id: (account.id, account.balance)
+            for account in self.store.retrieve_accounts()
+        }
+
+        changed: dict[int, int] = {}
+        for item in self.store.retrieve_plaid_accounts():
+            accounts = self.balance_cache.get_or_load(
+                item.id, partial(self.plaid_client.retrieve_accounts, item.token)
+            )
+            for account in accounts:
+                local = current.get(account.account_id)
+                if local is None or account.balance is None:
+                    continue
+                account_id, balance = local
+                fresh = dollars_to_cents(account.balance)
+                if fresh != balance:
+                    changed[account_id] = fresh
+
+        if changed:
+            self.store.update_account_balances(changed)
+        return len(changed)
+
+    def __find_account(self, fingerprint: bytes, legacy: bytes | None) -> int | None:
+        """
+        Look an account up by fingerprint, falling back to its version 1
+        fingerprint. A legacy match is upgraded in place, so it is only
+        taken once per account.
+        """
+        account_id = self.store.account_exists_by_fingerprint(fingerprint)
+        if account_id or legacy is None:
+            return account_id
+        account_id = self.store.account_exists_by_fingerprint(legacy)
+        if account_id:
+            self.store.update_account_fingerprints([(account_id, fingerprint)])
+        return account_id
+
     # MARK: - Accounts (Plaid Integration)
 
     def create_accounts_by_plaid(
         self,
         public_token: str,
     ):
-        access_token = self.plaid_client.add_financial_item(public_token)
+        access_token, item_id = self.plaid_client.add_financial_item(public_token)
         accounts = self.plaid_client.retrieve_accounts(access_token)
 
         PLAID_ACCOUNT_TYPE_MAP = {
@@ -445,7 +1157,7 @@ class Service:
             fingerprint = account.fingerprint
 
             # Skip accounts that already exist (stable identity)
-            if self.store.account_exists_by_fingerprint(fingerprint):
+            if self.__find_account(fingerprint, account.legacy_fingerprint):
                 continue
 
             new_accounts_data.append(
@@ -464,7 +1176,8 @@ class Service:
             return
 
         # ✅ At least one new account → now persist access token
-        plaid_id = self.store.insert_plaid_account(access_token)
+        plaid_id = self.store.insert_plaid_account(access_token, item_id)
+        self.balance_cache.put(plaid_id, accounts)
 
         for data in new_accounts_data:
             data["plaid_id"] = plaid_id
@@ -0,0 +1,87 @@
+import codecs
+import zlib
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import Any
+
+from pydantic import BaseModel
+
+# Upper bound on bytes inflated from a single input chunk so a small,
+# highly compressed upload cannot expand into one huge buffer
+MAX_INFLATE = 1 << 20
+
+
+def gunzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Incrementally inflate a gzip stream delivered in arbitrary chunks.
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = chunk
+        while data:
+            try:
+                out = decompressor.decompress(data, MAX_INFLATE)
+            except zlib.error as exc:
+                raise ValueError(f"Invalid gzip stream: {exc}") from exc
+            if out:
+                yield out
+            data = decompressor.unconsumed_tail
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+    if not decompressor.eof:
+        raise ValueError("Truncated gzip stream.")
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Re-split a byte stream on newlines, holding back only the partial
+    last line of each chunk.
+    """
+    pending = b""
+    for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+def parse_ndjson(
+    chunks: Iterable[bytes], model: type[BaseModel]
+) -> Iterator[BaseModel]:
+    """
+    Validate one `model` per non-blank NDJSON line as the bytes arrive.
+    Errors name the offending line so the client can fix its upload.
+    """
+    for number, line in enumerate(iter_lines(chunks), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield model.model_validate_json(line)
+        except ValueError as exc:
+            raise ValueError(f"Line {number}: {exc}") from exc
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_text_lines(
+    chunks: Iterable[bytes], encoding: str = "utf-8-sig"
+) -> Iterator[str]:
+    """
+    Decode a byte stream incrementally and yield newline-terminated lines,
+    ready for `csv.reader`. Multi-byte characters and a BOM split across
+    chunks are handled by the incremental decoder.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
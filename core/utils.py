@@ -1,5 +1,5 @@
 import hashlib
-import re
+import math
 from calendar import month_name
 from datetime import datetime
 from decimal import ROUND_HALF_UP, Decimal
@@ -7,10 +7,58 @@ from decimal import ROUND_HALF_UP, Decimal
 from core.datastore.model import TransactionDirection
 
 
+def _to_cents(number: float, text: str) -> int:
+    # Well inside float precision `number * 100` is only off by a rounding
+    # error, so unless it sits next to a half cent it rounds to the same
+    # cent as the exact decimal; near a half cent the text decides
+    scaled = number * 100
+    if -1e11 < scaled < 1e11 and abs(abs(scaled) % 1 - 0.5) > 1e-4:
+        return round(scaled)
+    return int((Decimal(text) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def parse_cents(text: str) -> int:
+    """
+    Parse a textual money amount straight to integer cents.
+
+    - Ignores `$` and thousands commas, takes a leading sign, the
+      trailing one some bank exports use (`12.34-`), and accounting
+      parentheses for negatives: `(1,234.56)`
+    - Rounds half up (away from zero) past two decimals, exactly as
+      quantizing the Decimal would; a Decimal is only built for the rare
+      amount that lands on a half cent
+    """
+    value = text.strip()
+    negative = value.startswith("(") and value.endswith(")")
+    if negative:
+        value = value[1:-1].strip()
+    value = value.replace("$", "").replace(",", "")
+    trailing = value[-1:] if value[-1:] in ("-", "+") else ""
+    if trailing:
+        value = value[:-1].rstrip()
+    try:
+        # One sign at most: parentheses, a leading sign or a trailing one
+        signed = negative or trailing
+        if signed and (value[:1] in ("-", "+") or negative and trailing):
+            raise ValueError
+        if "_" in value:
+            raise ValueError
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Invalid amount: {text}") from None
+
+    cents = _to_cents(number, value)
+    return -cents if negative or trailing == "-" else cents
+
+
 def dollars_to_cents(amount: float | str) -> int:
-    return int(
-        (Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
-    )
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, str):
+        return parse_cents(amount)
+    return _to_cents(amount, str(amount))
 
 
 def cents_to_dollars(amount_cents: int) -> float:
@@ -52,16 +100,37 @@ def derive_month_context(month: int | None = None, year: int | None = None):
 def normalize(value: str | None) -> str:
     if not value:
         return ""
-    return re.sub(r"\s+", " ", value.strip().lower())
+    # Same result as collapsing `\s+` runs with a regex: str.split() splits
+    # on exactly the characters `\s` matches, at a fraction of the cost
+    return " ".join(value.lower().split())
+
 
+# Fingerprints are a version byte followed by a 16-byte digest, stored as a
+# BLOB. Version 1 is the original SHA-256 scheme, kept (truncated to the
+# same size) so rows fingerprinted before version 2 can still be matched
+LEGACY_FINGERPRINT_VERSION = 1
+FINGERPRINT_VERSION = 2
 
-def build_fingerprint(*values: str | None) -> str:
+
+def build_fingerprint(*values: str | None, version: int = FINGERPRINT_VERSION) -> bytes:
     """
     Deterministic fingerprint builder.
 
     - Accepts any number of values
     - Order matters (caller-controlled)
     - Values are normalized before hashing
+    - `version` selects the scheme; only matching legacy rows needs 1
+    """
+    canonical = "|".join(normalize(v) for v in values).encode("utf-8")
+    if version == LEGACY_FINGERPRINT_VERSION:
+        digest = hashlib.sha256(canonical).digest()[:16]
+    else:
+        digest = hashlib.blake2b(canonical, digest_size=16).digest()
+    return bytes((version,)) + digest
+
+
+def legacy_fingerprint_from_hex(value: str) -> bytes:
+    """
+    Convert a stored version 1 hex fingerprint to its BLOB form.
     """
-    canonical = "|".join(normalize(v) for v in values)
-    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return bytes((LEGACY_FINGERPRINT_VERSION,)) + bytes.fromhex(value)[:16]
@@ -0,0 +1,19 @@
+CREATE TABLE
+    IF NOT EXISTS apple_ingest_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL,
+        seq INTEGER NOT NULL, -- chunk position within the upload
+        payload BLOB NOT NULL, -- zlib-compressed JSON array of Apple transactions
+        received INTEGER NOT NULL, -- transactions in this chunk
+        inserted INTEGER NOT NULL DEFAULT 0,
+        -- RECEIVING until the whole upload has arrived, then QUEUED
+        status TEXT NOT NULL DEFAULT 'RECEIVING' CHECK (
+            status IN ('RECEIVING', 'QUEUED', 'PROCESSING', 'DONE', 'FAILED')
+        ),
+        error TEXT,
+        queued_at TEXT NOT NULL DEFAULT (datetime ('now')),
+        finished_at TEXT,
+        UNIQUE (idempotency_key, seq) ON CONFLICT IGNORE
+    );
+
+CREATE INDEX IF NOT EXISTS idx_apple_ingest_queue_status ON apple_ingest_queue (status, id);
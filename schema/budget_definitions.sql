@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS
+    budget_definitions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        amount_allocated INTEGER NOT NULL DEFAULT 0, -- stored in cents; copied into each month's budget
+        starts_on TEXT NOT NULL, -- first month the budget recurs in ('YYYY-MM')
+        ends_on TEXT -- first month it no longer recurs in ('YYYY-MM'); NULL while it still recurs
+    );
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS
+    budget_definitions_tags (
+        tag_id INTEGER NOT NULL,
+        definition_id INTEGER NOT NULL,
+        PRIMARY KEY (tag_id, definition_id),
+        FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE,
+        FOREIGN KEY (definition_id) REFERENCES budget_definitions(id) ON DELETE CASCADE
+    ) WITHOUT ROWID;
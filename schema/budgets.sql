@@ -4,17 +4,11 @@ CREATE TABLE IF NOT EXISTS
         name TEXT NOT NULL,
         amount_allocated INTEGER NOT NULL DEFAULT 0, -- stored in cents (e.g. $12.34 = 1234)
         amount_spent INTEGER NOT NULL DEFAULT 0, -- stored in cents (e.g. $12.34 = 1234)
-        amount_saved INTEGER NOT NULL DEFAULT 0, -- stored in cents (e.g. $12.34 = 1234)
+        amount_saved INTEGER NOT NULL GENERATED ALWAYS AS (amount_allocated - amount_spent) VIRTUAL, -- in cents, computed on read
         created_at TEXT NOT NULL DEFAULT (datetime ('now')),
-        level TEXT CHECK (level IN ('LOW', 'MED', 'HIGH'))
+        level INTEGER CHECK (level IN (0, 1, 2)), -- STORAGE_CODES: LOW, MED, HIGH
+        definition_id INTEGER -- the recurring budget_definitions row this is one month of
     );
 
-CREATE TRIGGER IF NOT EXISTS budgets_amount_saved
-UPDATE ON budgets BEGIN
-UPDATE budgets
-SET
-    amount_saved = NEW.amount_allocated - NEW.amount_spent
-WHERE
-    id = NEW.id;
-
-END;
\ No newline at end of file
+-- One lookup per definition when a month is materialized
+CREATE INDEX IF NOT EXISTS idx_budgets_definition_id ON budgets (definition_id, created_at);
@@ -5,4 +5,6 @@ CREATE TABLE
         PRIMARY KEY (transaction_id, budget_id),
         FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE,
         FOREIGN KEY (budget_id) REFERENCES budgets (id) ON DELETE CASCADE
-    );
\ No newline at end of file
+    ) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_budgets_transactions_budget_id ON budgets_transactions (budget_id);
@@ -0,0 +1,17 @@
+CREATE TABLE
+    IF NOT EXISTS import_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        filename TEXT NOT NULL,
+        path TEXT NOT NULL, -- spooled upload, removed once the import is done
+        status TEXT NOT NULL DEFAULT 'QUEUED' CHECK (
+            status IN ('QUEUED', 'PROCESSING', 'DONE', 'FAILED')
+        ),
+        checkpoint INTEGER NOT NULL DEFAULT 0, -- csv_index of the last committed row
+        rows_parsed INTEGER NOT NULL DEFAULT 0,
+        rows_inserted INTEGER NOT NULL DEFAULT 0,
+        rows_deduplicated INTEGER NOT NULL DEFAULT 0,
+        rows_linked INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime ('now')),
+        finished_at TEXT
+    );
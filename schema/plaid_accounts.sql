@@ -1,5 +1,8 @@
 CREATE TABLE 
     IF NOT EXISTS plaid_accounts (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        token TEXT NOT NULL
-    );
\ No newline at end of file
+        token TEXT NOT NULL,
+        item_id TEXT -- Plaid item_id, used to route webhooks
+    );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_plaid_accounts_item_id ON plaid_accounts (item_id);
\ No newline at end of file
@@ -0,0 +1,11 @@
+CREATE TABLE
+    IF NOT EXISTS plaid_sync_pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        plaid_id INTEGER NOT NULL,
+        cursor TEXT NOT NULL, -- cursor sent to /transactions/sync ('' = start of history)
+        next_cursor TEXT NOT NULL,
+        payload BLOB NOT NULL, -- zlib-compressed raw response body
+        fetched_at TEXT NOT NULL DEFAULT (datetime ('now')),
+        UNIQUE (plaid_id, cursor) ON CONFLICT REPLACE,
+        FOREIGN KEY (plaid_id) REFERENCES plaid_accounts (id) ON DELETE CASCADE
+    );
@@ -3,11 +3,25 @@ CREATE TABLE IF NOT EXISTS
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL,
         amount INTEGER NOT NULL, -- stored in cents (e.g. $12.34 = 1234)
-        direction TEXT NOT NULL CHECK (direction IN ('IN', 'OUT')),
+        direction INTEGER NOT NULL CHECK (direction IN (0, 1)), -- STORAGE_CODES: IN, OUT
         occurred_at TEXT NOT NULL DEFAULT (datetime ('now')),
         external_id TEXT UNIQUE ON CONFLICT IGNORE,
         account_id INTEGER NOT NULL,
         note TEXT NOT NULL DEFAULT '',
-        fingerprint TEXT NOT NULL UNIQUE,
+        fingerprint BLOB NOT NULL UNIQUE, -- version byte + 16-byte digest
+        -- Explorer read model, kept current by transactions_read_model.sql
+        account_name TEXT, -- NULL once the account is gone
+        budget_id INTEGER, -- first linked budget, NULL when unassigned
+        budget_name TEXT,
         FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
-    );
\ No newline at end of file
+    );
+
+CREATE INDEX IF NOT EXISTS idx_transactions_occurred_at ON transactions (occurred_at);
+
+-- Partial so unassigned lookups (budget_id IS NULL) never pick it
+CREATE INDEX IF NOT EXISTS idx_transactions_budget_id ON transactions (budget_id)
+WHERE budget_id IS NOT NULL;
+
+-- Unassigned inbox: holds only rows still waiting for a budget
+CREATE INDEX IF NOT EXISTS idx_transactions_unassigned ON transactions (occurred_at)
+WHERE budget_id IS NULL AND account_name IS NOT NULL;
@@ -0,0 +1,62 @@
+-- Keeps the explorer columns on `transactions` (account_name, budget_id,
+-- budget_name) in step with renames and budget links, so transaction lists
+-- read one table. Inserts set account_name themselves.
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_account_renamed
+AFTER UPDATE OF name ON accounts
+WHEN NEW.name IS NOT OLD.name
+BEGIN
+    UPDATE transactions SET account_name = NEW.name WHERE account_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_account_deleted
+AFTER DELETE ON accounts
+BEGIN
+    UPDATE transactions SET account_name = NULL WHERE account_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_budget_renamed
+AFTER UPDATE OF name ON budgets
+WHEN NEW.name IS NOT OLD.name
+BEGIN
+    UPDATE transactions SET budget_name = NEW.name WHERE budget_id = NEW.id;
+END;
+
+-- Both fall back to another remaining link, if any
+CREATE TRIGGER IF NOT EXISTS trg_transactions_budget_deleted
+AFTER DELETE ON budgets
+BEGIN
+    UPDATE transactions
+    SET (budget_id, budget_name) = (
+        SELECT bt.budget_id, b.name
+        FROM budgets_transactions bt
+        JOIN budgets b ON b.id = bt.budget_id
+        WHERE bt.transaction_id = transactions.id
+        LIMIT 1
+    )
+    WHERE budget_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_budget_linked
+AFTER INSERT ON budgets_transactions
+BEGIN
+    UPDATE transactions
+    SET
+        budget_id = NEW.budget_id,
+        budget_name = (SELECT name FROM budgets WHERE id = NEW.budget_id)
+    WHERE id = NEW.transaction_id AND budget_id IS NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transactions_budget_unlinked
+AFTER DELETE ON budgets_transactions
+BEGIN
+    UPDATE transactions
+    SET (budget_id, budget_name) = (
+        SELECT bt.budget_id, b.name
+        FROM budgets_transactions bt
+        JOIN budgets b ON b.id = bt.budget_id
+        WHERE bt.transaction_id = OLD.transaction_id
+        LIMIT 1
+    )
+    WHERE id = OLD.transaction_id AND budget_id = OLD.budget_id;
+END;
@@ -0,0 +1,294 @@
+"""
+Database size and lookup time, TEXT enum layout against the compact one.
+
+Run from the project root:
+
+    python scripts/bench_compact_schema.py --rows 1000000
+
+Builds the same `--rows` transactions, each linked to a budget, once per
+layout. Every layout uses one schema revision: the accounts, transactions,
+budgets and link tables, without the read-model columns and indexes that
+came later. Each step turns on one more compact change:
+
+- fingerprints as version byte + 16-byte digest BLOBs, not 64-char hex TEXT
+- enum columns as STORAGE_CODES integers, not TEXT
+- `budgets_transactions` as a WITHOUT ROWID table
+- the `budget_id` index on the link table
+
+Every file is vacuumed and compared: bytes per table and index (from
+dbstat), total file size, and the time taken by the lookups the app runs
+most: a budget's transactions, a month's spending, and the budget a
+transaction belongs to. The last column is the full compact layout minus
+the TEXT one. The startup migration is also timed, on a copy of the
+layout it converts (BLOB fingerprints, TEXT enums, rowid link tables).
+"""
+
+import argparse
+import hashlib
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.datastore.db import Sqlite3  # noqa: E402
+from core.datastore.model import (  # noqa: E402
+    STORAGE_CODES,
+    BudgetLevel,
+    TransactionDirection,
+    TransactionSource,
+    TransactionType,
+)
+
+SCHEMA = """
+CREATE TABLE accounts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    external_id TEXT UNIQUE NOT NULL ON CONFLICT IGNORE,
+    plaid_id INTEGER,
+    source {source},
+    account_type {account_type},
+    balance INTEGER NOT NULL,
+    last_updated_at TEXT NOT NULL DEFAULT (datetime ('now')),
+    fingerprint {fingerprint} NOT NULL UNIQUE
+);
+CREATE TABLE transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    direction {direction},
+    occurred_at TEXT NOT NULL DEFAULT (datetime ('now')),
+    external_id TEXT UNIQUE ON CONFLICT IGNORE,
+    account_id INTEGER NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    fingerprint {fingerprint} NOT NULL UNIQUE,
+    FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+);
+CREATE TABLE budgets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    amount_allocated INTEGER NOT NULL DEFAULT 0,
+    amount_spent INTEGER NOT NULL DEFAULT 0,
+    amount_saved INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (datetime ('now')),
+    level {level}
+);
+CREATE TABLE budgets_transactions (
+    transaction_id INTEGER NOT NULL,
+    budget_id INTEGER NOT NULL,
+    PRIMARY KEY (transaction_id, budget_id),
+    FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE,
+    FOREIGN KEY (budget_id) REFERENCES budgets (id) ON DELETE CASCADE
+){link_options};
+"""
+
+BUDGET_INDEX = (
+    "CREATE INDEX idx_budgets_transactions_budget_id "
+    "ON budgets_transactions (budget_id);"
+)
+
+# Each layout adds one change to the one before it
+LAYOUTS = {
+    "text": {},
+    "+blob fp": {"blob": True},
+    "+codes": {"blob": True, "codes": True},
+    "+no rowid": {"blob": True, "codes": True, "without_rowid": True},
+    "+index": {
+        "blob": True,
+        "codes": True,
+        "without_rowid": True,
+        "budget_index": True,
+    },
+}
+# The layout the startup migration converts from
+PRE_COMPACT = "+blob fp"
+
+BUDGETS = 240  # 20 budgets a month over the generated dates
+
+LOOKUPS = {
+    "budget transactions": (
+        "SELECT t.id, t.amount, t.direction FROM transactions t "
+        "JOIN budgets_transactions bt ON bt.transaction_id = t.id "
+        "WHERE bt.budget_id = ?"
+    ),
+    "month spending": (
+        "SELECT SUM(amount) FROM transactions "
+        "WHERE direction = ? AND occurred_at >= ? AND occurred_at < ?"
+    ),
+    "transaction budget": (
+        "SELECT budget_id FROM budgets_transactions WHERE transaction_id = ?"
+    ),
+}
+
+
+def _enum(column: str, enum: type, codes: bool, required: bool = True) -> str:
+    if codes:
+        kind = "INTEGER"
+        values = ", ".join(str(code) for code in STORAGE_CODES[enum].values())
+    else:
+        kind = "TEXT"
+        values = ", ".join(f"'{member}'" for member in STORAGE_CODES[enum])
+    not_null = " NOT NULL" if required else ""
+    return f"{kind}{not_null} CHECK ({column} IN ({values}))"
+
+
+def _schema(
+    blob: bool = False,
+    codes: bool = False,
+    without_rowid: bool = False,
+    budget_index: bool = False,
+) -> str:
+    schema = SCHEMA.format(
+        source=_enum("source", TransactionSource, codes),
+        account_type=_enum("account_type", TransactionType, codes),
+        direction=_enum("direction", TransactionDirection, codes),
+        level=_enum("level", BudgetLevel, codes, required=False),
+        fingerprint="BLOB" if blob else "TEXT",
+        link_options=" WITHOUT ROWID" if without_rowid else "",
+    )
+    return schema + (BUDGET_INDEX if budget_index else "")
+
+
+def _value(member, codes: bool):
+    return STORAGE_CODES[type(member)][member] if codes else str(member)
+
+
+def _fingerprint(key: bytes, blob: bool):
+    if blob:
+        return b"\x02" + hashlib.blake2b(key, digest_size=16).digest()
+    return hashlib.sha256(key).hexdigest()
+
+
+def _build(db_path: Path, rows: int, blob=False, codes=False, **schema):
+    rng = random.Random(0)
+    first_day = date(2020, 1, 1)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_schema(blob, codes, **schema))
+    with conn:
+        conn.executemany(
+            "INSERT INTO accounts (name, external_id, source, account_type, "
+            "balance, fingerprint) VALUES (?, ?, ?, ?, 0, ?)",
+            [
+                (
+                    "Checking",
+                    "a1",
+                    _value(TransactionSource.PLAID, codes),
+                    _value(TransactionType.DEPOSITORY, codes),
+                    _fingerprint(b"a1", blob),
+                ),
+                (
+                    "Card",
+                    "a2",
+                    _value(TransactionSource.APPLE, codes),
+                    _value(TransactionType.CREDIT, codes),
+                    _fingerprint(b"a2", blob),
+                ),
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO budgets (name, level) VALUES (?, ?)",
+            [
+                (f"Budget {n}", _value(rng.choice(list(BudgetLevel)), codes))
+                for n in range(BUDGETS)
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO transactions (name, amount, direction, occurred_at, "
+            "account_id, fingerprint) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    f"MERCHANT #{n % 5000}",
+                    rng.randint(100, 50000),
+                    _value(
+                        TransactionDirection.IN
+                        if n % 10 == 0
+                        else TransactionDirection.OUT,
+                        codes,
+                    ),
+                    (first_day + timedelta(days=n * 365 // rows)).isoformat(),
+                    1 + n % 2,
+                    _fingerprint(n.to_bytes(8), blob),
+                )
+                for n in range(rows)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO budgets_transactions VALUES (?, ?)",
+            ((n, 1 + n % BUDGETS) for n in range(1, rows + 1)),
+        )
+    conn.close()
+
+
+def _measure(db_path: Path, rows: int, codes=False, **_) -> dict[str, float]:
+    conn = sqlite3.connect(db_path)
+    conn.execute("VACUUM")
+    result = {
+        name: size / 1e6
+        for name, size in conn.execute(
+            "SELECT s.name, SUM(s.pgsize) FROM dbstat s "
+            "JOIN sqlite_master m ON m.name = s.name "
+            "WHERE m.tbl_name IN ('transactions', 'budgets_transactions') "
+            "GROUP BY s.name"
+        )
+    }
+    result["file"] = db_path.stat().st_size / 1e6
+
+    rng = random.Random(1)
+    out = _value(TransactionDirection.OUT, codes)
+    months = [(out, f"2020-{m:02}-01", f"2020-{m + 1:02}-01") for m in range(1, 12)]
+    probes = {
+        "budget transactions": [(rng.randint(1, BUDGETS),) for _ in range(50)],
+        "month spending": months,
+        "transaction budget": [(rng.randint(1, rows),) for _ in range(20000)],
+    }
+    for label, sql in LOOKUPS.items():
+        started = time.perf_counter()
+        for params in probes[label]:
+            conn.execute(sql, params).fetchall()
+        result[label] = (time.perf_counter() - started) / len(probes[label]) * 1e3
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout, options in LAYOUTS.items():
+            db_path = Path(tmp) / f"layout{len(results)}.sqlite"
+            _build(db_path, args.rows, **options)
+            if layout == PRE_COMPACT:
+                migrated = Path(tmp) / "migrated.sqlite"
+                shutil.copy(db_path, migrated)
+                started = time.perf_counter()
+                Sqlite3(migrated).engine.dispose()
+                migrate_elapsed = time.perf_counter() - started
+            results[layout] = _measure(db_path, args.rows, **options)
+
+    first, last = results["text"], results[list(LAYOUTS)[-1]]
+    keys = sorted(
+        set().union(*results.values()), key=lambda k: (k in LOOKUPS, k == "file", k)
+    )
+    print(f"rows={args.rows} migration {migrate_elapsed:.1f}s")
+    print(f"{'':46}" + "".join(f"{name:>11}" for name in LAYOUTS) + f"{'delta':>11}")
+    for key in keys:
+        unit = "ms" if key in LOOKUPS else "MB"
+        values = [result.get(key, 0.0) for result in results.values()]
+        delta = last.get(key, 0.0) - first.get(key, 0.0)
+        print(
+            f"{key + ' (' + unit + ')':46}"
+            + "".join(f"{value:11.3f}" for value in values)
+            + f"{delta:+11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
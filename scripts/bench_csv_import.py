@@ -0,0 +1,109 @@
+"""
+CSV import throughput for fresh and overlapping exports.
+
+Run from the project root:
+
+    python scripts/bench_csv_import.py --rows 60000 --overlap 0.66
+
+Imports `--rows` synthetic rows into a fresh SQLite database, then
+re-imports an export of the same size that repeats the last `--overlap`
+share of them, the way consecutive bank exports do. The re-import runs
+twice on copies of the same database: once with the duplicate pre-check
+and once looking up every row. Reports rows/sec, both re-import timings,
+the time the pre-check saves, the lookups it skipped and its false
+positives.
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.datastore.db import Sqlite3  # noqa: E402
+from core.service import Service  # noqa: E402
+
+
+def _rows(start: int, count: int, rng: random.Random) -> list[dict[str, object]]:
+    first_day = datetime(2020, 1, 1)
+    return [
+        Service.prepare_import_row(
+            {
+                "occurred_at": first_day + timedelta(days=n // 40),
+                "description": f"MERCHANT #{n}",
+                "amount": -rng.randint(100, 50000) / 100,
+                "account_name": "Checking",
+                "budget_name": "",
+                "csv_index": n,
+            }
+        )
+        for n in range(start, start + count)
+    ]
+
+
+def _timed_import(service: Service, rows: list[dict[str, object]], batch: int):
+    started = time.perf_counter()
+    result = service.import_prepared_rows(rows, batch)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=60000)
+    parser.add_argument("--overlap", type=float, default=0.66)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    first = _rows(0, args.rows, rng)
+    repeated = int(args.rows * args.overlap)
+    second = first[args.rows - repeated :] + _rows(args.rows, args.rows - repeated, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filtered_path = Path(tmp) / "filtered.sqlite"
+        unfiltered_path = Path(tmp) / "unfiltered.sqlite"
+        service = Service(Sqlite3(filtered_path))
+        fresh, fresh_elapsed = _timed_import(service, first, args.batch_size)
+        service.store.engine.dispose()
+        shutil.copyfile(filtered_path, unfiltered_path)
+
+        again, again_elapsed = _timed_import(service, second, args.batch_size)
+        service.store.engine.dispose()
+
+        unfiltered = Service(Sqlite3(unfiltered_path))
+        unfiltered.dedupe_prefilter = False
+        plain, plain_elapsed = _timed_import(unfiltered, second, args.batch_size)
+        unfiltered.store.engine.dispose()
+
+    assert again["inserted"] == plain["inserted"]
+    new_rows = again["rows"] - again["probable_duplicates"] + again["false_positives"]
+    print(f"rows={args.rows} overlap={args.overlap:.0%} batch={args.batch_size}")
+    print(
+        f"fresh import: {fresh['inserted']} rows in {fresh_elapsed:.2f}s "
+        f"({fresh['rows'] / fresh_elapsed:,.0f} rows/sec)"
+    )
+    for label, result, elapsed in [
+        ("re-import with pre-check", again, again_elapsed),
+        ("re-import without", plain, plain_elapsed),
+    ]:
+        print(
+            f"{label}: {result['inserted']} new of {result['rows']} in "
+            f"{elapsed:.2f}s ({result['rows'] / elapsed:,.0f} rows/sec)"
+        )
+    print(
+        f"pre-check saved {plain_elapsed - again_elapsed:.2f}s "
+        f"({1 - again_elapsed / plain_elapsed:.1%}): "
+        f"{again['rows'] - again['probable_duplicates']} lookups skipped, "
+        f"{again['probable_duplicates']} rows looked up, "
+        f"{again['false_positives']} false positives "
+        f"({again['false_positives'] / max(new_rows, 1):.2%} of new rows)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Fingerprint index size and insert throughput, version 1 against version 2.
+
+Run from the project root:
+
+    python scripts/bench_fingerprints.py --rows 200000
+
+Builds the same synthetic transactions into two SQLite tables shaped like
+`transactions`: one keyed by version 1 fingerprints (SHA-256 hex TEXT),
+one by version 2 (version byte + 16-byte blake2b BLOB). Reports the size of
+each UNIQUE fingerprint index, rows/sec to fingerprint and insert, and
+lookups/sec by fingerprint.
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.utils import build_fingerprint  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE transactions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    occurred_at TEXT NOT NULL,
+    fingerprint {type} NOT NULL UNIQUE
+)
+"""
+
+
+def _v1_fingerprint(*values: str | None) -> str:
+    # The scheme before version 2: regex normalize, SHA-256 hex
+    canonical = "|".join(
+        re.sub(r"\s+", " ", v.strip().lower()) if v else "" for v in values
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _rows(count: int) -> list[tuple[str, int, str, str, str]]:
+    rng = random.Random(0)
+    first_day = date(2020, 1, 1)
+    return [
+        (
+            f"MERCHANT #{n}",
+            rng.randint(100, 50000),
+            rng.choice(("IN", "OUT")),
+            (first_day + timedelta(days=n // 40)).isoformat(),
+            str(n),
+        )
+        for n in range(count)
+    ]
+
+
+def _bench(db_path: Path, column_type: str, fingerprint, rows) -> dict[str, float]:
+    conn = sqlite3.connect(db_path)
+    conn.execute(SCHEMA.format(type=column_type))
+
+    started = time.perf_counter()
+    keys = [
+        fingerprint(name, str(amount / 100), direction, occurred_at, index)
+        for name, amount, direction, occurred_at, index in rows
+    ]
+    with conn:
+        conn.executemany(
+            "INSERT INTO transactions (name, amount, direction, occurred_at, "
+            "fingerprint) VALUES (?, ?, ?, ?, ?)",
+            [(*row[:4], key) for row, key in zip(rows, keys, strict=True)],
+        )
+    insert_elapsed = time.perf_counter() - started
+
+    probes = random.Random(1).sample(keys, min(len(keys), 20000))
+    started = time.perf_counter()
+    for key in probes:
+        conn.execute(
+            "SELECT id FROM transactions WHERE fingerprint = ?", (key,)
+        ).fetchone()
+    lookup_elapsed = time.perf_counter() - started
+
+    index_bytes = conn.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'sqlite_autoindex_%'"
+    ).fetchone()[0]
+    conn.close()
+    return {
+        "index_mb": index_bytes / 1e6,
+        "inserts_per_sec": len(rows) / insert_elapsed,
+        "lookups_per_sec": len(probes) / lookup_elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        v1 = _bench(Path(tmp) / "v1.sqlite", "TEXT", _v1_fingerprint, rows)
+        v2 = _bench(Path(tmp) / "v2.sqlite", "BLOB", build_fingerprint, rows)
+
+    print(f"rows={args.rows}")
+    for label, result in (("v1 sha256 hex", v1), ("v2 blake2b blob", v2)):
+        print(
+            f"{label:16} index {result['index_mb']:6.1f} MB  "
+            f"{result['inserts_per_sec']:9,.0f} inserts/sec  "
+            f"{result['lookups_per_sec']:9,.0f} lookups/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+End-to-end Plaid sync throughput against the local stand-in.
+
+Run from the project root:
+
+    python scripts/bench_plaid_sync.py --history 5000 --page-size 500
+
+Links `--items` Plaid items through `Service.create_accounts_by_plaid`, then
+times `Service.sync_all_transactions` into a fresh SQLite database and
+reports inserted rows/sec.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from apps.plaid_standin.main import StandinConfig, create_app  # noqa: E402
+from core.datastore.db import Sqlite3  # noqa: E402
+from core.service import Service  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_standin(config: StandinConfig) -> tuple[uvicorn.Server, str]:
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(config), port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1)
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--history", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, host = _start_standin(
+        StandinConfig(
+            history=args.history,
+            accounts=args.accounts,
+            page_size=args.page_size,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+        )
+    )
+    os.environ.update(
+        {
+            "ENV": "sandbox",
+            "PLAID_HOST": host,
+            "PLAID_CLIENT": "standin",
+            "PLAID_SANDBOX_SECRET": "standin",
+        }
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = Service(Sqlite3(Path(tmp) / "bench.sqlite"))
+        for n in range(args.items):
+            service.create_accounts_by_plaid(f"public-standin-{n}")
+
+        started = time.perf_counter()
+        inserted = service.sync_all_transactions()
+        elapsed = time.perf_counter() - started
+        service.store.engine.dispose()
+
+    server.should_exit = True
+    expected = args.items * args.accounts * args.history
+    print(f"items={args.items} accounts/item={args.accounts} history={args.history}")
+    print(f"page_size={args.page_size} latency_ms={args.latency_ms}")
+    print(f"inserted {inserted}/{expected} rows in {elapsed:.2f}s")
+    print(f"throughput: {inserted / elapsed:,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import sys
 import types
 
@@ -58,6 +59,23 @@ class DummyAccountsGetRequest:
         self.access_token = access_token
 
 
+class DummyWebhookVerificationKeyGetRequest:
+    def __init__(self, key_id):
+        self.key_id = key_id
+
+
+class DummyApiException(Exception):
+    pass
+
+
+class DummyJWKPublicKey:
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def to_dict(self):
+        return self.fields
+
+
 class DummyAccount:
     def __init__(
         self,
@@ -84,14 +102,16 @@ class DummyAccount:
 
 
 class DummyPlaidApi:
-    def __init__(self, *_args, **_kwargs):
+    def __init__(self, *args, **_kwargs):
+        self.args = args
         self.link_requests = []
         self.exchange_requests = []
         self.sync_requests = []
         self.accounts_requests = []
+        self.key_requests = []
         self.transactions_responses = [
             {"added": ["t1"], "has_more": True, "next_cursor": "cursor-1"},
-            {"added": ["t2"], "has_more": False},
+            {"added": ["t2"], "has_more": False, "next_cursor": "cursor-2"},
         ]
 
     def link_token_create(self, request):
@@ -100,16 +120,23 @@ class DummyPlaidApi:
 
     def item_public_token_exchange(self, request):
         self.exchange_requests.append(request)
-        return {"access_token": "exchanged-access-token"}
+        return {"access_token": "exchanged-access-token", "item_id": "item-123"}
 
-    def transactions_sync(self, request):
+    def transactions_sync(self, request, _preload_content=True):
         self.sync_requests.append(request)
-        return self.transactions_responses.pop(0)
+        response = self.transactions_responses.pop(0)
+        return types.SimpleNamespace(data=json.dumps(response).encode())
+
+    def webhook_verification_key_get(self, request):
+        self.key_requests.append(request)
+        if request.key_id != "kid-1":
+            raise DummyApiException("INVALID_WEBHOOK_VERIFICATION_KEY_ID")
+        return {"key": DummyJWKPublicKey(kid="kid-1", alg="ES256", expired_at=None)}
 
     def accounts_get(self, request):
         self.accounts_requests.append(request)
         return {
-            "item": {"institution_id": "inst-123"},
+            "item": {"institution_id": "inst-123", "item_id": "item-123"},
             "accounts": [
                 DummyAccount("acc-1", "Check", None, "checking", "depository", 50.5),
                 DummyAccount(
@@ -132,6 +159,9 @@ plaid_api_package.plaid_api = plaid_api_module
 configuration_module = types.ModuleType("plaid.configuration")
 configuration_module.Configuration = DummyConfiguration
 
+exceptions_module = types.ModuleType("plaid.exceptions")
+exceptions_module.ApiException = DummyApiException
+
 api_client_module = types.ModuleType("plaid.api_client")
 api_client_module.ApiClient = DummyApiClient
 
@@ -147,15 +177,19 @@ link_request_module.LinkTokenCreateRequest = DummyLinkTokenCreateRequest
 products_module = types.ModuleType("plaid.model.products")
 products_module.Products = DummyProducts
 
-transaction_module = types.ModuleType("plaid.model.transaction")
-transaction_module.Transaction = str
-
 transactions_sync_module = types.ModuleType("plaid.model.transactions_sync_request")
 transactions_sync_module.TransactionsSyncRequest = DummyTransactionsSyncRequest
 
 accounts_get_module = types.ModuleType("plaid.model.accounts_get_request")
 accounts_get_module.AccountsGetRequest = DummyAccountsGetRequest
 
+webhook_key_module = types.ModuleType(
+    "plaid.model.webhook_verification_key_get_request"
+)
+webhook_key_module.WebhookVerificationKeyGetRequest = (
+    DummyWebhookVerificationKeyGetRequest
+)
+
 item_public_token_module = types.ModuleType(
     "plaid.model.item_public_token_exchange_request"
 )
@@ -169,14 +203,15 @@ sys.modules.update(
         "plaid.api": plaid_api_package,
         "plaid.api.plaid_api": plaid_api_module,
         "plaid.configuration": configuration_module,
+        "plaid.exceptions": exceptions_module,
         "plaid.api_client": api_client_module,
         "plaid.model.country_code": country_code_module,
         "plaid.model.link_token_create_request_user": link_user_module,
         "plaid.model.link_token_create_request": link_request_module,
         "plaid.model.products": products_module,
-        "plaid.model.transaction": transaction_module,
         "plaid.model.transactions_sync_request": transactions_sync_module,
         "plaid.model.accounts_get_request": accounts_get_module,
+        "plaid.model.webhook_verification_key_get_request": webhook_key_module,
         "plaid.model.item_public_token_exchange_request": item_public_token_module,
     }
 )
@@ -209,6 +244,12 @@ def patch_plaid_dependencies(monkeypatch):
         plaid_source, "TransactionsSyncRequest", DummyTransactionsSyncRequest
     )
     monkeypatch.setattr(plaid_source, "AccountsGetRequest", DummyAccountsGetRequest)
+    monkeypatch.setattr(plaid_source, "ApiException", DummyApiException)
+    monkeypatch.setattr(
+        plaid_source,
+        "WebhookVerificationKeyGetRequest",
+        DummyWebhookVerificationKeyGetRequest,
+    )
 
 
 def test_plaid_requires_sdk(monkeypatch):
@@ -218,6 +259,22 @@ def test_plaid_requires_sdk(monkeypatch):
         plaid_source.Plaid()
 
 
+def test_plaid_host_defaults_to_environment(monkeypatch):
+    monkeypatch.delenv("PLAID_HOST", raising=False)
+
+    plaid = plaid_source.Plaid()
+
+    assert plaid.client.args[0].config.host == DummyEnvironment.Sandbox
+
+
+def test_plaid_host_override(monkeypatch):
+    monkeypatch.setenv("PLAID_HOST", "http://127.0.0.1:8787")
+
+    plaid = plaid_source.Plaid()
+
+    assert plaid.client.args[0].config.host == "http://127.0.0.1:8787"
+
+
 def test_create_link_builds_link_token():
     plaid = plaid_source.Plaid()
 
@@ -228,36 +285,87 @@ def test_create_link_builds_link_token():
     assert request.kwargs["client_name"] == "Butty"
     assert isinstance(request.kwargs["user"], DummyLinkTokenCreateRequestUser)
     assert request.kwargs["products"][0].value == "transactions"
+    assert "webhook" not in request.kwargs
+
+
+def test_create_link_registers_webhook(monkeypatch):
+    monkeypatch.setenv("PLAID_WEBHOOK_URL", "https://butty.example/webhooks/plaid")
+    plaid = plaid_source.Plaid()
+
+    plaid.create_link()
+
+    request = plaid.client.link_requests[0]
+    assert request.kwargs["webhook"] == "https://butty.example/webhooks/plaid"
 
 
 def test_add_financial_item_exchanges_token():
     plaid = plaid_source.Plaid()
 
-    access_token = plaid.add_financial_item("public-token")
+    access_token, item_id = plaid.add_financial_item("public-token")
 
     assert access_token == "exchanged-access-token"
+    assert item_id == "item-123"
     exchange_request = plaid.client.exchange_requests[0]
     assert exchange_request.public_token == "public-token"
 
 
-def test_retrieve_transactions_pages_and_aggregates():
+def test_retrieve_item_id_reads_item_from_accounts():
     plaid = plaid_source.Plaid()
 
-    transactions = plaid.retrieve_transactions("access-123")
+    assert plaid.retrieve_item_id("access-456") == "item-123"
+    assert plaid.client.accounts_requests[0].access_token == "access-456"
+
+
+def test_retrieve_webhook_verification_key_returns_the_jwk():
+    plaid = plaid_source.Plaid()
+
+    key = plaid.retrieve_webhook_verification_key("kid-1")
+
+    assert key == {"kid": "kid-1", "alg": "ES256", "expired_at": None}
+    assert plaid.client.key_requests[0].key_id == "kid-1"
+
 
-    assert transactions == ["t1", "t2"]
+def test_retrieve_webhook_verification_key_unknown_kid():
+    plaid = plaid_source.Plaid()
+
+    assert plaid.retrieve_webhook_verification_key("forged") is None
+
+
+def test_retrieve_transaction_pages_yields_raw_pages():
+    plaid = plaid_source.Plaid()
+
+    pages = list(plaid.retrieve_transaction_pages("access-123"))
+
+    assert [(p.cursor, p.next_cursor) for p in pages] == [
+        ("", "cursor-1"),
+        ("cursor-1", "cursor-2"),
+    ]
+    assert json.loads(pages[0].raw) == pages[0].data
+    assert pages[1].data["added"] == ["t2"]
     first_request, second_request = plaid.client.sync_requests
-    assert first_request.access_token == "access-123"
+    assert first_request.cursor is None
     assert second_request.cursor == "cursor-1"
 
 
+def test_retrieve_transaction_pages_resumes_from_cursor():
+    plaid = plaid_source.Plaid()
+    plaid.client.transactions_responses = [
+        {"added": ["t9"], "has_more": False, "next_cursor": "cursor-9"}
+    ]
+
+    pages = list(plaid.retrieve_transaction_pages("access-123", "cursor-8"))
+
+    assert [p.cursor for p in pages] == ["cursor-8"]
+    assert plaid.client.sync_requests[0].cursor == "cursor-8"
+
+
 def test_retrieve_accounts_builds_domain_objects(monkeypatch):
     plaid = plaid_source.Plaid()
     fingerprints = []
 
-    def dummy_build_fingerprint(inst_id, name, subtype, mask):
+    def dummy_build_fingerprint(inst_id, name, subtype, mask, version):
         fingerprints.append((inst_id, name, subtype, mask))
-        return f"fp-{inst_id}-{name}-{subtype}-{mask}"
+        return f"fp{version}-{inst_id}-{name}-{subtype}-{mask}"
 
     monkeypatch.setattr(plaid_source, "build_fingerprint", dummy_build_fingerprint)
 
@@ -265,5 +373,7 @@ def test_retrieve_accounts_builds_domain_objects(monkeypatch):
 
     assert [acc.account_id for acc in accounts] == ["acc-1", "acc-2"]
     assert fingerprints[0] == ("inst-123", "Check", "checking", None)
-    assert fingerprints[1] == ("inst-123", "Savings", "savings", None)
+    assert fingerprints[2] == ("inst-123", "Savings", "savings", None)
+    assert accounts[0].fingerprint == "fp2-inst-123-Check-checking-None"
+    assert accounts[0].legacy_fingerprint == "fp1-inst-123-Check-checking-None"
     assert accounts[0].balance == 50.5
@@ -16,7 +16,7 @@ def db():
 def test_insert_account(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Discover", "12234", "APPLE", "DEPOSITORY", 0, "fp-discover-1"],
+        ["Discover", "12234", 1, 1, 0, "fp-discover-1"],
     )
 
     row = db.execute("SELECT name FROM accounts").fetchone()
@@ -27,11 +27,11 @@ def test_insert_account(db: sqlite3.Connection):
 def test_source_enum_valid(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Discover", "12234", "APPLE", "DEPOSITORY", 0, "fp-source-valid-1"],
+        ["Discover", "12234", 1, 1, 0, "fp-source-valid-1"],
     )
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Discover", "122345", "PLAID", "DEPOSITORY", 0, "fp-source-valid-2"],
+        ["Discover", "122345", 0, 1, 0, "fp-source-valid-2"],
     )
 
 
@@ -39,26 +39,26 @@ def test_source_enum_invalid(db: sqlite3.Connection):
     with pytest.raises(sqlite3.IntegrityError):
         db.execute(
             "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-            ["Discover", "12234", "EXT", "DEPOSITORY", 0, "fp-source-invalid-1"],
+            ["Discover", "12234", 9, 1, 0, "fp-source-invalid-1"],
         )
 
 
 def test_account_type_enum_valid(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Discover", "12234", "APPLE", "DEPOSITORY", 0, "fp-type-valid-1"],
+        ["Discover", "12234", 1, 1, 0, "fp-type-valid-1"],
     )
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Discover", "122345", "PLAID", "CREDIT", 0, "fp-type-valid-2"],
+        ["Discover", "122345", 0, 0, 0, "fp-type-valid-2"],
     )
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Discover", "1223456", "PLAID", "LOAN", 0, "fp-type-valid-3"],
+        ["Discover", "1223456", 0, 2, 0, "fp-type-valid-3"],
     )
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Discover", "1223457", "PLAID", "INVESTMENT", 0, "fp-type-valid-4"],
+        ["Discover", "1223457", 0, 3, 0, "fp-type-valid-4"],
     )
 
 
@@ -66,14 +66,14 @@ def test_account_type_enum_invalid(db: sqlite3.Connection):
     with pytest.raises(sqlite3.IntegrityError):
         db.execute(
             "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-            ["Discover", "12234", "EXT", "EM", 0, "fp-type-invalid-1"],
+            ["Discover", "12234", 9, 9, 0, "fp-type-invalid-1"],
         )
 
 
 def test_select_account_by_id(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Savings", "ext-1", "APPLE", "DEPOSITORY", 0, "fp-select-1"],
+        ["Savings", "ext-1", 1, 1, 0, "fp-select-1"],
     )
 
     row = db.execute("SELECT id FROM accounts").fetchone()
@@ -94,7 +94,7 @@ def test_get_all_accounts(db: sqlite3.Connection):
     for idx, name in enumerate(accounts):
         db.execute(
             "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-            [name, f"ext-{name}", "APPLE", "DEPOSITORY", 0, f"fp-getall-{idx + 1}"],
+            [name, f"ext-{name}", 1, 1, 0, f"fp-getall-{idx + 1}"],
         )
 
     rows = db.execute("SELECT name FROM accounts ORDER BY id").fetchall()
@@ -107,7 +107,7 @@ def test_get_all_accounts(db: sqlite3.Connection):
 def test_delete_account(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ["Temp Account", "ext-temp", "APPLE", "DEPOSITORY", 0, "fp-delete-1"],
+        ["Temp Account", "ext-temp", 1, 1, 0, "fp-delete-1"],
     )
 
     row = db.execute("SELECT id FROM accounts").fetchone()
@@ -125,10 +125,10 @@ def test_delete_account(db: sqlite3.Connection):
 
 def test_autoincrement_id(db: sqlite3.Connection):
     db.execute(
-        "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES ('A','ext-a','APPLE','DEPOSITORY',0,'fp-auto-1');"
+        "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES ('A','ext-a',1,1,0,'fp-auto-1');"
     )
     db.execute(
-        "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES ('B','ext-b','APPLE','DEPOSITORY',0,'fp-auto-2');"
+        "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES ('B','ext-b',1,1,0,'fp-auto-2');"
     )
 
     ids = [r[0] for r in db.execute("SELECT id FROM accounts ORDER BY id;")]
@@ -150,8 +150,8 @@ def test_account_can_reference_plaid_account(db: sqlite3.Connection):
         (
             "Main Checking",
             "ext-plaid-1",
-            "PLAID",
-            "DEPOSITORY",
+            0,
+            1,
             0,
             "fp-auto-1",
             plaid_id,
@@ -172,8 +172,8 @@ def test_account_rejects_invalid_plaid_id(db: sqlite3.Connection):
             (
                 "Invalid Account",
                 "ext-invalid",
-                "APPLE",
-                "DEPOSITORY",
+                1,
+                1,
                 "fp-auto-1",
                 0,
                 999,
@@ -191,7 +191,7 @@ def test_cascade_delete_plaid_account_removes_accounts(db: sqlite3.Connection):
 
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint, plaid_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
-        ("Savings Account", "1234", "APPLE", "DEPOSITORY", 0, "fp-auto-1", plaid_id),
+        ("Savings Account", "1234", 1, 1, 0, "fp-auto-1", plaid_id),
     )
 
     # delete plaid account
@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(open("schema/apple_ingest_queue.sql").read())
+    yield conn
+    conn.close()
+
+
+def _insert_chunk(db, key, seq, received=1):
+    return db.execute(
+        """
+        INSERT INTO apple_ingest_queue (idempotency_key, seq, payload, received)
+        VALUES (?, ?, ?, ?)
+        """,
+        (key, seq, b"[]", received),
+    )
+
+
+def test_apple_ingest_queue_defaults(db: sqlite3.Connection):
+    _insert_chunk(db, "key", 0, received=3)
+
+    row = db.execute(
+        "SELECT status, inserted, error, queued_at, finished_at FROM apple_ingest_queue"
+    ).fetchone()
+
+    assert row[0] == "RECEIVING"
+    assert row[1] == 0
+    assert row[2] is None
+    assert row[3] is not None
+    assert row[4] is None
+
+
+def test_duplicate_chunk_is_ignored(db: sqlite3.Connection):
+    _insert_chunk(db, "key", 0)
+    cur = _insert_chunk(db, "key", 0)
+    _insert_chunk(db, "key", 1)
+    _insert_chunk(db, "other", 0)
+
+    assert cur.rowcount == 0
+    count = db.execute("SELECT COUNT(*) FROM apple_ingest_queue").fetchone()[0]
+    assert count == 3
+
+
+def test_status_is_constrained(db: sqlite3.Connection):
+    _insert_chunk(db, "key", 0)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute("UPDATE apple_ingest_queue SET status = 'LOST'")
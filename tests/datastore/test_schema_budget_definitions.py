@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.executescript(open("schema/budget_definitions.sql").read())
+    conn.executescript(open("schema/budgets.sql").read())
+    yield conn
+    conn.close()
+
+
+def test_budget_definitions_columns(db: sqlite3.Connection):
+    cur = db.execute("PRAGMA table_info(budget_definitions);")
+    cols = {row[1] for row in cur.fetchall()}
+
+    assert cols == {"id", "name", "amount_allocated", "starts_on", "ends_on"}
+
+
+def test_starts_on_not_null(db: sqlite3.Connection):
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute("INSERT INTO budget_definitions (name) VALUES ('Food');")
+
+
+def test_defaults(db: sqlite3.Connection):
+    db.execute(
+        "INSERT INTO budget_definitions (name, starts_on) VALUES ('Food', '2024-01');"
+    )
+
+    row = db.execute(
+        "SELECT amount_allocated, ends_on FROM budget_definitions;"
+    ).fetchone()
+
+    assert row == (0, None)
+
+
+def test_materialize_lookup_uses_definition_index(db: sqlite3.Connection):
+    plan = db.execute(
+        """
+        EXPLAIN QUERY PLAN
+        SELECT id FROM budgets
+        WHERE definition_id = 1 AND created_at >= '2024-03-01'
+            AND created_at < '2024-04-01'
+        """
+    ).fetchall()
+
+    assert "idx_budgets_definition_id" in plan[0][3]
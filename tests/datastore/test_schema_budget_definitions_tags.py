@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.executescript(open("schema/budget_definitions.sql").read())
+    conn.executescript(open("schema/tags.sql").read())
+    conn.executescript(open("schema/budget_definitions_tags.sql").read())
+    yield conn
+    conn.close()
+
+
+def test_budget_definitions_tags_table_exists(db: sqlite3.Connection):
+    cur = db.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type='table' AND name='budget_definitions_tags';
+    """)
+    assert cur.fetchone() is not None
+
+
+def test_budget_definitions_tags_composite_primary_key(db: sqlite3.Connection):
+    # insert prerequisite rows
+    db.execute(
+        "INSERT INTO budget_definitions (name, starts_on) VALUES ('Food', '2024-01');"
+    )
+    db.execute("INSERT INTO tags (name) VALUES ('Groceries');")
+
+    # valid insert
+    db.execute("""
+        INSERT INTO budget_definitions_tags (definition_id, tag_id)
+        VALUES (1, 1);
+    """)
+
+    # duplicate composite key should fail
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute("""
+            INSERT INTO budget_definitions_tags (definition_id, tag_id)
+            VALUES (1, 1);
+        """)
+
+
+def test_budget_definitions_tags_foreign_key_enforced(db: sqlite3.Connection):
+    # no definitions or tags exist yet
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute("""
+            INSERT INTO budget_definitions_tags (definition_id, tag_id)
+            VALUES (999, 999);
+        """)
+
+
+def test_budget_definitions_tags_cascade_on_delete(db: sqlite3.Connection):
+    db.execute(
+        "INSERT INTO budget_definitions (name, starts_on) VALUES ('Rent', '2024-01');"
+    )
+    db.execute("INSERT INTO tags (name) VALUES ('Housing');")
+    db.execute("""
+        INSERT INTO budget_definitions_tags (definition_id, tag_id)
+        VALUES (1, 1);
+    """)
+
+    # delete parent definition
+    db.execute("DELETE FROM budget_definitions WHERE id = 1;")
+
+    cur = db.execute("SELECT * FROM budget_definitions_tags;")
+    assert cur.fetchall() == []
@@ -21,7 +21,7 @@ def test_budgets_table_exists(db: sqlite3.Connection):
 
 
 def test_budgets_columns(db: sqlite3.Connection):
-    cur = db.execute("PRAGMA table_info(budgets);")
+    cur = db.execute("PRAGMA table_xinfo(budgets);")
     cols = {row[1] for row in cur.fetchall()}
 
     assert cols == {
@@ -32,6 +32,7 @@ def test_budgets_columns(db: sqlite3.Connection):
         "amount_saved",
         "created_at",
         "level",
+        "definition_id",
     }
 
 
@@ -46,7 +47,7 @@ def test_name_not_null(db: sqlite3.Connection):
 def test_defaults(db: sqlite3.Connection):
     db.execute("""
         INSERT INTO budgets (name, level)
-        VALUES ('Groceries', 'LOW');
+        VALUES ('Groceries', 0);
     """)
 
     row = db.execute("""
@@ -60,15 +61,15 @@ def test_defaults(db: sqlite3.Connection):
 def test_level_enum_valid(db: sqlite3.Connection):
     db.execute("""
         INSERT INTO budgets (name, level)
-        VALUES ('Rent', 'HIGH');
+        VALUES ('Rent', 2);
     """)
     db.execute("""
         INSERT INTO budgets (name, level)
-        VALUES ('Rent', 'LOW');
+        VALUES ('Rent', 0);
     """)
     db.execute("""
         INSERT INTO budgets (name, level)
-        VALUES ('Rent', 'MED');
+        VALUES ('Rent', 1);
     """)
 
 
@@ -80,10 +81,10 @@ def test_level_enum_invalid(db: sqlite3.Connection):
         """)
 
 
-def test_amount_saved_trigger_on_update(db: sqlite3.Connection):
+def test_amount_saved_follows_amount_spent(db: sqlite3.Connection):
     db.execute("""
         INSERT INTO budgets (name, level, amount_allocated)
-        VALUES ('Food', 'MED', 500);
+        VALUES ('Food', 1, 500);
     """)
 
     db.execute("""
@@ -99,10 +100,10 @@ def test_amount_saved_trigger_on_update(db: sqlite3.Connection):
     assert saved == 300
 
 
-def test_trigger_on_amount_allocated_change(db: sqlite3.Connection):
+def test_amount_saved_follows_amount_allocated(db: sqlite3.Connection):
     db.execute("""
         INSERT INTO budgets (name, level, amount_allocated, amount_spent)
-        VALUES ('Car', 'HIGH', 1000, 400);
+        VALUES ('Car', 2, 1000, 400);
     """)
 
     db.execute("""
@@ -118,9 +119,22 @@ def test_trigger_on_amount_allocated_change(db: sqlite3.Connection):
     assert saved == 800
 
 
+def test_amount_saved_is_read_only(db: sqlite3.Connection):
+    with pytest.raises(sqlite3.OperationalError):
+        db.execute("""
+            INSERT INTO budgets (name, amount_saved)
+            VALUES ('Food', 100);
+        """)
+
+
+def test_no_triggers(db: sqlite3.Connection):
+    cur = db.execute("SELECT name FROM sqlite_master WHERE type = 'trigger';")
+    assert cur.fetchall() == []
+
+
 def test_autoincrement_id(db: sqlite3.Connection):
-    db.execute("INSERT INTO budgets (name, level) VALUES ('A', 'LOW');")
-    db.execute("INSERT INTO budgets (name, level) VALUES ('B', 'LOW');")
+    db.execute("INSERT INTO budgets (name, level) VALUES ('A', 0);")
+    db.execute("INSERT INTO budgets (name, level) VALUES ('B', 0);")
 
     ids = [r[0] for r in db.execute("SELECT id FROM budgets ORDER BY id;")]
     assert ids == [1, 2]
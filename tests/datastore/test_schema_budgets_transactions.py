@@ -27,7 +27,7 @@ def test_insert_budget_transaction_link(db: sqlite3.Connection):
     # create account
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Checking", "ext-1", "APPLE", "DEPOSITORY", 0, "fp-acct-1"),
+        ("Checking", "ext-1", 1, 1, 0, "fp-acct-1"),
     )
     account_id = db.execute("SELECT id FROM accounts").fetchone()[0]
 
@@ -37,7 +37,7 @@ def test_insert_budget_transaction_link(db: sqlite3.Connection):
         INSERT INTO transactions (account_id, name, amount, direction, occurred_at, fingerprint)
         VALUES (?,?,?,?,?,?)
         """,
-        (account_id, "Walmart", 120.50, "OUT", "2025-01-01", "fp-txn-1"),
+        (account_id, "Walmart", 120.50, 1, "2025-01-01", "fp-txn-1"),
     )
     transaction_id = db.execute("SELECT id FROM transactions").fetchone()[0]
 
@@ -61,7 +61,7 @@ def test_budget_transaction_rejects_invalid_budget(db: sqlite3.Connection):
     # create account + transaction
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Checking", "ext-2", "APPLE", "DEPOSITORY", 0, "fp-acct-2"),
+        ("Checking", "ext-2", 1, 1, 0, "fp-acct-2"),
     )
     account_id = db.execute("SELECT id FROM accounts").fetchone()[0]
 
@@ -70,7 +70,7 @@ def test_budget_transaction_rejects_invalid_budget(db: sqlite3.Connection):
         INSERT INTO transactions (account_id, name, amount, direction, occurred_at, fingerprint)
         VALUES (?,?,?,?,?,?)
         """,
-        (account_id, "Target", 50.00, "OUT", "2025-01-02", "fp-txn-2"),
+        (account_id, "Target", 50.00, 1, "2025-01-02", "fp-txn-2"),
     )
     transaction_id = db.execute("SELECT id FROM transactions").fetchone()[0]
 
@@ -107,7 +107,7 @@ def test_budget_transaction_composite_pk_enforced(db: sqlite3.Connection):
     # setup account + transaction
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Checking", "ext-3", "APPLE", "DEPOSITORY", 0, "fp-acct-3"),
+        ("Checking", "ext-3", 1, 1, 0, "fp-acct-3"),
     )
     account_id = db.execute("SELECT id FROM accounts").fetchone()[0]
 
@@ -116,7 +116,7 @@ def test_budget_transaction_composite_pk_enforced(db: sqlite3.Connection):
         INSERT INTO transactions (account_id, name, amount, direction, occurred_at, fingerprint)
         VALUES (?,?,?,?,?,?)
         """,
-        (account_id, "Landlord", 1500, "OUT", "2025-01-03", "fp-txn-3"),
+        (account_id, "Landlord", 1500, 1, "2025-01-03", "fp-txn-3"),
     )
     transaction_id = db.execute("SELECT id FROM transactions").fetchone()[0]
 
@@ -145,7 +145,7 @@ def test_cascade_delete_budget_removes_budget_transactions(db: sqlite3.Connectio
     # create account + transaction
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Checking", "ext-4", "APPLE", "DEPOSITORY", 0, "fp-acct-4"),
+        ("Checking", "ext-4", 1, 1, 0, "fp-acct-4"),
     )
     account_id = db.execute("SELECT id FROM accounts").fetchone()[0]
 
@@ -154,7 +154,7 @@ def test_cascade_delete_budget_removes_budget_transactions(db: sqlite3.Connectio
         INSERT INTO transactions (account_id, name, amount, direction, occurred_at, fingerprint)
         VALUES (?,?,?,?,?,?)
         """,
-        (account_id, "Restaurant", 80, "OUT", "2025-01-04", "fp-txn-4"),
+        (account_id, "Restaurant", 80, 1, "2025-01-04", "fp-txn-4"),
     )
     transaction_id = db.execute("SELECT id FROM transactions").fetchone()[0]
 
@@ -186,7 +186,7 @@ def test_cascade_delete_transaction_removes_budget_transactions(db: sqlite3.Conn
     # create account
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Checking", "ext-5", "APPLE", "DEPOSITORY", 0, "fp-acct-5"),
+        ("Checking", "ext-5", 1, 1, 0, "fp-acct-5"),
     )
     account_id = db.execute("SELECT id FROM accounts").fetchone()[0]
 
@@ -196,7 +196,7 @@ def test_cascade_delete_transaction_removes_budget_transactions(db: sqlite3.Conn
         INSERT INTO transactions (account_id, name, amount, direction, occurred_at, fingerprint)
         VALUES (?,?,?,?,?,?)
         """,
-        (account_id, "Gas Station", 60, "OUT", "2025-01-05", "fp-txn-5"),
+        (account_id, "Gas Station", 60, 1, "2025-01-05", "fp-txn-5"),
     )
     transaction_id = db.execute("SELECT id FROM transactions").fetchone()[0]
 
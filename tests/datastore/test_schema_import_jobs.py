@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(open("schema/import_jobs.sql").read())
+    yield conn
+    conn.close()
+
+
+def _insert_job(db):
+    return db.execute(
+        "INSERT INTO import_jobs (filename, path) VALUES (?, ?)",
+        ("bank.csv", "/tmp/bank.csv"),
+    )
+
+
+def test_import_job_defaults(db: sqlite3.Connection):
+    _insert_job(db)
+
+    row = db.execute(
+        """
+        SELECT status, checkpoint, rows_parsed, rows_inserted, rows_deduplicated,
+            rows_linked, error, created_at, finished_at
+        FROM import_jobs
+        """
+    ).fetchone()
+
+    assert row[:7] == ("QUEUED", 0, 0, 0, 0, 0, None)
+    assert row[7] is not None
+    assert row[8] is None
+
+
+def test_status_is_constrained(db: sqlite3.Connection):
+    _insert_job(db)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute("UPDATE import_jobs SET status = 'LOST'")
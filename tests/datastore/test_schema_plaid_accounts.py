@@ -87,3 +87,14 @@ def test_autoincrement_id(db: sqlite3.Connection):
 
     ids = [r[0] for r in db.execute("SELECT id FROM plaid_accounts ORDER BY id;")]
     assert ids == [1, 2]
+
+
+def test_item_id_is_unique(db: sqlite3.Connection):
+    db.execute("INSERT INTO plaid_accounts (token, item_id) VALUES ('t1', 'item-1')")
+    db.execute("INSERT INTO plaid_accounts (token) VALUES ('t2')")
+    db.execute("INSERT INTO plaid_accounts (token) VALUES ('t3')")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute(
+            "INSERT INTO plaid_accounts (token, item_id) VALUES ('t4', 'item-1')"
+        )
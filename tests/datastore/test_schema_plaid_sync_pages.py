@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.executescript(open("schema/plaid_accounts.sql").read())
+    conn.executescript(open("schema/plaid_sync_pages.sql").read())
+    conn.execute("INSERT INTO plaid_accounts (token) VALUES ('token');")
+    yield conn
+    conn.close()
+
+
+def _insert_page(db, cursor, next_cursor, payload=b"{}"):
+    db.execute(
+        """
+        INSERT INTO plaid_sync_pages (plaid_id, cursor, next_cursor, payload)
+        VALUES (1, ?, ?, ?)
+        """,
+        (cursor, next_cursor, payload),
+    )
+
+
+def test_plaid_sync_pages_columns(db: sqlite3.Connection):
+    cur = db.execute("PRAGMA table_info(plaid_sync_pages);")
+    cols = {row[1] for row in cur.fetchall()}
+
+    assert cols == {
+        "id",
+        "plaid_id",
+        "cursor",
+        "next_cursor",
+        "payload",
+        "fetched_at",
+    }
+
+
+def test_same_item_and_cursor_replaces_page(db: sqlite3.Connection):
+    _insert_page(db, "", "c-1", b"old")
+    _insert_page(db, "", "c-2", b"new")
+
+    rows = db.execute("SELECT next_cursor, payload FROM plaid_sync_pages").fetchall()
+
+    assert rows == [("c-2", b"new")]
+
+
+def test_fetched_at_default(db: sqlite3.Connection):
+    _insert_page(db, "", "c-1")
+
+    fetched_at = db.execute("SELECT fetched_at FROM plaid_sync_pages").fetchone()[0]
+
+    assert fetched_at is not None
+
+
+def test_pages_cascade_with_plaid_account(db: sqlite3.Connection):
+    _insert_page(db, "", "c-1")
+
+    db.execute("DELETE FROM plaid_accounts WHERE id = 1;")
+
+    assert db.execute("SELECT * FROM plaid_sync_pages").fetchall() == []
+
+
+def test_plaid_id_must_exist(db: sqlite3.Connection):
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute(
+            """
+            INSERT INTO plaid_sync_pages (plaid_id, cursor, next_cursor, payload)
+            VALUES (99, '', 'c-1', x'00')
+            """
+        )
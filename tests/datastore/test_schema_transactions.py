@@ -42,7 +42,7 @@ def test_not_null_constraints(db: sqlite3.Connection):
 def test_direction_enum_invalid(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Test Account", "ext-a", "APPLE", "DEPOSITORY", 0, "fp-acct-txn-1"),
+        ("Test Account", "ext-a", 1, 1, 0, "fp-acct-txn-1"),
     )
 
     with pytest.raises(sqlite3.IntegrityError):
@@ -57,20 +57,20 @@ def test_direction_enum_invalid(db: sqlite3.Connection):
 def test_direction_enum_valid(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Test Account", "ext-a", "APPLE", "DEPOSITORY", 0, "fp-acct-txn-2"),
+        ("Test Account", "ext-a", 1, 1, 0, "fp-acct-txn-2"),
     )
 
     db.execute(
         """
         INSERT INTO transactions (name, amount, direction, account_id, fingerprint)
-        VALUES ('salary', 500000, 'IN', 1, 'fp-txn-2');
+        VALUES ('salary', 500000, 0, 1, 'fp-txn-2');
         """
     )
 
     db.execute(
         """
         INSERT INTO transactions (name, amount, direction, account_id, fingerprint)
-        VALUES ('groceries', 3500, 'OUT', 1, 'fp-txn-3');
+        VALUES ('groceries', 3500, 1, 1, 'fp-txn-3');
         """
     )
 
@@ -78,13 +78,13 @@ def test_direction_enum_valid(db: sqlite3.Connection):
 def test_default_occurred_at(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Test Account", "ext-a", "APPLE", "DEPOSITORY", 0, "fp-acct-txn-3"),
+        ("Test Account", "ext-a", 1, 1, 0, "fp-acct-txn-3"),
     )
 
     db.execute(
         """
         INSERT INTO transactions (name, amount, direction, account_id, fingerprint)
-        VALUES ('coffee', 400, 'OUT', 1, 'fp-txn-4');
+        VALUES ('coffee', 400, 1, 1, 'fp-txn-4');
         """
     )
     db.commit()
@@ -97,14 +97,14 @@ def test_default_occurred_at(db: sqlite3.Connection):
 def test_autoincrement_id(db):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Test Account", "ext-a", "APPLE", "DEPOSITORY", 0, "fp-acct-txn-4"),
+        ("Test Account", "ext-a", 1, 1, 0, "fp-acct-txn-4"),
     )
 
     db.execute(
-        "INSERT INTO transactions (name, amount, direction, account_id, fingerprint) VALUES ('A', 23, 'IN', 1, 'fp-txn-5');"
+        "INSERT INTO transactions (name, amount, direction, account_id, fingerprint) VALUES ('A', 23, 0, 1, 'fp-txn-5');"
     )
     db.execute(
-        "INSERT INTO transactions (name, amount, direction, account_id, fingerprint) VALUES ('B', 24, 'OUT', 1, 'fp-txn-6');"
+        "INSERT INTO transactions (name, amount, direction, account_id, fingerprint) VALUES ('B', 24, 1, 1, 'fp-txn-6');"
     )
 
     ids = [r[0] for r in db.execute("SELECT id FROM transactions ORDER BY id;")]
@@ -114,19 +114,19 @@ def test_autoincrement_id(db):
 def test_external_id_unique_dup_dropped(db: sqlite3.Connection):
     db.execute(
         "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
-        ("Test Account", "ext-a", "APPLE", "DEPOSITORY", 0, "fp-acct-txn-5"),
+        ("Test Account", "ext-a", 1, 1, 0, "fp-acct-txn-5"),
     )
 
     db.execute(
         """
         INSERT INTO transactions (name, amount, direction, external_id, account_id, fingerprint)
-        VALUES ('txn1', 1000, 'IN', 'ext-123', 1, 'fp-txn-7');
+        VALUES ('txn1', 1000, 0, 'ext-123', 1, 'fp-txn-7');
         """
     )
 
     db.execute(
         """
         INSERT INTO transactions (name, amount, direction, external_id, account_id, fingerprint)
-        VALUES ('txn2', 2000, 'OUT', 'ext-123', 1, 'fp-txn-8');
+        VALUES ('txn2', 2000, 1, 'ext-123', 1, 'fp-txn-8');
         """
     )
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(open("schema/budgets.sql").read())
+    conn.executescript(open("schema/transactions.sql").read())
+    conn.executescript(open("schema/plaid_accounts.sql").read())
+    conn.executescript(open("schema/accounts.sql").read())
+    conn.executescript(open("schema/budgets_transactions.sql").read())
+    conn.executescript(open("schema/transactions_read_model.sql").read())
+    conn.execute(
+        "INSERT INTO accounts (name, external_id, source, account_type, balance, fingerprint) VALUES (?,?,?,?,?,?)",
+        ("Checking", "ext-1", 0, 1, 0, "fp-acct-1"),
+    )
+    conn.execute("INSERT INTO budgets (name) VALUES ('Food'), ('Fun')")
+    conn.execute(
+        "INSERT INTO transactions (name, amount, direction, account_id, account_name, fingerprint) VALUES (?,?,?,?,?,?)",
+        ("Lunch", 900, 1, 1, "Checking", "fp-txn-1"),
+    )
+    yield conn
+    conn.close()
+
+
+def _explorer_columns(db: sqlite3.Connection):
+    return db.execute(
+        "SELECT account_name, budget_id, budget_name FROM transactions"
+    ).fetchone()
+
+
+def test_account_rename(db: sqlite3.Connection):
+    db.execute("UPDATE accounts SET name = 'Savings' WHERE id = 1")
+
+    assert _explorer_columns(db) == ("Savings", None, None)
+
+
+def test_account_delete(db: sqlite3.Connection):
+    db.execute("DELETE FROM accounts WHERE id = 1")
+
+    assert _explorer_columns(db) == (None, None, None)
+
+
+def test_link_keeps_first_budget(db: sqlite3.Connection):
+    db.execute("INSERT INTO budgets_transactions VALUES (1, 1)")
+    db.execute("INSERT INTO budgets_transactions VALUES (1, 2)")
+
+    assert _explorer_columns(db) == ("Checking", 1, "Food")
+
+
+def test_unlink_falls_back_to_remaining_link(db: sqlite3.Connection):
+    db.execute("INSERT INTO budgets_transactions VALUES (1, 1)")
+    db.execute("INSERT INTO budgets_transactions VALUES (1, 2)")
+
+    db.execute("DELETE FROM budgets_transactions WHERE budget_id = 1")
+    assert _explorer_columns(db) == ("Checking", 2, "Fun")
+
+    db.execute("DELETE FROM budgets_transactions WHERE budget_id = 2")
+    assert _explorer_columns(db) == ("Checking", None, None)
+
+
+def test_budget_rename(db: sqlite3.Connection):
+    db.execute("INSERT INTO budgets_transactions VALUES (1, 1)")
+
+    db.execute("UPDATE budgets SET name = 'Groceries' WHERE id = 1")
+
+    assert _explorer_columns(db) == ("Checking", 1, "Groceries")
+
+
+def test_budget_amount_update_leaves_transactions_alone(db: sqlite3.Connection):
+    db.execute("INSERT INTO budgets_transactions VALUES (1, 1)")
+    before = db.total_changes
+
+    db.execute("UPDATE budgets SET amount_spent = 900 WHERE id = 1")
+
+    # total_changes counts trigger writes too
+    assert db.total_changes - before == 1
+
+
+def test_budget_delete(db: sqlite3.Connection):
+    db.execute("INSERT INTO budgets_transactions VALUES (1, 1)")
+
+    db.execute("DELETE FROM budgets WHERE id = 1")
+
+    assert _explorer_columns(db) == ("Checking", None, None)
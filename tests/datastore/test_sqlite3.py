@@ -1,4 +1,5 @@
 import datetime as dt
+import sqlite3
 from datetime import datetime, timedelta
 
 import pytest
@@ -6,6 +7,7 @@ from sqlalchemy import select
 
 from core.datastore.db import Sqlite3
 from core.datastore.model import (
+    IngestStatus,
     PartialAccount,
     PartialBudget,
     PartialTransaction,
@@ -36,7 +38,7 @@ def test_insert_budget(db: Sqlite3):
     assert row.name == "Food"
     assert row.amount_allocated == 50000
     assert row.amount_spent == 0
-    assert row.amount_saved == 0.0
+    assert row.amount_saved == 50000
     assert row.created_at == datetime(2020, 1, 1).isoformat()
 
 
@@ -142,7 +144,7 @@ def test_insert_transaction_uses_db_default_occurred_at(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-1",
+            fingerprint=b"fp-acct-1",
         )
     )
     with db.engine.begin() as conn:
@@ -153,7 +155,7 @@ def test_insert_transaction_uses_db_default_occurred_at(db: Sqlite3):
                 TransactionDirection.OUT,
                 external_id="ext-45",
                 account_id=1,
-                fingerprint="fp-txn-1",
+                fingerprint=b"fp-txn-1",
             )
         )
         row = conn.execute(select(db.transactions)).first()
@@ -169,7 +171,7 @@ def test_insert_transaction_with_explicit_occurred_at(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-2",
+            fingerprint=b"fp-acct-2",
         )
     )
     ts = datetime(2024, 1, 1)
@@ -180,7 +182,7 @@ def test_insert_transaction_with_explicit_occurred_at(db: Sqlite3):
             TransactionDirection.IN,
             occurred_at=ts,
             account_id=1,
-            fingerprint="fp-txn-2",
+            fingerprint=b"fp-txn-2",
         )
     )
     with db.engine.begin() as conn:
@@ -189,6 +191,40 @@ def test_insert_transaction_with_explicit_occurred_at(db: Sqlite3):
     assert row.occurred_at == "2024-01-01T00:00:00"
 
 
+def test_insert_transactions_bulk_skips_duplicates(db: Sqlite3):
+    account_id = db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"fp")
+    )
+    objs = [
+        PartialTransaction(
+            f"Txn {n}",
+            1.25,
+            TransactionDirection.OUT,
+            account_id,
+            f"fp-{n % 3}".encode(),
+            external_id=f"ext-{n}",
+            occurred_at=datetime(2024, 1, n + 1),
+        )
+        for n in range(5)
+    ]
+    objs.append(
+        PartialTransaction("No date", 2, TransactionDirection.IN, account_id, b"fp-x")
+    )
+
+    assert db.insert_transactions(objs) == 4
+    assert db.insert_transactions(objs) == 0
+    assert db.insert_transactions([]) == 0
+
+    with db.engine.begin() as conn:
+        rows = conn.execute(
+            select(db.transactions).order_by(db.transactions.c.id)
+        ).fetchall()
+    assert [row.name for row in rows] == ["Txn 0", "Txn 1", "Txn 2", "No date"]
+    assert rows[0].amount == 125
+    assert rows[0].note == ""
+    assert rows[3].occurred_at  # schema default applied
+
+
 def test_update_transaction_note(db: Sqlite3):
     db.insert_account(
         PartialAccount(
@@ -197,7 +233,7 @@ def test_update_transaction_note(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-3",
+            fingerprint=b"fp-acct-3",
         )
     )
     db.insert_transaction(
@@ -206,7 +242,7 @@ def test_update_transaction_note(db: Sqlite3):
             50,
             TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-3",
+            fingerprint=b"fp-txn-3",
         ),
     )
     with db.engine.begin() as conn:
@@ -227,7 +263,7 @@ def test_select_transaction_id_by_fingerprint_or_external_id(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-4",
+            fingerprint=b"fp-acct-4",
         )
     )
     transaction_id = db.insert_transaction(
@@ -236,22 +272,41 @@ def test_select_transaction_id_by_fingerprint_or_external_id(db: Sqlite3):
             75,
             TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-4",
+            fingerprint=b"fp-txn-4",
             external_id="ext-txn-4",
         )
     )
 
     by_fingerprint = db.select_transaction_id_by_fingerprint_or_external_id(
-        "fp-txn-4", None
+        b"fp-txn-4", None
     )
     by_external_id = db.select_transaction_id_by_fingerprint_or_external_id(
-        "missing", "ext-txn-4"
+        b"missing", "ext-txn-4"
     )
 
     assert by_fingerprint == transaction_id
     assert by_external_id == transaction_id
 
 
+def test_select_transaction_ids_by_fingerprints(db: Sqlite3):
+    account_id = db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"fp")
+    )
+    db.insert_transactions(
+        [
+            PartialTransaction(
+                f"Txn {n}", 1, TransactionDirection.OUT, account_id, f"fp-{n}".encode()
+            )
+            for n in range(3)
+        ]
+    )
+
+    ids = db.select_transaction_ids_by_fingerprints([b"fp-0", b"fp-2", b"fp-missing"])
+
+    assert ids == {b"fp-0": 1, b"fp-2": 3}
+    assert db.select_transaction_ids_by_fingerprints([]) == {}
+
+
 def test_insert_transaction_returns_none_on_ignore(db: Sqlite3):
     db.insert_account(
         PartialAccount(
@@ -260,7 +315,7 @@ def test_insert_transaction_returns_none_on_ignore(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-7",
+            fingerprint=b"fp-acct-7",
         )
     )
     first_id = db.insert_transaction(
@@ -269,7 +324,7 @@ def test_insert_transaction_returns_none_on_ignore(db: Sqlite3):
             10,
             TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-duplicate",
+            fingerprint=b"fp-txn-duplicate",
             external_id="ext-dup",
         )
     )
@@ -279,7 +334,7 @@ def test_insert_transaction_returns_none_on_ignore(db: Sqlite3):
             10,
             TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-duplicate",
+            fingerprint=b"fp-txn-duplicate",
             external_id="ext-dup",
         )
     )
@@ -296,7 +351,7 @@ def test_delete_transaction(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-4",
+            fingerprint=b"fp-acct-4",
         )
     )
     db.insert_transaction(
@@ -305,7 +360,7 @@ def test_delete_transaction(db: Sqlite3):
             1,
             TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-4",
+            fingerprint=b"fp-txn-4",
         ),
     )
     db.delete_transaction(1)
@@ -322,12 +377,16 @@ def test_select_transaction(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-5",
+            fingerprint=b"fp-acct-5",
         )
     )
     db.insert_transaction(
         PartialTransaction(
-            "Trans", 100, TransactionDirection.OUT, account_id=1, fingerprint="fp-txn-5"
+            "Trans",
+            100,
+            TransactionDirection.OUT,
+            account_id=1,
+            fingerprint=b"fp-txn-5",
         ),
     )
     assert db.select_transaction(1) is not None
@@ -342,7 +401,7 @@ def test_retrieve_transactions(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-6",
+            fingerprint=b"fp-acct-6",
         )
     )
 
@@ -356,12 +415,16 @@ def test_retrieve_transactions(db: Sqlite3):
             1,
             TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-6a",
+            fingerprint=b"fp-txn-6a",
         ),
     )
     tx2 = db.insert_transaction(
         PartialTransaction(
-            "Trans 2", 2, TransactionDirection.IN, account_id=1, fingerprint="fp-txn-6b"
+            "Trans 2",
+            2,
+            TransactionDirection.IN,
+            account_id=1,
+            fingerprint=b"fp-txn-6b",
         ),
     )
     tx3 = db.insert_transaction(
@@ -370,7 +433,7 @@ def test_retrieve_transactions(db: Sqlite3):
             3,
             TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-6c",
+            fingerprint=b"fp-txn-6c",
         ),
     )
 
@@ -392,7 +455,7 @@ def test_filter_transactions_by_occurred_at_range(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-7",
+            fingerprint=b"fp-acct-7",
         )
     )
 
@@ -403,7 +466,7 @@ def test_filter_transactions_by_occurred_at_range(db: Sqlite3):
             amount=10,
             direction=TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-7a",
+            fingerprint=b"fp-txn-7a",
         )
     )
     db.insert_transaction(
@@ -412,7 +475,7 @@ def test_filter_transactions_by_occurred_at_range(db: Sqlite3):
             amount=20,
             direction=TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-7b",
+            fingerprint=b"fp-txn-7b",
         )
     )
     db.insert_transaction(
@@ -421,7 +484,7 @@ def test_filter_transactions_by_occurred_at_range(db: Sqlite3):
             amount=30,
             direction=TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-7c",
+            fingerprint=b"fp-txn-7c",
         )
     )
 
@@ -462,6 +525,406 @@ def test_filter_transactions_by_occurred_at_range(db: Sqlite3):
     assert "Old Tx" not in names
 
 
+def test_transaction_lists_follow_renames_and_links(db: Sqlite3):
+    db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"\x02a")
+    )
+    db.insert_budget("Food", 100)
+    db.insert_budget("Fun", 100)
+    db.insert_transactions(
+        [PartialTransaction("Lunch", 9, TransactionDirection.OUT, 1, b"\x02l")]
+    )
+
+    db.insert_budget_transaction(1, 1)
+    db.insert_budget_transaction(2, 1)
+    db.update_budget(PartialBudget(1, "Groceries", 100, 0))
+    with db.engine.begin() as conn:
+        conn.execute(db.accounts.update().values(name="Apple Card"))
+    [linked] = db.retrieve_transactions()
+    db.delete_budget_transaction(1, 1)
+    [relinked] = db.retrieve_transactions()
+    db.delete_budget_transaction(2, 1)
+    [unlinked] = db.retrieve_transactions()
+    db.delete_account(1)
+
+    assert (linked.account_name, linked.budget_name) == ("Apple Card", "Groceries")
+    assert relinked.budget_name == "Fun"
+    assert unlinked.budget_name is None
+    # Transactions of a deleted account drop out, as the inner join did
+    assert db.retrieve_transactions() == []
+
+
+def test_filter_transactions_reads_one_table(db: Sqlite3):
+    with db.engine.begin() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM transactions "
+            "WHERE account_name IS NOT NULL AND occurred_at >= '2024-01-01' "
+            "AND occurred_at < '2024-02-01' ORDER BY occurred_at DESC"
+        ).fetchall()
+
+    assert [row[-1] for row in plan] == [
+        "SEARCH transactions USING INDEX idx_transactions_occurred_at "
+        "(occurred_at>? AND occurred_at<?)"
+    ]
+
+
+def test_unassigned_transactions_for_a_month(db: Sqlite3):
+    db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"\x02a")
+    )
+    db.insert_budget("Food", 100)
+    db.insert_transactions(
+        [
+            PartialTransaction(
+                name,
+                1,
+                TransactionDirection.OUT,
+                1,
+                name.encode(),
+                occurred_at=occurred_at,
+            )
+            for name, occurred_at in (
+                ("Feb", datetime(2024, 2, 29)),
+                ("Early", datetime(2024, 3, 1)),
+                ("Late", datetime(2024, 3, 31, 18)),
+                ("Assigned", datetime(2024, 3, 15)),
+                ("Apr", datetime(2024, 4, 1)),
+            )
+        ]
+    )
+    db.insert_budget_transaction(1, 4)
+    march = (datetime(2024, 3, 1), datetime(2024, 4, 1))
+
+    assert [t.name for t in db.filter_unassigned_transactions(*march)] == [
+        "Late",
+        "Early",
+    ]
+    assert db.count_unassigned_transactions(*march) == 2
+
+    db.delete_budget_transaction(1, 4)
+    assert db.count_unassigned_transactions(*march) == 3
+
+
+def test_count_unassigned_transactions_uses_partial_index(db: Sqlite3):
+    with db.engine.begin() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT count(*) FROM transactions "
+            "WHERE budget_id IS NULL AND account_name IS NOT NULL "
+            "AND occurred_at >= '2024-03-01' AND occurred_at < '2024-04-01'"
+        ).fetchall()
+
+    assert [row[-1] for row in plan] == [
+        "SEARCH transactions USING INDEX idx_transactions_unassigned "
+        "(occurred_at>? AND occurred_at<?)"
+    ]
+
+
+def test_bulk_budget_links(db: Sqlite3):
+    db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"\x02a")
+    )
+    db.insert_budget("Food", 100)
+    db.insert_budget("Fun", 100)
+    db.insert_transactions(
+        [
+            PartialTransaction(
+                f"Txn {n}",
+                1,
+                TransactionDirection.OUT,
+                1,
+                bytes((2, n)),
+                occurred_at=datetime(2024, 3, n),
+            )
+            for n in (1, 2, 3)
+        ]
+    )
+    db.insert_budget_transactions([(1, 1), (1, 2), (2, 2)])
+
+    assert db.select_transaction_dates([1, 3, 99]) == {
+        1: datetime(2024, 3, 1),
+        3: datetime(2024, 3, 3),
+    }
+    assert sorted(db.select_budget_transaction_links([2, 3])) == [(1, 2), (2, 2)]
+    assert db.delete_budget_transactions([(1, 1), (2, 2), (2, 3)]) == 2
+    assert db.select_budget_transaction_links([1, 2, 3]) == [(1, 2)]
+
+
+def test_recompute_budgets_spent(db: Sqlite3):
+    db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"\x02a")
+    )
+    db.insert_budget("March", 100, datetime(2024, 3, 1))
+    db.insert_budget("April", 100, datetime(2024, 4, 1))
+    db.insert_budget("Empty", 100, datetime(2024, 4, 2))
+    db.insert_transactions(
+        [
+            PartialTransaction("Out", 9, TransactionDirection.OUT, 1, b"\x02o"),
+            PartialTransaction("In", 5, TransactionDirection.IN, 1, b"\x02i"),
+            PartialTransaction("Gone", 7, TransactionDirection.OUT, 2, b"\x02g"),
+        ]
+    )
+    db.insert_budget_transactions([(1, 1), (1, 2), (1, 3), (2, 1)])
+    with db.engine.begin() as conn:
+        conn.execute(db.budgets.update().values(amount_spent=1))
+
+    april = (datetime(2024, 4, 1), datetime(2024, 5, 1))
+    assert db.recompute_budgets_spent(*april) == 2
+    assert [b.amount_spent for b in db.retrieve_budgets()] == [1, 900, 0]
+
+    assert db.recompute_budgets_spent() == 1
+    assert db.recompute_budgets_spent() == 0
+    # Matches the per-budget refresh: OUT only, live accounts only
+    assert [b.amount_spent for b in db.retrieve_budgets()] == [900, 900, 0]
+
+
+def test_update_transactions_by_external_id_rewrites_changed_rows(db: Sqlite3):
+    db.insert_account(
+        PartialAccount("ext", TransactionSource.PLAID, "DEPOSITORY", "Chk", 0, b"\x02a")
+    )
+    db.insert_transactions(
+        [
+            PartialTransaction(
+                "PAYROLL", 9, TransactionDirection.OUT, 1, b"\x02p", external_id="p"
+            ),
+            PartialTransaction(
+                "Rent", 5, TransactionDirection.OUT, 1, b"\x02r", external_id="r"
+            ),
+        ]
+    )
+
+    rebuilt = [
+        PartialTransaction(
+            "Payroll", 9, TransactionDirection.IN, 1, b"\x02P", external_id="p"
+        ),
+        PartialTransaction(
+            "Rent", 5, TransactionDirection.OUT, 1, b"\x02r", external_id="r"
+        ),
+        PartialTransaction(
+            "New", 1, TransactionDirection.OUT, 1, b"\x02n", external_id="n"
+        ),
+    ]
+    assert db.update_transactions_by_external_id(rebuilt) == 1
+    assert db.update_transactions_by_external_id(rebuilt) == 0
+
+    payroll = db.select_transaction(1)
+    assert (payroll.name, payroll.direction, payroll.fingerprint) == (
+        "Payroll",
+        TransactionDirection.IN,
+        b"\x02P",
+    )
+
+
+def test_materialize_budgets_creates_each_month_once(db: Sqlite3):
+    db.insert_budget("Rent", 900, datetime(2024, 3, 5))
+    db.insert_budget("Later", 50, datetime(2024, 5, 1))
+    april = (datetime(2024, 4, 1), datetime(2024, 5, 1))
+
+    assert db.materialize_budgets(*april) == 1
+    assert db.materialize_budgets(*april) == 0
+    # Months before a budget starts are left alone
+    assert db.materialize_budgets(datetime(2024, 2, 1), datetime(2024, 3, 1)) == 0
+    assert db.materialize_budgets(datetime(2024, 3, 1), datetime(2024, 4, 1)) == 0
+
+    rows = db.filter_budgets(*april)
+    assert [(b.name, b.amount_allocated, b.definition_id) for b in rows] == [
+        ("Rent", 90000, 1)
+    ]
+    assert rows[0].created_at == datetime(2024, 4, 1).isoformat()
+
+
+def test_update_budget_definition_carries_forward(db: Sqlite3):
+    db.insert_budget("Food", 100, datetime(2024, 1, 1))
+    for month in (2, 3):
+        db.materialize_budgets(datetime(2024, month, 1), datetime(2024, month + 1, 1))
+
+    db.update_budget_definition(2, name="Groceries", amount_allocated=150)
+    db.materialize_budgets(datetime(2024, 4, 1), datetime(2024, 5, 1))
+
+    assert [(b.name, b.amount_allocated) for b in db.retrieve_budgets()] == [
+        ("Food", 10000),
+        ("Groceries", 15000),
+        ("Groceries", 15000),
+        ("Groceries", 15000),
+    ]
+
+
+def test_delete_budget_leaves_other_months_alone(db: Sqlite3):
+    db.insert_budget("Gym", 30, datetime(2024, 1, 1))
+    for month in (2, 3):
+        db.materialize_budgets(datetime(2024, month, 1), datetime(2024, month + 1, 1))
+    for day in (datetime(2024, 2, 5), datetime(2024, 3, 5)):
+        db.insert_transaction(
+            PartialTransaction(
+                "Gym",
+                3000,
+                TransactionDirection.OUT,
+                account_id=1,
+                occurred_at=day,
+                fingerprint=f"fp-{day:%m}".encode(),
+            )
+        )
+    db.insert_budget_transaction(2, 1)
+    db.insert_budget_transaction(3, 2)
+
+    db.delete_budget(2)  # Gym, February
+
+    assert [b.created_at[:7] for b in db.retrieve_budgets()] == [
+        "2024-01",
+        "2024-03",
+    ]
+    with db.engine.begin() as conn:
+        assert conn.execute(select(db.budgets_transactions)).all() == [(2, 3)]
+    # The recurrence carries on past March
+    assert db.materialize_budgets(datetime(2024, 4, 1), datetime(2024, 5, 1)) == 1
+
+
+def test_delete_budget_in_its_newest_month_stops_recurrence(db: Sqlite3):
+    db.insert_budget("Gym", 30, datetime(2024, 1, 1))
+    db.insert_budget("Rent", 900, datetime(2024, 1, 1))
+    db.materialize_budgets(datetime(2024, 2, 1), datetime(2024, 3, 1))
+
+    db.delete_budget(3)  # Gym, February
+
+    assert db.materialize_budgets(datetime(2024, 2, 1), datetime(2024, 3, 1)) == 0
+    assert db.materialize_budgets(datetime(2024, 3, 1), datetime(2024, 4, 1)) == 1
+    assert [(b.name, b.created_at[:7]) for b in db.retrieve_budgets()] == [
+        ("Gym", "2024-01"),
+        ("Rent", "2024-01"),
+        ("Rent", "2024-02"),
+        ("Rent", "2024-03"),
+    ]
+
+
+def test_materialize_budgets_fills_a_month_viewed_after_a_later_one(db: Sqlite3):
+    db.insert_budget("Food", 100, datetime(2024, 1, 1))
+
+    assert db.materialize_budgets(datetime(2024, 3, 1), datetime(2024, 4, 1)) == 1
+    assert db.materialize_budgets(datetime(2024, 2, 1), datetime(2024, 3, 1)) == 1
+    assert db.materialize_budgets(datetime(2024, 2, 1), datetime(2024, 3, 1)) == 0
+    assert [b.created_at[:7] for b in db.retrieve_budgets()] == [
+        "2024-01",
+        "2024-03",
+        "2024-02",
+    ]
+
+
+def test_budget_tags_are_shared_across_months(db: Sqlite3):
+    db.insert_budget("Food", 100, datetime(2024, 1, 1))
+    db.materialize_budgets(datetime(2024, 2, 1), datetime(2024, 3, 1))
+    db.insert_tag("Groceries")
+
+    db.insert_budget_tag(1, 1)
+    db.insert_budget_tag(2, 1)
+
+    with db.engine.begin() as conn:
+        assert conn.execute(select(db.budget_definitions_tags)).all() == [(1, 1)]
+    assert [t.name for t in db.retrieve_budget_tags(2)] == ["Groceries"]
+
+    db.delete_budget_tag(2, 1)
+    assert db.retrieve_budget_tags(1) == []
+
+
+def test_project_budgets_skips_names_already_in_a_month(db: Sqlite3):
+    db.insert_budget("Rent", 900, datetime(2024, 11, 1))
+    db.insert_budget("Food", 100, datetime(2024, 11, 1))
+    db.insert_budget("Food", 120, datetime(2025, 1, 10))
+    db.insert_tag("Housing")
+    db.insert_budget_tag(1, 1)
+    november = (datetime(2024, 11, 1), datetime(2024, 12, 1))
+    months = [datetime(2024, 12, 1), datetime(2025, 1, 1), datetime(2025, 2, 1)]
+
+    assert db.project_budgets(*november, months) == 5
+    assert db.project_budgets(*november, months) == 0
+
+    projected = [
+        (b.name, b.created_at, b.definition_id)
+        for b in db.retrieve_budgets()
+        if b.id > 3
+    ]
+    assert sorted(projected) == [
+        ("Food", "2024-12-01T00:00:00", 2),
+        ("Food", "2025-02-01T00:00:00", 2),
+        ("Rent", "2024-12-01T00:00:00", 1),
+        ("Rent", "2025-01-01T00:00:00", 1),
+        ("Rent", "2025-02-01T00:00:00", 1),
+    ]
+    # Tags live on the definition, so every projected month has them
+    last_rent = max(b.id for b in db.retrieve_budgets() if b.name == "Rent")
+    assert [t.name for t in db.retrieve_budget_tags(last_rent)] == ["Housing"]
+
+
+def test_project_budgets_follows_renames_and_ended_budgets(db: Sqlite3):
+    db.insert_budget("Food", 100, datetime(2024, 11, 1))
+    db.insert_budget("Gym", 30, datetime(2024, 11, 1))
+    november = (datetime(2024, 11, 1), datetime(2024, 12, 1))
+    db.project_budgets(*november, [datetime(2024, 12, 1), datetime(2025, 1, 1)])
+    food_january, gym_january = (
+        b.id for b in db.retrieve_budgets() if b.created_at.startswith("2025-01")
+    )
+    db.update_budget_definition(food_january, name="Groceries", amount_allocated=150)
+    db.delete_budget(gym_january)
+    months = [datetime(2024, 12, 1), datetime(2025, 1, 1), datetime(2025, 2, 1)]
+
+    assert db.project_budgets(*november, months) == 1
+
+    assert [
+        (b.name, b.amount_allocated, b.created_at[:7])
+        for b in db.retrieve_budgets()
+        if b.created_at >= "2025-01"
+    ] == [("Groceries", 15000, "2025-01"), ("Groceries", 15000, "2025-02")]
+
+
+def test_startup_splits_copied_budgets_into_definitions(tmp_path):
+    db_path = tmp_path / "copied_budgets.sqlite"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            amount_allocated INTEGER NOT NULL DEFAULT 0,
+            amount_spent INTEGER NOT NULL DEFAULT 0,
+            amount_saved INTEGER NOT NULL GENERATED ALWAYS AS
+                (amount_allocated - amount_spent) VIRTUAL,
+            created_at TEXT NOT NULL DEFAULT (datetime ('now')),
+            level INTEGER CHECK (level IN (0, 1, 2))
+        );
+        CREATE TABLE budgets_tags (
+            tag_id INTEGER NOT NULL,
+            budget_id INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, budget_id)
+        ) WITHOUT ROWID;
+        INSERT INTO budgets (name, amount_allocated, created_at) VALUES
+            ('Food', 100, '2024-01-01T00:00:00'),
+            ('Trip', 500, '2024-01-01T00:00:00'),
+            ('Food', 150, '2024-02-01T00:00:00');
+        INSERT INTO budgets_tags VALUES (1, 1), (1, 3), (2, 2);
+        """
+    )
+    conn.close()
+
+    db = Sqlite3(db_path)
+
+    with db.engine.begin() as conn:
+        definitions = conn.execute(select(db.budget_definitions)).all()
+        links = conn.execute(select(db.budget_definitions_tags)).all()
+        tables = set(
+            conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")
+            .scalars()
+            .all()
+        )
+    assert definitions == [
+        (1, "Food", 150, "2024-01", None),
+        (2, "Trip", 500, "2024-01", "2024-02"),
+    ]
+    assert [b.definition_id for b in db.retrieve_budgets()] == [1, 2, 1]
+    assert sorted(links) == [(1, 1), (2, 2)]
+    assert "budgets_tags" not in tables
+    # Only the budget still in use recurs into March
+    assert db.materialize_budgets(datetime(2024, 3, 1), datetime(2024, 4, 1)) == 1
+    db.engine.dispose()
+
+
 # # --------------------
 # # Tag APIs
 # # --------------------
@@ -535,7 +998,7 @@ def test_delete_budget_tag(db: Sqlite3):
         db.insert_budget_tag(1, 1)
         db.delete_budget_tag(1, 1)
 
-        assert conn.execute(select(db.budgets_tags)).first() is None
+        assert conn.execute(select(db.budget_definitions_tags)).first() is None
 
 
 # --------------------
@@ -551,7 +1014,7 @@ def test_insert_account_without_plaid_id(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-8",
+            fingerprint=b"fp-acct-8",
         )
     )
 
@@ -574,7 +1037,7 @@ def test_insert_account_with_plaid_id(db: Sqlite3):
             plaid_id=1,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-9",
+            fingerprint=b"fp-acct-9",
         )
     )
 
@@ -594,7 +1057,7 @@ def test_select_account(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-10",
+            fingerprint=b"fp-acct-10",
         )
     )
 
@@ -613,7 +1076,7 @@ def test_select_account_by_ext_id(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-11",
+            fingerprint=b"fp-acct-11",
         )
     )
 
@@ -632,7 +1095,7 @@ def test_retrieve_accounts(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-12a",
+            fingerprint=b"fp-acct-12a",
         )
     )
     db.insert_account(
@@ -642,7 +1105,7 @@ def test_retrieve_accounts(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-12b",
+            fingerprint=b"fp-acct-12b",
         )
     )
     db.insert_account(
@@ -652,7 +1115,7 @@ def test_retrieve_accounts(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-12c",
+            fingerprint=b"fp-acct-12c",
         )
     )
 
@@ -664,6 +1127,45 @@ def test_retrieve_accounts(db: Sqlite3):
     assert accounts[2].name == "Account Three"
 
 
+def test_update_account_balances(db: Sqlite3):
+    for n in (1, 2):
+        db.insert_account(
+            PartialAccount(
+                name=f"Account {n}",
+                external_id=f"ext-bal-{n}",
+                source=TransactionSource.PLAID,
+                account_type="DEPOSITORY",
+                balance=1,
+                fingerprint=f"fp-acct-bal-{n}".encode(),
+            )
+        )
+
+    db.update_account_balances({1: 5000, 2: -125})
+
+    assert db.select_account(1).balance == 5000
+    assert db.select_account(2).balance == -125
+
+
+def test_account_updates_stamp_last_updated_at(db: Sqlite3):
+    db.insert_account(
+        PartialAccount("ext", TransactionSource.PLAID, "DEPOSITORY", "A", 0, b"\x02a")
+    )
+
+    def stamp_after(write):
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE accounts SET last_updated_at = '2000-01-01'")
+        write()
+        with db.engine.begin() as conn:
+            return conn.execute(select(db.accounts.c.last_updated_at)).scalar()
+
+    fingerprinted = stamp_after(lambda: db.update_account_fingerprints([(1, b"\x02b")]))
+    balanced = stamp_after(lambda: db.update_account_balances({1: 500}))
+
+    assert fingerprinted > "2000-01-01"
+    assert balanced > "2000-01-01"
+    assert db.select_account(1).fingerprint == b"\x02b"
+
+
 def test_delete_account(db: Sqlite3):
     db.insert_account(
         PartialAccount(
@@ -672,7 +1174,7 @@ def test_delete_account(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-13",
+            fingerprint=b"fp-acct-13",
         )
     )
 
@@ -722,6 +1224,155 @@ def test_retrieve_plaid_accounts(db: Sqlite3):
     assert accounts[2].token == "t3"
 
 
+def test_plaid_account_item_id_lookup(db: Sqlite3):
+    db.insert_plaid_account("t1", "item-1")
+    db.insert_plaid_account("t2")
+
+    assert db.select_plaid_account_id_by_item_id("item-1") == 1
+    assert db.select_plaid_account_id_by_item_id("item-2") is None
+
+    db.update_plaid_account_item_id(2, "item-2")
+
+    assert db.select_plaid_account_id_by_item_id("item-2") == 2
+    assert db.select_plaid_account(2).item_id == "item-2"
+
+
+def test_open_migrates_plaid_accounts_without_item_id(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE plaid_accounts "
+        "(id INTEGER PRIMARY KEY AUTOINCREMENT, token TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO plaid_accounts (token) VALUES ('legacy')")
+    conn.commit()
+    conn.close()
+
+    db = Sqlite3(path)
+
+    legacy = db.select_plaid_account(1)
+    assert legacy.token == "legacy"
+    assert legacy.item_id is None
+    db.update_plaid_account_item_id(1, "item-legacy")
+    assert db.select_plaid_account_id_by_item_id("item-legacy") == 1
+    db.engine.dispose()
+
+
+def test_plaid_sync_pages_roundtrip(db: Sqlite3):
+    db.insert_plaid_account("t1")
+    db.insert_plaid_account("t2")
+
+    assert db.select_plaid_sync_cursor(1) is None
+
+    db.insert_plaid_sync_page(1, "", "c-1", b'{"page": 1}')
+    db.insert_plaid_sync_page(2, "", "x-1", b'{"page": "other"}')
+    db.insert_plaid_sync_page(1, "c-1", "c-2", b'{"page": 2}')
+
+    assert db.select_plaid_sync_cursor(1) == "c-2"
+    assert db.retrieve_plaid_sync_page_ids() == [1, 2, 3]
+    assert db.retrieve_plaid_sync_page_ids(1) == [1, 3]
+    assert db.select_plaid_sync_page(3) == (1, b'{"page": 2}')
+
+    with db.engine.begin() as conn:
+        stored = conn.execute(select(db.plaid_sync_pages.c.payload)).first()
+    assert stored.payload != b'{"page": 1}'  # compressed at rest
+
+
+def test_insert_transactions_returning_ids_maps_new_rows(db: Sqlite3):
+    db.insert_account(
+        PartialAccount(
+            name="Checking",
+            external_id="ext-returning",
+            source=TransactionSource.APPLE,
+            account_type="DEPOSITORY",
+            balance=0,
+            fingerprint=b"fp-acct-returning",
+        )
+    )
+    txns = [
+        PartialTransaction(
+            name=f"Store {day}",
+            amount=10,
+            direction=TransactionDirection.OUT,
+            account_id=1,
+            fingerprint=f"fp-returning-{day}".encode(),
+            occurred_at=datetime(2024, 1, day),
+        )
+        for day in (30, 31)
+    ] + [
+        PartialTransaction(
+            name="Store Feb",
+            amount=10,
+            direction=TransactionDirection.OUT,
+            account_id=1,
+            fingerprint=b"fp-returning-feb",
+            occurred_at=datetime(2024, 2, 1),
+        )
+    ]
+
+    first = db.insert_transactions_returning_ids(txns[:1])
+    second = db.insert_transactions_returning_ids(txns)
+
+    assert list(first) == [b"fp-returning-30"]
+    assert set(second) == {b"fp-returning-31", b"fp-returning-feb"}
+    assert db.insert_transactions_returning_ids([]) == {}
+    january = db.select_transaction_fingerprints(
+        datetime(2024, 1, 1), datetime(2024, 2, 1)
+    )
+    assert sorted(january) == [b"fp-returning-30", b"fp-returning-31"]
+
+
+def test_apple_ingest_queue_lifecycle(db: Sqlite3):
+    assert db.select_apple_ingest_job("upload") is None
+    db.insert_apple_ingest_chunk("upload", 0, 2, b"[1, 2]")
+    db.insert_apple_ingest_chunk("upload", 1, 1, b"[3]")
+
+    job = db.select_apple_ingest_job("upload")
+    assert (job.status, job.chunks, job.received) == (IngestStatus.RECEIVING, 2, 3)
+    assert db.claim_apple_ingest_chunk() is None  # not released yet
+
+    assert db.release_apple_ingest_chunks("upload") == 2
+    db.insert_apple_ingest_chunk("upload", 0, 1, b"[9]")  # retry is ignored
+    assert db.release_apple_ingest_chunks("upload") == 0
+    assert db.select_apple_ingest_job("upload").status == IngestStatus.QUEUED
+
+    first = db.claim_apple_ingest_chunk()
+    assert first[1] == b"[1, 2]"
+    assert db.select_apple_ingest_job("upload").status == IngestStatus.PROCESSING
+    db.finish_apple_ingest_chunk(first[0], 2)
+
+    second = db.claim_apple_ingest_chunk()
+    assert second[1] == b"[3]"
+    assert db.claim_apple_ingest_chunk() is None
+    db.finish_apple_ingest_chunk(second[0], 0, "bad row")
+
+    job = db.select_apple_ingest_job("upload")
+    assert job.status == IngestStatus.FAILED
+    assert (job.finished_chunks, job.inserted, job.error) == (2, 2, "bad row")
+
+
+def test_discard_apple_ingest_chunks_keeps_released_chunks(db: Sqlite3):
+    db.insert_apple_ingest_chunk("upload", 0, 1, b"[1]")
+    db.release_apple_ingest_chunks("upload")
+    db.insert_apple_ingest_chunk("upload", 1, 1, b"[2]")
+
+    db.discard_apple_ingest_chunks("upload")
+
+    job = db.select_apple_ingest_job("upload")
+    assert (job.status, job.chunks) == (IngestStatus.QUEUED, 1)
+
+
+def test_requeue_apple_ingest_chunks(db: Sqlite3):
+    db.insert_apple_ingest_chunk("upload", 0, 1, b"[1]")
+    db.release_apple_ingest_chunks("upload")
+    claimed = db.claim_apple_ingest_chunk()
+
+    assert db.requeue_apple_ingest_chunks() == 1
+    assert db.claim_apple_ingest_chunk() == claimed
+
+
 def test_delete_plaid_account(db: Sqlite3):
     db.insert_plaid_account("delete-me")
 
@@ -750,7 +1401,7 @@ def test_insert_budget_transaction_link(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-14",
+            fingerprint=b"fp-acct-14",
         )
     )
 
@@ -761,7 +1412,7 @@ def test_insert_budget_transaction_link(db: Sqlite3):
             amount=120,
             direction=TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-14",
+            fingerprint=b"fp-txn-14",
         )
     )
 
@@ -777,6 +1428,47 @@ def test_insert_budget_transaction_link(db: Sqlite3):
         assert row.transaction_id == transaction_id
 
 
+def test_insert_budget_transactions_batch(db: Sqlite3):
+    db.insert_budget("Groceries", 500)
+    db.insert_budget("Fuel", 100)
+    first, second = 1, 2
+    db.insert_account(
+        PartialAccount(
+            name="Checking",
+            external_id="ext-bt-batch",
+            source=TransactionSource.APPLE,
+            account_type="DEPOSITORY",
+            balance=0,
+            fingerprint=b"fp-acct-batch",
+        )
+    )
+    db.insert_transactions(
+        [
+            PartialTransaction(
+                name=f"Store {n}",
+                amount=10,
+                direction=TransactionDirection.OUT,
+                account_id=1,
+                fingerprint=f"fp-txn-batch-{n}".encode(),
+            )
+            for n in range(3)
+        ]
+    )
+
+    assert db.insert_budget_transactions([(first, 1), (first, 2), (second, 3)]) == 3
+    assert db.insert_budget_transactions([(first, 1), (second, 2)]) == 1
+    assert db.insert_budget_transactions([]) == 0
+
+    with db.engine.begin() as conn:
+        links = conn.execute(select(db.budgets_transactions)).all()
+    assert sorted((row.budget_id, row.transaction_id) for row in links) == [
+        (first, 1),
+        (first, 2),
+        (second, 2),
+        (second, 3),
+    ]
+
+
 def test_delete_budget_transaction_link(db: Sqlite3):
     # create budget
     db.insert_budget("Groceries", 500)
@@ -789,7 +1481,7 @@ def test_delete_budget_transaction_link(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-15",
+            fingerprint=b"fp-acct-15",
         )
     )
 
@@ -800,7 +1492,7 @@ def test_delete_budget_transaction_link(db: Sqlite3):
             amount=120,
             direction=TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-15",
+            fingerprint=b"fp-txn-15",
         )
     )
 
@@ -836,7 +1528,7 @@ def test_insert_account_returns_id(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-16",
+            fingerprint=b"fp-acct-16",
         )
     )
     assert account_id == 1
@@ -850,7 +1542,7 @@ def test_insert_transaction_returns_id(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-17",
+            fingerprint=b"fp-acct-17",
         )
     )
 
@@ -861,7 +1553,7 @@ def test_insert_transaction_returns_id(db: Sqlite3):
             direction=TransactionDirection.OUT,
             account_id=1,
             note="For TX tests",
-            fingerprint="fp-txn-17",
+            fingerprint=b"fp-txn-17",
         )
     )
     assert tx_id == 1
@@ -880,7 +1572,7 @@ def test_select_account_by_id(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-18",
+            fingerprint=b"fp-acct-18",
         )
     )
 
@@ -926,7 +1618,7 @@ def test_retrieve_budget_transactions_view(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-19",
+            fingerprint=b"fp-acct-19",
         )
     )
 
@@ -937,7 +1629,7 @@ def test_retrieve_budget_transactions_view(db: Sqlite3):
             direction=TransactionDirection.OUT,
             account_id=1,
             occurred_at=datetime(2024, 1, 1),
-            fingerprint="fp-txn-19a",
+            fingerprint=b"fp-txn-19a",
         )
     )
 
@@ -948,7 +1640,7 @@ def test_retrieve_budget_transactions_view(db: Sqlite3):
             direction=TransactionDirection.OUT,
             account_id=1,
             occurred_at=datetime(2024, 2, 1),
-            fingerprint="fp-txn-19b",
+            fingerprint=b"fp-txn-19b",
         )
     )
 
@@ -968,6 +1660,22 @@ def test_retrieve_budget_transactions_view(db: Sqlite3):
     assert rows[0].account_name == "Checking"
 
 
+def test_retrieve_budget_transactions_labels_the_queried_budget(db: Sqlite3):
+    db.insert_budget("Groceries", 500)
+    db.insert_budget("Household", 200)
+    db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "DEPOSITORY", "A", 0, b"fp")
+    )
+    db.insert_transaction(
+        PartialTransaction("Market", 30, TransactionDirection.OUT, 1, b"fp-txn")
+    )
+    db.insert_budget_transaction(1, 1)
+    db.insert_budget_transaction(2, 1)
+
+    assert [t.budget_name for t in db.retrieve_budget_transactions(1)] == ["Groceries"]
+    assert [t.budget_name for t in db.retrieve_budget_transactions(2)] == ["Household"]
+
+
 def test_account_exists_by_fingerprint(db: Sqlite3):
     # insert first account
     db.insert_account(
@@ -977,15 +1685,162 @@ def test_account_exists_by_fingerprint(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-exists-1",
+            fingerprint=b"fp-exists-1",
         )
     )
 
     # should exist
-    assert db.account_exists_by_fingerprint("fp-exists-1") == 1
+    assert db.account_exists_by_fingerprint(b"fp-exists-1") == 1
 
     # should not exist
-    assert db.account_exists_by_fingerprint("fp-does-not-exist") is None
+    assert db.account_exists_by_fingerprint(b"fp-does-not-exist") is None
+
+
+def test_startup_converts_hex_fingerprints_to_legacy_blobs(tmp_path):
+    db_path = tmp_path / "legacy.sqlite"
+    db = Sqlite3(db_path)
+    account_hex = "ab" * 32
+    txn_hex = "cd" * 32
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO accounts (name, external_id, source, account_type, "
+            "balance, fingerprint) VALUES ('Card', 'ext', 1, 0, 0, ?)",
+            (account_hex,),
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO transactions (name, amount, direction, account_id, "
+            "fingerprint) VALUES ('Coffee', 325, 1, 1, ?)",
+            (txn_hex,),
+        )
+    db.engine.dispose()
+
+    db = Sqlite3(db_path)
+
+    assert db.account_exists_by_fingerprint(b"\x01" + b"\xab" * 16) == 1
+    assert db.select_transaction_ids_by_fingerprints([b"\x01" + b"\xcd" * 16]) == {
+        b"\x01" + b"\xcd" * 16: 1
+    }
+    db.engine.dispose()
+
+
+def test_startup_compacts_text_enums_and_rowid_link_tables(tmp_path):
+    db_path = tmp_path / "text_enums.sqlite"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            external_id TEXT UNIQUE NOT NULL ON CONFLICT IGNORE,
+            plaid_id INTEGER,
+            source TEXT NOT NULL CHECK (source IN ('PLAID', 'APPLE')),
+            account_type TEXT NOT NULL,
+            balance INTEGER NOT NULL,
+            last_updated_at TEXT NOT NULL DEFAULT (datetime ('now')),
+            fingerprint BLOB NOT NULL UNIQUE
+        );
+        CREATE TABLE transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            direction TEXT NOT NULL CHECK (direction IN ('IN', 'OUT')),
+            occurred_at TEXT NOT NULL DEFAULT (datetime ('now')),
+            external_id TEXT UNIQUE ON CONFLICT IGNORE,
+            account_id INTEGER NOT NULL,
+            note TEXT NOT NULL DEFAULT '',
+            fingerprint BLOB NOT NULL UNIQUE
+        );
+        CREATE TABLE budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            amount_allocated INTEGER NOT NULL DEFAULT 0,
+            amount_spent INTEGER NOT NULL DEFAULT 0,
+            amount_saved INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT (datetime ('now')),
+            level TEXT CHECK (level IN ('LOW', 'MED', 'HIGH'))
+        );
+        CREATE TABLE budgets_transactions (
+            transaction_id INTEGER NOT NULL,
+            budget_id INTEGER NOT NULL,
+            PRIMARY KEY (transaction_id, budget_id)
+        );
+        INSERT INTO accounts (name, external_id, source, account_type, balance,
+            fingerprint) VALUES ('Card', 'ext', 'APPLE', 'CREDIT', 0, x'02aa');
+        INSERT INTO transactions (name, amount, direction, account_id, fingerprint)
+            VALUES ('Coffee', 325, 'OUT', 1, x'02bb'),
+                   ('Refund', 100, 'IN', 1, x'02cc');
+        DELETE FROM transactions WHERE id = 2;
+        CREATE TRIGGER trg_accounts_last_updated AFTER UPDATE ON accounts
+        BEGIN
+            UPDATE accounts SET last_updated_at = datetime('now') WHERE id = OLD.id;
+        END;
+        INSERT INTO budgets (name, level, amount_allocated, amount_spent)
+            VALUES ('Food', 'HIGH', 500, 200), ('Misc', NULL, 0, 0);
+        INSERT INTO budgets_transactions VALUES (1, 1);
+        """
+    )
+    conn.close()
+
+    db = Sqlite3(db_path)
+
+    with db.engine.begin() as conn:
+        account = conn.execute(select(db.accounts)).one()
+        txn = conn.execute(select(db.transactions)).one()
+        levels = conn.execute(select(db.budgets.c.level)).scalars().all()
+        raw = conn.exec_driver_sql("SELECT direction FROM transactions").scalar()
+        link_sql = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE name = 'budgets_transactions'"
+        ).scalar()
+        seq = conn.exec_driver_sql(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'transactions'"
+        ).scalar()
+        triggers = (
+            conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            .scalars()
+            .all()
+        )
+    assert account.source is TransactionSource.APPLE
+    assert account.account_type == "CREDIT"
+    assert txn.direction is TransactionDirection.OUT
+    assert raw == 1
+    assert levels == ["HIGH", None]
+    assert "WITHOUT ROWID" in link_sql
+    assert seq == 2  # ids are not reused after the rebuild
+    assert [b.amount_saved for b in db.retrieve_budgets()] == [300, 0]
+    assert "trg_accounts_last_updated" not in triggers
+    assert (txn.account_name, txn.budget_id, txn.budget_name) == ("Card", 1, "Food")
+    assert [t.id for t in db.retrieve_budget_transactions(1)] == [1]
+    db.engine.dispose()
+
+
+def test_legacy_fingerprints_are_selected_until_upgraded(db: Sqlite3):
+    account_id = db.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"\x01a")
+    )
+    db.insert_transactions(
+        [
+            PartialTransaction(
+                "Old", 1, TransactionDirection.OUT, account_id, b"\x01o"
+            ),
+            PartialTransaction(
+                "New", 1, TransactionDirection.OUT, account_id, b"\x02n"
+            ),
+        ]
+    )
+
+    legacy = db.select_legacy_fingerprint_transactions(0, 10)
+    assert [(row.id, row.name) for row in legacy] == [(1, "Old")]
+    assert db.select_legacy_fingerprint_transactions(1, 10) == []
+    assert [row.id for row in db.select_legacy_fingerprint_accounts(0, 10)] == [1]
+
+    db.update_transaction_fingerprints([(1, b"\x02o")])
+    db.update_account_fingerprints([(account_id, b"\x02a")])
+
+    assert db.select_legacy_fingerprint_transactions(0, 10) == []
+    assert db.select_legacy_fingerprint_accounts(0, 10) == []
+    assert db.account_exists_by_fingerprint(b"\x02a") == account_id
 
 
 def test_select_budget_id_for_transaction(db: Sqlite3):
@@ -1000,7 +1855,7 @@ def test_select_budget_id_for_transaction(db: Sqlite3):
             source=TransactionSource.APPLE,
             account_type="DEPOSITORY",
             balance=0,
-            fingerprint="fp-acct-sel-bt",
+            fingerprint=b"fp-acct-sel-bt",
         )
     )
 
@@ -1011,7 +1866,7 @@ def test_select_budget_id_for_transaction(db: Sqlite3):
             amount=75,
             direction=TransactionDirection.OUT,
             account_id=1,
-            fingerprint="fp-txn-sel-bt",
+            fingerprint=b"fp-txn-sel-bt",
         )
     )
 
@@ -1022,3 +1877,42 @@ def test_select_budget_id_for_transaction(db: Sqlite3):
     budget_id = db.select_budget_id_for_transaction(tx_id)
 
     assert budget_id == 1
+
+
+def test_import_job_lifecycle(db: Sqlite3):
+    job_id = db.insert_import_job("bank.csv", "/tmp/bank.csv")
+    assert db.select_import_job(job_id).status == "QUEUED"
+
+    assert db.claim_import_job(job_id) is True
+    assert db.claim_import_job(job_id) is False  # already running
+    db.checkpoint_import_job(job_id, 500, 500, 480, 20, 100)
+    db.checkpoint_import_job(job_id, 700, 200, 200, 0, 10)
+    db.finish_import_job(job_id, "boom")
+
+    job = db.select_import_job(job_id)
+    assert (job.status, job.error, job.checkpoint) == ("FAILED", "boom", 700)
+    assert (job.rows_parsed, job.rows_inserted, job.rows_deduplicated) == (
+        700,
+        680,
+        20,
+    )
+    assert job.rows_linked == 110
+    assert job.finished_at is not None
+
+    assert db.claim_import_job(job_id) is True  # failed jobs can be resumed
+    assert db.select_import_job(job_id).error is None
+    db.finish_import_job(job_id)
+    assert db.select_import_job(job_id).status == "DONE"
+    assert db.select_import_job(job_id + 1) is None
+
+
+def test_requeue_import_jobs(db: Sqlite3):
+    running = db.insert_import_job("a.csv", "/tmp/a.csv")
+    queued = db.insert_import_job("b.csv", "/tmp/b.csv")
+    done = db.insert_import_job("c.csv", "/tmp/c.csv")
+    db.claim_import_job(running)
+    db.claim_import_job(done)
+    db.finish_import_job(done)
+
+    assert db.requeue_import_jobs() == [running, queued]
+    assert db.select_import_job(running).status == "QUEUED"
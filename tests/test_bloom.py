@@ -0,0 +1,30 @@
+from core.bloom import BloomFilter
+from core.utils import build_fingerprint
+
+
+def _keys(prefix: str, count: int) -> list[bytes]:
+    return [build_fingerprint(prefix, str(n)) for n in range(count)]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    keys = _keys("stored", 2000)
+    bloom = BloomFilter.from_keys(keys, capacity=2000)
+
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_filter_false_positive_rate_is_near_target():
+    bloom = BloomFilter.from_keys(_keys("stored", 5000), 5000, error_rate=0.01)
+
+    hits = sum(key in bloom for key in _keys("new", 20000))
+
+    assert hits / 20000 < 0.02
+
+
+def test_empty_bloom_filter_contains_nothing():
+    bloom = BloomFilter(0)
+    key = build_fingerprint("anything")
+
+    assert key not in bloom
+    bloom.add(key)
+    assert key in bloom
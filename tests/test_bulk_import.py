@@ -0,0 +1,114 @@
+import zipfile
+
+from core.bulk_import import (
+    ImportSource,
+    bulk_import,
+    find_import_sources,
+    parse_import_source,
+)
+from core.datastore.db import Sqlite3
+from core.service import Service
+
+HEADER = "Date,Description,Amount,Account Name,Budget\n"
+
+
+def _write(path, *rows):
+    path.write_text(HEADER + "".join(rows))
+    return str(path)
+
+
+def test_find_import_sources_expands_zip_members(tmp_path):
+    plain = _write(tmp_path / "plain.csv")
+    archive = tmp_path / "history.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("2022.csv", HEADER)
+        zf.writestr("nested/2023.CSV", HEADER)
+        zf.writestr("README.txt", "not a csv")
+
+    assert find_import_sources([plain, str(archive)]) == [
+        ImportSource(plain),
+        ImportSource(str(archive), "2022.csv"),
+        ImportSource(str(archive), "nested/2023.CSV"),
+    ]
+
+
+def test_parse_import_source_matches_prepared_rows(tmp_path):
+    path = _write(tmp_path / "a.csv", "2024-01-02,Coffee,-$4.50,Checking,Food\n")
+
+    source, rows, error = parse_import_source(ImportSource(path))
+
+    assert (source.name, error) == (path, None)
+    assert len(rows) == 1
+    assert rows[0]["amount"] == 4.5
+    assert (
+        rows[0]["fingerprint"]
+        == Service.prepare_import_row({**rows[0], "amount": -4.5})["fingerprint"]
+    )
+
+
+def test_parse_import_source_reports_errors(tmp_path):
+    path = _write(tmp_path / "bad.csv", "yesterday,Coffee,-4,Checking,\n")
+
+    _, rows, error = parse_import_source(ImportSource(path))
+
+    assert rows == []
+    assert error == "Invalid date format: yesterday"
+
+
+def test_bulk_import_writes_every_source(tmp_path):
+    service = Service(Sqlite3(tmp_path / "bulk.sqlite"))
+    first = _write(
+        tmp_path / "2023.csv",
+        "2023-05-01,Rent,-1200,Checking,\n",
+        "2023-05-02,Salary,3000,Checking,\n",
+    )
+    archive = tmp_path / "more.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("2024.csv", HEADER + "2024-01-03,Fuel,-40,Credit,\n")
+        zf.writestr("broken.csv", "Date,Amount\n")
+
+    result = bulk_import(
+        service, find_import_sources([first, str(archive)]), workers=2, chunk_size=1
+    )
+
+    assert (result.files, result.rows, result.inserted) == (2, 3, 3)
+    assert result.failed == {
+        f"{archive}:broken.csv": (
+            "Missing required columns: Description, Account Name, Budget"
+        )
+    }
+    names = sorted(t.name for t in service.store.retrieve_transactions())
+    assert names == ["Fuel", "Rent", "Salary"]
+
+    again = bulk_import(service, find_import_sources([first]), workers=1)
+    assert (again.rows, again.inserted) == (2, 0)
+    service.store.engine.dispose()
+
+
+def test_bulk_import_dedupes_ofx_by_fitid(tmp_path):
+    service = Service(Sqlite3(tmp_path / "bulk.sqlite"))
+    statement = (
+        "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>"
+        "<BANKACCTFROM><ACCTID>555501234</BANKACCTFROM><BANKTRANLIST>"
+        "<STMTTRN><DTPOSTED>20240105<TRNAMT>-9.99<FITID>A1<NAME>{name}</STMTTRN>"
+        "<STMTTRN><DTPOSTED>20240106<TRNAMT>-3.00<FITID>A2<NAME>Bus</STMTTRN>"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"
+    )
+    first = tmp_path / "jan.ofx"
+    first.write_text(statement.format(name="Streaming"))
+    archive = tmp_path / "downloads.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        # Re-download where the bank cleaned up the payee name
+        zf.writestr("jan.qfx", statement.format(name="STREAMING SVC"))
+
+    fresh = bulk_import(service, find_import_sources([str(first)]), workers=1)
+    again = bulk_import(service, find_import_sources([str(archive)]), workers=1)
+
+    assert (fresh.rows, fresh.inserted) == (2, 2)
+    assert (again.rows, again.inserted) == (2, 0)
+    stored = service.store.retrieve_transactions()
+    assert sorted((t.name, t.external_id) for t in stored) == [
+        ("Bus", "ofx:555501234:A2"),
+        ("Streaming", "ofx:555501234:A1"),
+    ]
+    service.store.engine.dispose()
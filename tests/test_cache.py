@@ -0,0 +1,50 @@
+from core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_or_load_caches_within_ttl():
+    clock = FakeClock()
+    cache = TTLCache(10, clock)
+    loads = []
+
+    def loader():
+        loads.append(clock.now)
+        return len(loads)
+
+    assert cache.get_or_load("item", loader) == 1
+    clock.now = 9.9
+    assert cache.get_or_load("item", loader) == 1
+    clock.now = 10
+    assert cache.get_or_load("item", loader) == 2
+    assert loads == [0.0, 10]
+
+
+def test_put_and_get():
+    clock = FakeClock()
+    cache = TTLCache(5, clock)
+
+    assert cache.get("missing") is None
+    cache.put("a", "value")
+    assert cache.get("a") == "value"
+    clock.now = 5
+    assert cache.get("a") is None
+
+
+def test_invalidate_single_key_and_all():
+    cache = TTLCache(60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.invalidate()
+    assert cache.get("b") is None
@@ -0,0 +1,186 @@
+import hashlib
+import json
+from datetime import datetime
+
+import pytest
+
+from core.cli import main
+from core.datastore.db import Sqlite3
+from core.datastore.model import (
+    PartialAccount,
+    PartialTransaction,
+    TransactionDirection,
+    TransactionSource,
+)
+from core.utils import build_fingerprint, normalize
+
+
+def test_replay_plaid_command(tmp_path, capsys):
+    db_path = tmp_path / "cli.sqlite"
+    store = Sqlite3(db_path)
+    plaid_id = store.insert_plaid_account("token")
+    store.insert_account(
+        PartialAccount(
+            external_id="plaid-acc",
+            source=TransactionSource.PLAID,
+            account_type="DEPOSITORY",
+            name="Checking",
+            balance=0,
+            fingerprint=b"fp-cli",
+            plaid_id=plaid_id,
+        )
+    )
+    page = {
+        "added": [
+            {
+                "account_id": "plaid-acc",
+                "amount": 12.5,
+                "date": "2024-03-01",
+                "name": "COFFEE #12",
+                "merchant_name": "Coffee",
+                "transaction_id": "txn-1",
+            }
+        ],
+        "next_cursor": "c-1",
+        "has_more": False,
+    }
+    store.insert_plaid_sync_page(plaid_id, "", "c-1", json.dumps(page).encode())
+    store.engine.dispose()
+
+    main(["--db-path", str(db_path), "replay-plaid"])
+
+    out = capsys.readouterr().out
+    assert "Replayed 1 staged pages, inserted 1 transactions, updated 0 in " in out
+    replayed = Sqlite3(db_path).retrieve_transactions()
+    assert [(t.name, t.amount) for t in replayed] == [("Coffee", 1250)]
+
+
+def test_import_command(tmp_path, capsys):
+    db_path = tmp_path / "cli.sqlite"
+    csv_path = tmp_path / "history.csv"
+    csv_path.write_text(
+        "Date,Description,Amount,Account Name,Budget\n"
+        "2024-03-01,Coffee,-3.25,Checking,\n"
+        "2024-03-02,Refund,10,Checking,\n"
+    )
+
+    main(["--db-path", str(db_path), "import", str(csv_path), "--workers", "1"])
+
+    out = capsys.readouterr().out
+    assert "Imported 2 rows from 1 files (2 new, 0 linked to budgets)" in out
+    assert "rows/sec" in out
+    assert "2 lookups skipped, 0 rows looked up" in out
+    imported = Sqlite3(db_path).retrieve_transactions()
+    assert sorted(t.amount for t in imported) == [325, 1000]
+
+    main(
+        [
+            "--db-path",
+            str(db_path),
+            "import",
+            str(csv_path),
+            "--workers",
+            "1",
+            "--no-prefilter",
+        ]
+    )
+
+    out = capsys.readouterr().out
+    assert "(0 new, 0 linked to budgets)" in out
+    assert "0 lookups skipped, 2 rows looked up, 0 false positives" in out
+
+
+def _v1_hex(*values) -> str:
+    # How fingerprints were stored before version 2
+    canonical = "|".join(normalize(str(v) if v else None) for v in values)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def test_migrate_fingerprints_command(tmp_path, capsys):
+    db_path = tmp_path / "cli.sqlite"
+    store = Sqlite3(db_path)
+    rows = [
+        # Apple account and a Plaid transaction can be rebuilt from the row
+        (
+            "INSERT INTO accounts (name, external_id, source, account_type, "
+            "balance, fingerprint) VALUES ('Apple Card', 'a', 1, 0, 0, ?)",
+            _v1_hex("Apple Card", "Apple Card", "CREDIT", 0),
+        ),
+        (
+            "INSERT INTO transactions (name, amount, direction, occurred_at, "
+            "external_id, account_id, fingerprint) "
+            "VALUES ('Coffee', 1250, 1, '2024-03-01', 'txn-1', 1, ?)",
+            _v1_hex("Coffee", "12.5", "OUT", "2024-03-01", None),
+        ),
+        # A CSV row's fingerprint includes its position in the file
+        (
+            "INSERT INTO transactions (name, amount, direction, occurred_at, "
+            "account_id, fingerprint) "
+            "VALUES ('Lunch', 900, 1, '2024-03-02T00:00:00', 1, ?)",
+            _v1_hex("Lunch", "9.0", "OUT", "2024-03-02T00:00:00", "3"),
+        ),
+    ]
+    with store.engine.begin() as conn:
+        for sql, fingerprint in rows:
+            conn.exec_driver_sql(sql, (fingerprint,))
+    store.engine.dispose()
+
+    main(["--db-path", str(db_path), "migrate-fingerprints"])
+
+    out = capsys.readouterr().out
+    assert "Upgraded 1 transaction and 1 account fingerprints" in out
+    assert "1 stay legacy" in out
+    migrated = Sqlite3(db_path)
+    assert [
+        row.name for row in migrated.select_legacy_fingerprint_transactions(0, 10)
+    ] == ["Lunch"]
+    assert migrated.account_exists_by_fingerprint(
+        build_fingerprint("Apple Card", "Apple Card", "CREDIT", 0)
+    )
+
+
+def test_recompute_spent_command(tmp_path, capsys):
+    db_path = tmp_path / "cli.sqlite"
+    store = Sqlite3(db_path)
+    store.insert_account(
+        PartialAccount("ext", TransactionSource.APPLE, "CREDIT", "Card", 0, b"\x02a")
+    )
+    store.insert_budget("Food", 100, datetime(2024, 3, 1))
+    store.insert_budget("Rent", 900, datetime(2024, 4, 1))
+    store.insert_transactions(
+        [PartialTransaction("Lunch", 9, TransactionDirection.OUT, 1, b"\x02l")]
+    )
+    store.insert_budget_transactions([(1, 1), (2, 1)])
+    store.engine.dispose()
+
+    main(
+        ["--db-path", str(db_path), "recompute-spent", "--month", "3", "--year", "2024"]
+    )
+    main(["--db-path", str(db_path), "recompute-spent"])
+
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].startswith("Recomputed spent totals for 2024-03 in ")
+    assert out[0].endswith("; 1 changed")
+    assert out[1].startswith("Recomputed spent totals for all months in ")
+    assert out[1].endswith("; 1 changed")
+    budgets = Sqlite3(db_path).retrieve_budgets()
+    assert [b.amount_spent for b in budgets] == [900, 900]
+
+
+def test_project_budgets_command(tmp_path, capsys):
+    db_path = tmp_path / "cli.sqlite"
+    store = Sqlite3(db_path)
+    store.insert_budget("Rent", 900, datetime(2024, 1, 1))
+    store.engine.dispose()
+
+    args = ["--db-path", str(db_path), "project-budgets", "--month", "1"]
+    main([*args, "--year", "2024", "--through-month", "12", "--through-year", "2024"])
+    with pytest.raises(SystemExit, match="after the source month"):
+        main(
+            [*args, "--year", "2025", "--through-month", "1", "--through-year", "2024"]
+        )
+
+    out = capsys.readouterr().out
+    assert out.startswith("Projected 2024-01 through 2024-12 in ")
+    assert out.strip().endswith("; 11 budgets created")
+    assert len(Sqlite3(db_path).retrieve_budgets()) == 12
@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+
+from core.csv_import import parse_csv_transactions
+
+HEADER = "Date,Description,Amount,Account Name,Budget\n"
+
+
+def _lines(text: str) -> list[str]:
+    return text.splitlines(keepends=True)
+
+
+def test_parse_csv_transactions_normalizes_rows():
+    rows = list(
+        parse_csv_transactions(
+            _lines(
+                " date ,DESCRIPTION,Amount,Account Name,Budget\n"
+                '2024-02-01,Rent,"-$1,200.50",Checking,Housing\n'
+                ",Missing date,1,Checking,\n"
+                "2024-02-03,Refund,15,Card,\n"
+            )
+        )
+    )
+
+    assert rows == [
+        {
+            "occurred_at": datetime.datetime(2024, 2, 1),
+            "description": "Rent",
+            "amount": -1200.5,
+            "amount_cents": -120050,
+            "account_name": "Checking",
+            "budget_name": "Housing",
+            "csv_index": 1,
+        },
+        {
+            "occurred_at": datetime.datetime(2024, 2, 3),
+            "description": "Refund",
+            "amount": 15.0,
+            "amount_cents": 1500,
+            "account_name": "Card",
+            "budget_name": "",
+            "csv_index": 3,
+        },
+    ]
+
+
+def test_parse_csv_transactions_is_lazy():
+    rows = parse_csv_transactions(
+        _lines(HEADER + "2024-02-01,Ok,1,Checking,\nnot-a-date,Bad,1,Checking,\n")
+    )
+
+    assert next(rows)["description"] == "Ok"
+    with pytest.raises(ValueError, match="Invalid date format: not-a-date"):
+        next(rows)
+
+
+def test_parse_csv_transactions_rejects_bad_amount():
+    with pytest.raises(ValueError, match="Invalid amount: 12abc"):
+        list(parse_csv_transactions(_lines(HEADER + "2024-02-01,X,12abc,A,\n")))
+
+
+def test_parse_csv_transactions_reads_accounting_negatives():
+    lines = _lines(HEADER + '2024-02-01,Rent,"($1,200.50)",Checking,\n')
+    (row,) = parse_csv_transactions(lines)
+
+    assert row["amount"] == -1200.5
+    assert row["amount_cents"] == -120050
+
+
+def test_parse_csv_transactions_validates_headers():
+    with pytest.raises(ValueError, match="CSV headers are missing"):
+        list(parse_csv_transactions([]))
+
+    with pytest.raises(ValueError, match="Missing required columns: Amount, Budget"):
+        list(parse_csv_transactions(_lines("Date,Description,Account Name\n")))
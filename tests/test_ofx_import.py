@@ -0,0 +1,94 @@
+import datetime
+
+import pytest
+
+from core.csv_import import parse_import_file
+from core.ofx_import import parse_ofx_transactions
+
+SGML = (
+    b"OFXHEADER:100\r\nDATA:OFXSGML\r\nVERSION:102\r\nCHARSET:1252\r\n\r\n"
+    b"<OFX><SIGNONMSGSRSV1><SONRS><FI><ORG>Chase<FID>10898</FI></SONRS>"
+    b"</SIGNONMSGSRSV1><BANKMSGSRSV1><STMTTRNRS><STMTRS>"
+    b"<BANKACCTFROM><BANKID>123<ACCTID>000123456789<ACCTTYPE>CHECKING"
+    b"</BANKACCTFROM><BANKTRANLIST>\r\n"
+    b"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240102120000[-5:EST]"
+    b"<TRNAMT>-12.50<FITID>F1<NAME>CAF\xc9 &amp; CO<MEMO>coffee</STMTTRN>\r\n"
+    b"<STMTTRN><TRNTYPE>XFER<DTPOSTED>20240103<TRNAMT>100.00<FITID>F2"
+    b"<PAYEE><NAME>Employer</PAYEE><BANKACCTTO><BANKID>9<ACCTID>999"
+    b"</BANKACCTTO></STMTTRN>\r\n"
+    b"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240104<TRNAMT>-1.00</STMTTRN>\r\n"
+    b"</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"
+)
+
+XML = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<?OFX OFXHEADER="200" VERSION="220"?>\n'
+    b"<OFX><CREDITCARDMSGSRSV1><CCSTMTTRNRS><CCSTMTRS>\n"
+    b"  <CCACCTFROM><ACCTID>4111222233334444</ACCTID></CCACCTFROM>\n"
+    b"  <BANKTRANLIST><STMTTRN>\n"
+    b"    <TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240201</DTPOSTED>\n"
+    b"    <TRNAMT>-5,25</TRNAMT><FITID>X1</FITID>"
+    b"<NAME>Caf\xc3\xa9</NAME><MEMO></MEMO>\n"
+    b"  </STMTTRN></BANKTRANLIST>\n"
+    b"</CCSTMTRS></CCSTMTTRNRS></CREDITCARDMSGSRSV1></OFX>\n"
+)
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_parse_ofx_transactions_reads_sgml_in_any_chunking(size):
+    rows = list(parse_ofx_transactions(_chunks(SGML, size)))
+
+    assert rows == [
+        {
+            "occurred_at": datetime.datetime(2024, 1, 2),
+            "description": "CAFÉ & CO",
+            "amount": -12.5,
+            "amount_cents": -1250,
+            "account_name": "Chase 6789",
+            "budget_name": "",
+            "csv_index": 1,
+            "external_id": "ofx:000123456789:F1",
+        },
+        {
+            "occurred_at": datetime.datetime(2024, 1, 3),
+            "description": "Employer",
+            "amount": 100.0,
+            "amount_cents": 10000,
+            "account_name": "Chase 6789",
+            "budget_name": "",
+            "csv_index": 2,
+            "external_id": "ofx:000123456789:F2",
+        },
+    ]
+
+
+def test_parse_ofx_transactions_reads_xml():
+    rows = list(parse_ofx_transactions(_chunks(XML, 16)))
+
+    assert [(r["description"], r["amount"], r["external_id"]) for r in rows] == [
+        ("Café", -5.25, "ofx:4111222233334444:X1")
+    ]
+    assert rows[0]["account_name"] == "Account 4444"
+
+
+def test_parse_ofx_transactions_rejects_bad_values():
+    bad = SGML.replace(b"20240103", b"2024-1-3")
+
+    with pytest.raises(ValueError, match="Invalid OFX date: 2024-1-3"):
+        list(parse_ofx_transactions([bad]))
+
+
+def test_parse_ofx_transactions_rejects_other_documents():
+    with pytest.raises(ValueError, match="Not an OFX document."):
+        list(parse_ofx_transactions([b"Date,Amount\n2024-01-01,<5>\n"]))
+
+
+def test_parse_import_file_picks_parser_by_extension():
+    csv = b"Date,Description,Amount,Account Name,Budget\n2024-01-01,Tea,-2,Cash,\n"
+
+    assert len(list(parse_import_file("export.QFX", [SGML]))) == 2
+    assert [r["description"] for r in parse_import_file("export.csv", [csv])] == ["Tea"]
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+
+from core.scheduler import SyncScheduler
+
+
+class FakeService:
+    def __init__(self, item_ids=(1, 2)):
+        self.item_ids = list(item_ids)
+        self.synced = []
+        self.fail_items = set()
+        self.balance_refreshes = 0
+        self.fail_balances = False
+
+    def get_plaid_item_ids(self):
+        return list(self.item_ids)
+
+    def refresh_account_balances(self):
+        self.balance_refreshes += 1
+        if self.fail_balances:
+            raise RuntimeError("plaid down")
+        return 0
+
+    def sync_plaid_item(self, plaid_id):
+        self.synced.append(plaid_id)
+        if plaid_id in self.fail_items:
+            raise RuntimeError("plaid down")
+
+
+async def _wait_idle(scheduler: SyncScheduler):
+    for _ in range(200):
+        await asyncio.sleep(0.01)
+        if not scheduler.status()["running"]:
+            return
+
+
+def test_enqueue_marks_pending_and_runs_every_item():
+    async def scenario():
+        service = FakeService()
+        scheduler = SyncScheduler(service, interval=3600)
+        await scheduler.start()
+
+        scheduler.enqueue()
+        assert scheduler.status()["running"] is True
+
+        await _wait_idle(scheduler)
+        await scheduler.stop()
+        return service, scheduler
+
+    service, scheduler = asyncio.run(scenario())
+
+    assert sorted(service.synced) == [1, 2]
+    assert all(s.last_finished_at for s in scheduler.items.values())
+
+
+def test_enqueue_single_item_from_another_thread():
+    async def scenario():
+        service = FakeService()
+        scheduler = SyncScheduler(service, interval=3600)
+        await scheduler.start()
+
+        thread = threading.Thread(target=scheduler.enqueue, args=(2,))
+        thread.start()
+        thread.join()
+
+        await _wait_idle(scheduler)
+        await scheduler.stop()
+        return service
+
+    assert asyncio.run(scenario()).synced == [2]
+
+
+def test_interval_with_jitter_runs_periodically():
+    async def scenario():
+        service = FakeService(item_ids=[7])
+        scheduler = SyncScheduler(service, interval=0.01, jitter=0.01, rng=lambda: 1)
+        await scheduler.start()
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+        return service
+
+    synced = asyncio.run(scenario()).synced
+
+    assert len(synced) >= 2
+    assert set(synced) == {7}
+
+
+def test_failed_sync_is_recorded_and_worker_survives():
+    async def scenario():
+        service = FakeService(item_ids=[1])
+        service.fail_items.add(1)
+        scheduler = SyncScheduler(service, interval=3600)
+        await scheduler.start()
+
+        scheduler.enqueue(1)
+        await _wait_idle(scheduler)
+        error = scheduler.items[1].last_error
+
+        service.fail_items.clear()
+        scheduler.enqueue(1)
+        await _wait_idle(scheduler)
+        await scheduler.stop()
+        return service, scheduler, error
+
+    service, scheduler, error = asyncio.run(scenario())
+
+    assert error == "plaid down"
+    assert scheduler.items[1].last_error is None
+    assert service.synced == [1, 1]
+
+
+def test_new_items_get_a_worker_on_enqueue():
+    async def scenario():
+        service = FakeService(item_ids=[])
+        scheduler = SyncScheduler(service, interval=3600)
+        await scheduler.start()
+
+        service.item_ids.append(5)
+        scheduler.enqueue()
+        await _wait_idle(scheduler)
+        await scheduler.stop()
+        return service
+
+    assert asyncio.run(scenario()).synced == [5]
+
+
+def test_debounced_enqueues_collapse_into_one_sync():
+    async def scenario():
+        service = FakeService(item_ids=[3])
+        scheduler = SyncScheduler(service, interval=3600)
+        await scheduler.start()
+
+        for _ in range(5):
+            scheduler.enqueue(3, debounce=0.05)
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.01)
+        assert service.synced == []  # still inside the debounce window
+
+        await _wait_idle(scheduler)
+        await scheduler.stop()
+        return service
+
+    assert asyncio.run(scenario()).synced == [3]
+
+
+def test_balance_refresh_runs_in_background_and_survives_errors():
+    async def scenario():
+        service = FakeService()
+        service.fail_balances = True
+        scheduler = SyncScheduler(service, interval=3600)
+        await scheduler.start()
+
+        thread = threading.Thread(target=scheduler.refresh_balances)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0.05)
+
+        service.fail_balances = False
+        scheduler.refresh_balances()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return service
+
+    assert asyncio.run(scenario()).balance_refreshes == 2
+
+
+def test_balance_refreshes_do_not_overlap():
+    async def scenario():
+        service = FakeService()
+        release = threading.Event()
+        service.refresh_account_balances = lambda: (
+            setattr(service, "balance_refreshes", service.balance_refreshes + 1),
+            release.wait(1),
+        )
+        scheduler = SyncScheduler(service, interval=3600)
+        await scheduler.start()
+
+        for _ in range(3):
+            scheduler.refresh_balances()
+        await asyncio.sleep(0.05)
+        release.set()
+        await scheduler.stop()
+        return service
+
+    assert asyncio.run(scenario()).balance_refreshes == 1
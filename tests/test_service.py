@@ -1,10 +1,18 @@
 import datetime
+import hashlib
+import os
+import re
+import time
+from dataclasses import replace
 
+import jwt
 import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
 
 from core.datastore.model import (
     Account,
     Budget,
+    ImportJob,
     PartialAccount,
     PartialBudget,
     PartialTransaction,
@@ -18,17 +26,32 @@ from core.datastore.model import (
 from core.model import AppleTransaction
 from core.service import Service
 
+WEBHOOK_KEY = ec.generate_private_key(ec.SECP256R1())
+
 
 class FakePlaid:
     def __init__(self):
         self.link_token_called = False
+        self.key_requests = []
+
+    def retrieve_webhook_verification_key(self, key_id: str):
+        self.key_requests.append(key_id)
+        if key_id != "kid-1":
+            return None
+        public = jwt.algorithms.ECAlgorithm.to_jwk(
+            WEBHOOK_KEY.public_key(), as_dict=True
+        )
+        return {**public, "alg": "ES256", "kid": key_id, "expired_at": None}
 
     def create_link(self):
         self.link_token_called = True
         return "link-token"
 
     def add_financial_item(self, public_token: str):
-        return f"access-{public_token}"
+        return f"access-{public_token}", f"item-{public_token}"
+
+    def retrieve_item_id(self, access_token: str):
+        return access_token.replace("access-", "item-")
 
     def retrieve_accounts(self, access_token: str):
         from core.datasource.model import PlaidAccountBase
@@ -38,20 +61,44 @@ class FakePlaid:
             PlaidAccountBase("acc2", "Credit", "finger2", "credit", 800),
         ]
 
-    def retrieve_transactions(self, access_token: str):
-        class Txn:
-            def __init__(self, name, merchant, amount, date, transaction_id):
-                self.name = name
-                self.merchant_name = merchant
-                self.amount = amount
-                self.date = date
-                self.transaction_id = transaction_id
-
-        now = datetime.datetime(2023, 1, 15)
-        return [
-            Txn("Merchant A", None, 2500, now, "t-1"),
-            Txn("Merchant B", "Store B", -500, now, "t-2"),
+    def retrieve_transaction_pages(self, access_token: str, cursor=None):
+        import json
+
+        from core.datasource.model import PlaidSyncPage
+
+        def txn(name, merchant, amount, transaction_id, account_id):
+            return {
+                "name": name,
+                "merchant_name": merchant,
+                "amount": amount,
+                "date": "2023-01-15",
+                "transaction_id": transaction_id,
+                "account_id": account_id,
+            }
+
+        pages = [
+            {
+                "added": [
+                    txn("Merchant A", None, 2500, "t-1", "plaid-acc"),
+                    txn("Merchant B", "Store B", -500, "t-2", "plaid-checking"),
+                ],
+                "next_cursor": "c-1",
+                "has_more": True,
+            },
+            {
+                "added": [
+                    txn("Utility", None, 1500, "t-3", "plaid-checking"),
+                    txn("Orphan", None, 100, "t-4", "plaid-unknown"),
+                ],
+                "next_cursor": "c-2",
+                "has_more": False,
+            },
         ]
+        cursors = ["", "c-1"]
+        start = cursors.index(cursor or "") if (cursor or "") in cursors else 2
+        for request_cursor, page in list(zip(cursors, pages, strict=True))[start:]:
+            raw = json.dumps(page).encode()
+            yield PlaidSyncPage(request_cursor, page["next_cursor"], raw, page)
 
 
 class FakeStore:
@@ -59,15 +106,24 @@ class FakeStore:
         self.budgets = []
         self.inserted_budgets = []
         self.transactions = []
-        self.transaction_fingerprints: dict[str, int] = {}
+        self.unassigned_ranges = []
+        self.recomputed_ranges = []
+        self.transaction_fingerprints: dict[bytes, int] = {}
         self.transaction_external_ids: dict[str, int] = {}
         self.force_insert_transaction_none = False
         self.inserted_budget_transactions = []
         self.transaction_note_updates = []
         self.budget_updates: list[PartialBudget] = []
+        self.definition_updates = []
+        self.materialized_ranges = []
+        self.projections = []
         self.selected_budget_id: int | None = None
         self.deleted_budget_transactions = []
+        self.budget_links = []
         self.plaid_accounts = [PlaidAccount(1, "token-1")]
+        self.sync_pages = []
+        self.apple_queue = []
+        self.import_jobs: dict[int, ImportJob] = {}
         self.accounts_by_id = {
             1: Account(
                 id=1,
@@ -77,11 +133,21 @@ class FakeStore:
                 name="Credit Card",
                 balance=0,
                 plaid_id=1,
-            )
+            ),
+            2: Account(
+                id=2,
+                external_id="plaid-checking",
+                account_type=TransactionType.DEPOSITORY,
+                source=TransactionSource.PLAID,
+                name="Checking",
+                balance=0,
+                plaid_id=1,
+            ),
         }
         self.tag_assignments = []
         self.budget_tags = []
         self.plaid_inserted_token = None
+        self.plaid_inserted_item_id = None
         self.inserted_accounts: list[PartialAccount] = []
         self.tags = [{"id": "1"}, {"id": "2"}]
 
@@ -115,6 +181,17 @@ class FakeStore:
     def update_budget(self, partial: PartialBudget):
         self.budget_updates.append(partial)
 
+    def update_budget_definition(self, id, name=None, amount_allocated=None):
+        self.definition_updates.append((id, name, amount_allocated))
+
+    def materialize_budgets(self, start, end):
+        self.materialized_ranges.append((start, end))
+        return 0
+
+    def project_budgets(self, start, end, months):
+        self.projections.append((start, end, months))
+        return 5
+
     def retrieve_budget_transactions(self, budget_id: int):
         return [
             Transaction(
@@ -143,6 +220,32 @@ class FakeStore:
             self.transaction_external_ids[partial.external_id] = txn_id
         return txn_id
 
+    def update_transactions_by_external_id(self, partials: list[PartialTransaction]):
+        updated = 0
+        for partial in partials:
+            txn_id = self.transaction_external_ids.get(partial.external_id)
+            if txn_id is None or self.transactions[txn_id] == partial:
+                continue
+            self.transactions[txn_id] = partial
+            updated += 1
+        return updated
+
+    def insert_transactions(self, partials: list[PartialTransaction]):
+        return sum(self.insert_transaction(p) is not None for p in partials)
+
+    def insert_transactions_returning_ids(self, partials: list[PartialTransaction]):
+        ids = {p.fingerprint: self.insert_transaction(p) for p in partials}
+        return {fp: txn_id for fp, txn_id in ids.items() if txn_id is not None}
+
+    def select_transaction_fingerprints(self, start, end):
+        return [
+            fingerprint
+            for fingerprint, txn_id in self.transaction_fingerprints.items()
+            if txn_id < len(self.transactions)
+            and self.transactions[txn_id] is not None
+            and start <= self.transactions[txn_id].occurred_at < end
+        ]
+
     def select_transaction_id_by_fingerprint_or_external_id(
         self, fingerprint: str, external_id: str | None
     ):
@@ -150,9 +253,31 @@ class FakeStore:
             return self.transaction_external_ids[external_id]
         return self.transaction_fingerprints.get(fingerprint)
 
+    def select_transaction_ids_by_fingerprints(self, fingerprints: list[bytes]):
+        return {
+            fingerprint: self.transaction_fingerprints[fingerprint]
+            for fingerprint in fingerprints
+            if fingerprint in self.transaction_fingerprints
+        }
+
+    def update_transaction_fingerprints(self, updates: list[tuple[int, bytes]]):
+        by_id = {txn_id: fp for fp, txn_id in self.transaction_fingerprints.items()}
+        for txn_id, fingerprint in updates:
+            del self.transaction_fingerprints[by_id[txn_id]]
+            self.transaction_fingerprints[fingerprint] = txn_id
+
     def insert_budget_transaction(self, budget_id: int, transaction_id: int):
         self.inserted_budget_transactions.append((budget_id, transaction_id))
 
+    def insert_budget_transactions(self, links):
+        new = [
+            link
+            for link in dict.fromkeys(links)
+            if link not in self.inserted_budget_transactions
+        ]
+        self.inserted_budget_transactions.extend(new)
+        return len(new)
+
     def filter_transactions(self, **kwargs):
         start = kwargs.get("start")
         end = kwargs.get("end")
@@ -168,6 +293,18 @@ class FakeStore:
     def retrieve_transactions(self):
         return list(self.transactions)
 
+    def recompute_budgets_spent(self, start=None, end=None):
+        self.recomputed_ranges.append((start, end))
+        return 2
+
+    def filter_unassigned_transactions(self, start, end):
+        self.unassigned_ranges.append((start, end))
+        return []
+
+    def count_unassigned_transactions(self, start, end):
+        self.unassigned_ranges.append((start, end))
+        return 3
+
     def update_transaction_note(self, id: int, note: str):
         self.transaction_note_updates.append((id, note))
 
@@ -177,21 +314,152 @@ class FakeStore:
     def delete_budget_transaction(self, budget_id: int, transaction_id: int):
         self.deleted_budget_transactions.append((budget_id, transaction_id))
 
+    def delete_budget_transactions(self, links):
+        self.deleted_budget_transactions.extend(links)
+        return len(links)
+
+    def select_budget_transaction_links(self, transaction_ids):
+        return [link for link in self.budget_links if link[1] in transaction_ids]
+
+    def select_transaction_dates(self, ids):
+        dates = {}
+        for id in ids:
+            if id < len(self.transactions):
+                occurred_at = self.transactions[id].occurred_at
+                if isinstance(occurred_at, str):
+                    occurred_at = datetime.datetime.fromisoformat(occurred_at)
+                dates[id] = occurred_at
+        return dates
+
     def retrieve_plaid_accounts(self):
         return self.plaid_accounts
 
+    def insert_plaid_sync_page(self, plaid_id, cursor, next_cursor, payload):
+        self.sync_pages.append((plaid_id, cursor, next_cursor, payload))
+
+    def select_plaid_sync_cursor(self, plaid_id):
+        cursors = [page[2] for page in self.sync_pages if page[0] == plaid_id]
+        return cursors[-1] if cursors else None
+
+    def retrieve_plaid_sync_page_ids(self, plaid_id=None):
+        return [
+            index
+            for index, page in enumerate(self.sync_pages)
+            if plaid_id is None or page[0] == plaid_id
+        ]
+
+    def select_plaid_sync_page(self, id):
+        return self.sync_pages[id][0], self.sync_pages[id][3]
+
+    def insert_apple_ingest_chunk(self, idempotency_key, seq, received, payload):
+        if any(
+            (row["key"], row["seq"]) == (idempotency_key, seq)
+            for row in self.apple_queue
+        ):
+            return
+        self.apple_queue.append(
+            {
+                "key": idempotency_key,
+                "seq": seq,
+                "payload": payload,
+                "received": received,
+                "status": "RECEIVING",
+                "inserted": 0,
+                "error": None,
+            }
+        )
+
+    def release_apple_ingest_chunks(self, idempotency_key):
+        released = 0
+        for row in self.apple_queue:
+            if row["key"] == idempotency_key and row["status"] == "RECEIVING":
+                row["status"] = "QUEUED"
+                released += 1
+        return released
+
+    def discard_apple_ingest_chunks(self, idempotency_key):
+        self.apple_queue = [
+            row
+            for row in self.apple_queue
+            if row["key"] != idempotency_key or row["status"] != "RECEIVING"
+        ]
+
+    def claim_apple_ingest_chunk(self):
+        for id, row in enumerate(self.apple_queue):
+            if row["status"] == "QUEUED":
+                row["status"] = "PROCESSING"
+                return id, row["payload"]
+        return None
+
+    def finish_apple_ingest_chunk(self, id, inserted, error=None):
+        row = self.apple_queue[id]
+        row.update(status="FAILED" if error else "DONE", inserted=inserted)
+        row["error"] = error
+
+    def requeue_apple_ingest_chunks(self):
+        for row in self.apple_queue:
+            if row["status"] == "PROCESSING":
+                row["status"] = "QUEUED"
+
+    def insert_import_job(self, filename, path):
+        job_id = len(self.import_jobs) + 1
+        self.import_jobs[job_id] = ImportJob(
+            job_id, filename, path, "QUEUED", 0, 0, 0, 0, 0, None, "now", None
+        )
+        return job_id
+
+    def select_import_job(self, id):
+        return self.import_jobs.get(id)
+
+    def claim_import_job(self, id):
+        job = self.import_jobs[id]
+        if job.status not in ("QUEUED", "FAILED"):
+            return False
+        self.import_jobs[id] = replace(job, status="PROCESSING", error=None)
+        return True
+
+    def checkpoint_import_job(
+        self, id, checkpoint, parsed, inserted, deduplicated, linked
+    ):
+        job = self.import_jobs[id]
+        self.import_jobs[id] = replace(
+            job,
+            checkpoint=checkpoint,
+            rows_parsed=job.rows_parsed + parsed,
+            rows_inserted=job.rows_inserted + inserted,
+            rows_deduplicated=job.rows_deduplicated + deduplicated,
+            rows_linked=job.rows_linked + linked,
+        )
+
+    def finish_import_job(self, id, error=None):
+        status = "FAILED" if error else "DONE"
+        self.import_jobs[id] = replace(self.import_jobs[id], status=status, error=error)
+
+    def requeue_import_jobs(self):
+        for id, job in self.import_jobs.items():
+            if job.status == "PROCESSING":
+                self.import_jobs[id] = replace(job, status="QUEUED")
+        return [id for id, job in self.import_jobs.items() if job.status == "QUEUED"]
+
     def select_plaid_account(self, account_id: int):
         return self.plaid_accounts[0]
 
     def select_account_by_id(self, account_id: int):
         return self.accounts_by_id[account_id]
 
-    def account_exists_by_fingerprint(self, fingerprint: str):
+    def account_exists_by_fingerprint(self, fingerprint: bytes):
         for index, account in enumerate(self.inserted_accounts, start=1):
             if account.fingerprint == fingerprint:
                 return index
         return None
 
+    def update_account_fingerprints(self, updates: list[tuple[int, bytes]]):
+        for account_id, fingerprint in updates:
+            account = self.inserted_accounts[account_id - 1]
+            self.inserted_accounts[account_id - 1] = replace(
+                account, fingerprint=fingerprint
+            )
+
     def insert_account(self, partial: PartialAccount):
         self.inserted_accounts.append(partial)
         account_id = len(self.inserted_accounts)
@@ -215,10 +483,23 @@ class FakeStore:
     def retrieve_accounts(self):
         return list(self.accounts_by_id.values())
 
-    def insert_plaid_account(self, access_token: str):
+    def insert_plaid_account(self, access_token: str, item_id=None):
         self.plaid_inserted_token = access_token
+        self.plaid_inserted_item_id = item_id
         return 99
 
+    def select_plaid_account_id_by_item_id(self, item_id: str):
+        for item in self.plaid_accounts:
+            if item.item_id == item_id:
+                return item.id
+        return None
+
+    def update_plaid_account_item_id(self, plaid_id: int, item_id: str):
+        self.plaid_accounts = [
+            PlaidAccount(item.id, item.token, item_id) if item.id == plaid_id else item
+            for item in self.plaid_accounts
+        ]
+
 
 @pytest.fixture(autouse=True)
 def patch_plaid(monkeypatch):
@@ -244,9 +525,10 @@ def test_budget_creation_and_copy(service):
     service.create_budget_from_copy(1, 2023, 2, 2023)
     service.delete_budget(0)
 
-    assert service.store.inserted_budgets[0][0] == "New"
-    copied = [b for b in service.store.inserted_budgets if b[0] == "Old"]
-    assert copied and isinstance(copied[0][2], datetime.datetime)
+    # Budgets recur, so copying only materializes the month, and a past
+    # month is never filled in
+    assert service.store.inserted_budgets == [("New", 50, None)]
+    assert service.store.materialized_ranges == []
     assert service.store.deleted_budget == 0
 
 
@@ -262,8 +544,20 @@ def test_budget_retrieval_and_updates(service):
 
     assert len(all_budgets) == 1
     assert got_budget.name == "Groceries"
-    assert any(update.name == "Food" for update in service.store.budget_updates)
-    assert any(update.amount_allocated == 25 for update in service.store.budget_updates)
+    assert service.store.definition_updates == [(0, "Food", None), (0, None, 25)]
+
+
+def test_get_all_budgets_materializes_current_and_future_months_only(service):
+    today = datetime.date.today()
+
+    service.get_all_budgets(1, 2023)
+    service.get_all_budgets(today.month, today.year)
+    service.get_all_budgets(1, today.year + 1)
+
+    assert [start.date() for start, _ in service.store.materialized_ranges] == [
+        today.replace(day=1),
+        datetime.date(today.year + 1, 1, 1),
+    ]
 
 
 def test_budget_overview_and_refresh_spent(service):
@@ -355,11 +649,32 @@ def test_transaction_creation_and_assignment(service):
 def test_plaid_sync(service):
     service.sync_all_transactions()
 
-    assert len(service.store.transactions) == 2
+    assert len(service.store.transactions) == 3
     names = [t.name for t in service.store.transactions]
     assert "Store B" in names
 
 
+def test_plaid_sync_routes_transactions_to_their_accounts(service, monkeypatch):
+    def fail(*_args):
+        raise AssertionError("sync should not query per row")
+
+    monkeypatch.setattr(service.store, "select_account_by_id", fail)
+    monkeypatch.setattr(service.store, "select_plaid_account", fail)
+
+    service.sync_all_transactions()
+
+    by_name = {t.name: t for t in service.store.transactions}
+    assert by_name["Merchant A"].account_id == 1
+    assert by_name["Merchant A"].direction == TransactionDirection.OUT
+    # Plaid signs amounts the same way for every account type: a checking
+    # deposit is negative and a debit purchase positive
+    assert by_name["Store B"].account_id == 2
+    assert by_name["Store B"].direction == TransactionDirection.IN
+    assert by_name["Utility"].account_id == 2
+    assert by_name["Utility"].direction == TransactionDirection.OUT
+    assert "Orphan" not in by_name
+
+
 def test_apple_sync(service):
     service.sync_apple_transactions([])
 
@@ -374,12 +689,144 @@ def test_apple_sync(service):
         )
     ]
 
-    service.sync_apple_transactions(apple_transactions)
+    assert service.sync_apple_transactions(apple_transactions) == 1
 
     assert service.store.inserted_accounts
     assert service.store.transactions[-1].external_id == "a-1"
 
 
+def _apple_transactions(count, prefix="a"):
+    return [
+        AppleTransaction(
+            id=f"{prefix}-{n}",
+            account_id="apple-acc",
+            name=f"Apple Purchase {n}",
+            amount=10 + n,
+            direction=TransactionDirection.OUT,
+            date=datetime.datetime(2023, 1, 10),
+        )
+        for n in range(count)
+    ]
+
+
+def test_enqueue_apple_transactions_chunks_and_dedupes(service, monkeypatch):
+    monkeypatch.setattr(Service, "APPLE_INGEST_CHUNK_SIZE", 2)
+    transactions = _apple_transactions(5)
+
+    key, created = service.enqueue_apple_transactions(transactions)
+    retry_key, retried = service.enqueue_apple_transactions(transactions)
+
+    assert created and not retried
+    assert retry_key == key  # derived from the payload
+    assert [row["received"] for row in service.store.apple_queue] == [2, 2, 1]
+    assert service.store.transactions == []  # nothing inserted until processed
+
+    assert service.process_apple_ingest_queue() == 5
+    assert [t.external_id for t in service.store.transactions] == [
+        f"a-{n}" for n in range(5)
+    ]
+    assert all(row["status"] == "DONE" for row in service.store.apple_queue)
+
+
+def test_enqueue_apple_transactions_uses_client_key(service):
+    key, created = service.enqueue_apple_transactions(_apple_transactions(1), "k-1")
+    _, again = service.enqueue_apple_transactions(_apple_transactions(3, "b"), "k-1")
+
+    assert (key, created, again) == ("k-1", True, False)
+    assert len(service.store.apple_queue) == 1
+
+
+def test_enqueue_apple_transactions_stores_stream_chunk_by_chunk(service, monkeypatch):
+    monkeypatch.setattr(Service, "APPLE_INGEST_CHUNK_SIZE", 2)
+    staged = []
+
+    def stream():
+        for transaction in _apple_transactions(5):
+            staged.append(len(service.store.apple_queue))
+            yield transaction
+
+    key, created = service.enqueue_apple_transactions(stream(), "k-stream")
+
+    assert (key, created) == ("k-stream", True)
+    assert staged == [0, 0, 1, 1, 2]  # earlier chunks stored before later rows
+    assert [row["status"] for row in service.store.apple_queue] == ["QUEUED"] * 3
+
+
+def test_enqueue_apple_transactions_discards_failed_stream(service, monkeypatch):
+    monkeypatch.setattr(Service, "APPLE_INGEST_CHUNK_SIZE", 2)
+
+    def stream():
+        yield from _apple_transactions(3)
+        raise ValueError("Line 4: bad row")
+
+    with pytest.raises(ValueError, match="Line 4"):
+        service.enqueue_apple_transactions(stream(), "k-bad")
+
+    assert service.store.apple_queue == []
+
+    # A corrected retry with the same key is queued in full
+    _, created = service.enqueue_apple_transactions(_apple_transactions(4), "k-bad")
+    assert created
+    assert [row["received"] for row in service.store.apple_queue] == [2, 2]
+
+
+def test_process_apple_ingest_queue_records_failed_chunk(service):
+    service.enqueue_apple_transactions(_apple_transactions(1), "bad")
+    service.store.apple_queue[0]["payload"] = b'[{"id": "broken"}]'
+    service.enqueue_apple_transactions(_apple_transactions(2), "good")
+
+    assert service.process_apple_ingest_queue() == 2
+
+    bad, good = service.store.apple_queue
+    assert bad["status"] == "FAILED" and "validation error" in bad["error"]
+    assert good["status"] == "DONE" and good["inserted"] == 2
+
+
+def test_resume_apple_ingest_queue_retries_interrupted_chunks(service):
+    service.enqueue_apple_transactions(_apple_transactions(2), "k-1")
+    service.store.claim_apple_ingest_chunk()  # crashed mid-chunk
+
+    assert service.process_apple_ingest_queue() == 0
+    assert service.resume_apple_ingest_queue() == 2
+
+
+def test_unassigned_transactions_cover_the_whole_month(service):
+    assert service.get_unassigned_transactions(12, 2023) == []
+    assert service.count_unassigned_transactions(12, 2023) == 3
+
+    december = (datetime.datetime(2023, 12, 1), datetime.datetime(2024, 1, 1))
+    assert service.store.unassigned_ranges == [december, december]
+
+
+def test_recompute_budgets_spent_scopes_to_month(service):
+    assert service.recompute_budgets_spent() == 2
+    assert service.recompute_budgets_spent(2, 2024) == 2
+
+    assert service.store.recomputed_ranges == [
+        (None, None),
+        (datetime.datetime(2024, 2, 1), datetime.datetime(2024, 3, 1)),
+    ]
+
+
+def test_project_budgets_spans_year_boundary(service):
+    assert service.project_budgets(11, 2024, 2, 2025) == 5
+
+    november = (datetime.datetime(2024, 11, 1), datetime.datetime(2024, 12, 1))
+    assert service.store.materialized_ranges == [november]
+    assert service.store.projections == [
+        (
+            *november,
+            [
+                datetime.datetime(2024, 12, 1),
+                datetime.datetime(2025, 1, 1),
+                datetime.datetime(2025, 2, 1),
+            ],
+        )
+    ]
+    with pytest.raises(ValueError, match="after the source month"):
+        service.project_budgets(3, 2024, 3, 2024)
+
+
 def test_tag_and_account_helpers(service):
     service.store.transactions.append(
         PartialTransaction(
@@ -444,6 +891,7 @@ def test_create_accounts_by_plaid(service):
     service.store.inserted_accounts.clear()
     service.create_accounts_by_plaid("public-token")
     assert service.store.plaid_inserted_token == "access-public-token"
+    assert service.store.plaid_inserted_item_id == "item-public-token"
     assert any(acc.plaid_id == 99 for acc in service.store.inserted_accounts)
 
 
@@ -538,43 +986,328 @@ def test_import_transactions_from_csv_skips_missing_budget(service):
     assert service.store.inserted_budget_transactions == []
 
 
-def test_import_transactions_from_csv_skips_budget_assignment_on_mismatch(
-    service,
+def test_import_transactions_from_csv_links_by_row_month_without_reselecting(
+    service, monkeypatch
 ):
-    occurred_at = datetime.datetime(2023, 7, 10)
-    fingerprint = Service._Service__build_transaction_fingerprint(
-        "Dinner", 30, TransactionDirection.OUT, occurred_at
-    )
-    service.store.transactions.append(
-        Transaction(
-            id=0,
-            name="Dinner",
-            amount=30,
-            direction=TransactionDirection.OUT,
-            occurred_at=datetime.datetime(2023, 8, 10),
-            account_id=1,
-            external_id=None,
-            note=None,
-        )
+    service.store.budgets = [
+        Budget(3, "Food", 1200, 0, 0, datetime.datetime(2023, 7, 1)),
+        Budget(4, "Food", 1200, 0, 0, datetime.datetime(2023, 8, 1)),
+    ]
+    monkeypatch.setattr(
+        service, "get_transaction", lambda _id: pytest.fail("per-row re-select")
     )
-    service.store.transaction_fingerprints[fingerprint] = 0
+    refreshed = []
+    monkeypatch.setattr(service, "refresh_budget_spent", refreshed.append)
+    rows = [
+        {
+            "occurred_at": datetime.datetime(2023, month, day),
+            "amount": -30,
+            "account_name": "Checking",
+            "description": f"Dinner {day}",
+            "budget_name": "food",
+        }
+        for month, day in [(7, 10), (7, 11), (8, 1)]
+    ]
+
+    imported = service.import_transactions_from_csv(rows)
+
+    assert imported == 3
+    assert service.store.inserted_budget_transactions == [(3, 0), (3, 1), (4, 2)]
+    assert refreshed == [3, 4]  # once per touched budget
+
+
+def test_import_prepared_rows_counts_only_new_links(service):
     service.store.budgets = [
-        Budget(3, "Food", 1200, 0, 0, datetime.datetime(2023, 7, 1))
+        Budget(3, "Food", 1200, 0, 0, datetime.datetime(2023, 7, 1)),
     ]
     rows = [
         {
-            "occurred_at": occurred_at,
+            "occurred_at": datetime.datetime(2023, 7, day),
             "amount": -30,
             "account_name": "Checking",
-            "description": "Dinner",
+            "description": f"Dinner {day}",
             "budget_name": "Food",
         }
+        for day in (10, 11)
     ]
 
-    imported = service.import_transactions_from_csv(rows)
+    first = service.import_prepared_rows(map(Service.prepare_import_row, rows))
+    again = service.import_prepared_rows(map(Service.prepare_import_row, rows))
 
-    assert imported == 1
-    assert service.store.inserted_budget_transactions == []
+    assert (first["inserted"], first["linked"]) == (2, 2)
+    assert (again["inserted"], again["linked"]) == (0, 0)
+
+
+def test_import_transactions_from_csv_writes_stream_in_chunks(service, monkeypatch):
+    monkeypatch.setattr(Service, "CSV_IMPORT_CHUNK_SIZE", 2)
+    written_before_row = []
+
+    def rows():
+        for n in range(5):
+            written_before_row.append(len(service.store.transactions))
+            yield {
+                "occurred_at": datetime.datetime(2023, 6, n + 1),
+                "amount": -(n + 1),
+                "account_name": "Checking",
+                "description": f"Coffee {n}",
+                "budget_name": "",
+                "csv_index": n + 1,
+            }
+
+    imported = service.import_transactions_from_csv(rows())
+
+    assert imported == 5
+    assert written_before_row == [0, 0, 2, 2, 4]
+    assert len(service.store.transactions) == 5
+
+
+CSV_HEADER = "Date,Description,Amount,Account Name,Budget\n"
+
+
+def _write_csv(tmp_path, lines):
+    path = tmp_path / "upload.csv"
+    path.write_text(CSV_HEADER + "".join(lines))
+    return str(path)
+
+
+def test_run_import_job_reports_progress_and_cleans_up(service, monkeypatch, tmp_path):
+    monkeypatch.setattr(Service, "CSV_IMPORT_CHUNK_SIZE", 2)
+    service.store.budgets = [
+        Budget(4, "Food", 1000, 0, 0, datetime.datetime(2023, 6, 1))
+    ]
+    path = _write_csv(
+        tmp_path,
+        [
+            "2023-06-01,Lunch,-12,Checking,Food\n",
+            "2023-06-02,Dinner,-30,Checking,\n",
+            "2023-06-02,Dinner,-30,Checking,\n",
+        ],
+    )
+    job_id = service.create_import_job("upload.csv", path)
+    # Same row as csv_index 1, already imported by an earlier upload
+    service.store.transaction_fingerprints[
+        Service._Service__build_transaction_fingerprint(
+            "Lunch", 12.0, TransactionDirection.OUT, datetime.datetime(2023, 6, 1), 1
+        )
+    ] = 7
+    service.store.transactions = [None] * 8
+    service.store.accounts_by_id[7] = service.store.accounts_by_id[1]
+    service.get_transaction = lambda _id: Transaction(
+        7, "Lunch", 1200, "OUT", "2023-06-01", 1, None, None
+    )
+
+    job = service.run_import_job(job_id)
+
+    assert job.status == "DONE"
+    assert (job.checkpoint, job.rows_parsed) == (3, 3)
+    assert (job.rows_inserted, job.rows_deduplicated, job.rows_linked) == (2, 1, 1)
+    assert service.store.inserted_budget_transactions == [(4, 7)]
+    assert not os.path.exists(path)
+
+
+def test_import_transactions_from_csv_resolves_each_account_once(service, monkeypatch):
+    lookups = []
+    lookup = service.store.account_exists_by_fingerprint
+    monkeypatch.setattr(
+        service.store,
+        "account_exists_by_fingerprint",
+        lambda fingerprint: lookups.append(fingerprint) or lookup(fingerprint),
+    )
+    monkeypatch.setattr(Service, "CSV_IMPORT_CHUNK_SIZE", 2)
+    rows = [
+        {
+            "occurred_at": datetime.datetime(2023, 7, day),
+            "amount": -5,
+            "account_name": "Checking" if day % 2 else "Savings",
+            "description": f"Coffee {day}",
+            "budget_name": "",
+        }
+        for day in range(1, 7)
+    ]
+
+    assert service.import_transactions_from_csv(rows) == 6
+    # Each new account is looked up once, under its current and legacy
+    # fingerprint
+    assert len(lookups) == 4
+    assert {fingerprint[0] for fingerprint in lookups} == {1, 2}
+    assert {txn.account_id for txn in service.store.transactions} == {1, 2}
+
+
+def test_import_prepared_rows_matches_and_upgrades_legacy_fingerprints(service):
+    occurred_at = datetime.datetime(2023, 7, 3)
+    row = Service.prepare_import_row(
+        {
+            "occurred_at": occurred_at,
+            "amount": -5.0,
+            "account_name": "Checking",
+            "description": "Coffee",
+            "budget_name": "",
+            "csv_index": 4,
+        }
+    )
+    # Imported before version 2 fingerprints
+    legacy = Service._Service__build_transaction_fingerprint(
+        "Coffee", 5.0, TransactionDirection.OUT, occurred_at, 4, version=1
+    )
+    service.store.insert_transaction(
+        PartialTransaction(
+            "Coffee", 5.0, TransactionDirection.OUT, 1, legacy, occurred_at=occurred_at
+        )
+    )
+
+    first = service.import_prepared_rows([row])
+    second = service.import_prepared_rows([row])
+
+    assert (first["inserted"], first["false_positives"]) == (0, 0)
+    assert service.store.transaction_fingerprints == {row["fingerprint"]: 0}
+    assert (second["inserted"], second["probable_duplicates"]) == (0, 1)
+
+
+def test_import_account_matches_and_upgrades_legacy_fingerprint(service):
+    identity = ("CSV", "Checking", TransactionType.DEPOSITORY, "0000")
+    service.store.insert_account(
+        PartialAccount(
+            "csv:checking",
+            TransactionSource.PLAID,
+            TransactionType.DEPOSITORY,
+            "Checking",
+            0,
+            Service._Service__build_account_fingerprint(*identity, version=1),
+        )
+    )
+
+    assert service._ensure_import_account("Checking") == 1
+    assert len(service.store.inserted_accounts) == 1
+    assert service.store.inserted_accounts[
+        0
+    ].fingerprint == Service._Service__build_account_fingerprint(*identity)
+
+
+def test_import_prepared_rows_only_looks_up_probable_duplicates(service, monkeypatch):
+    def rows(days):
+        return [
+            Service.prepare_import_row(
+                {
+                    "occurred_at": datetime.datetime(2023, 7, day),
+                    "amount": -5,
+                    "account_name": "Checking",
+                    "description": f"Coffee {day}",
+                    "budget_name": "",
+                }
+            )
+            for day in days
+        ]
+
+    service.import_prepared_rows(rows([1, 2, 3, 4]))
+    looked_up = []
+    lookup = service.store.select_transaction_ids_by_fingerprints
+    monkeypatch.setattr(
+        service.store,
+        "select_transaction_ids_by_fingerprints",
+        lambda fingerprints: looked_up.extend(fingerprints) or lookup(fingerprints),
+    )
+
+    overlap = rows([3, 4, 5, 6])
+    result = service.import_prepared_rows(overlap)
+
+    assert result["inserted"] == 2
+    assert (result["probable_duplicates"], result["false_positives"]) == (2, 0)
+    assert looked_up == [row["fingerprint"] for row in overlap[:2]]
+    assert len(service.store.transactions) == 6
+
+
+def test_run_import_job_links_before_each_checkpoint(service, monkeypatch, tmp_path):
+    monkeypatch.setattr(Service, "CSV_IMPORT_CHUNK_SIZE", 2)
+    service.store.budgets = [
+        Budget(4, "Food", 1000, 0, 0, datetime.datetime(2023, 6, 1))
+    ]
+    refreshed = []
+    monkeypatch.setattr(service, "refresh_budget_spent", refreshed.append)
+    path = _write_csv(
+        tmp_path,
+        [
+            "2023-06-01,Lunch,-12,Checking,Food\n",
+            "2023-06-02,Dinner,-30,Checking,Food\n",
+            "bad-date,Broken,-1,Checking,Food\n",
+        ],
+    )
+    job_id = service.create_import_job("upload.csv", path)
+
+    job = service.run_import_job(job_id)
+
+    assert (job.status, job.checkpoint, job.rows_linked) == ("FAILED", 2, 2)
+    assert service.store.inserted_budget_transactions == [(4, 0), (4, 1)]
+    assert refreshed == [4]  # spent still catches up on failure
+
+
+def test_run_import_job_resumes_from_checkpoint(service, monkeypatch, tmp_path):
+    monkeypatch.setattr(Service, "CSV_IMPORT_CHUNK_SIZE", 2)
+    lines = [f"2023-06-0{n},Item {n},-{n},Checking,\n" for n in range(1, 6)]
+    path = _write_csv(tmp_path, lines[:3] + ["bad-date,Broken,-1,Checking,\n"])
+    job_id = service.create_import_job("upload.csv", path)
+
+    failed = service.run_import_job(job_id)
+
+    assert failed.status == "FAILED"
+    assert failed.error == "Invalid date format: bad-date"
+    assert (failed.checkpoint, failed.rows_inserted) == (2, 2)
+    assert os.path.exists(path)
+
+    _write_csv(tmp_path, lines)
+    seen = []
+    insert = service.store.insert_transactions_returning_ids
+    monkeypatch.setattr(
+        service.store,
+        "insert_transactions_returning_ids",
+        lambda partials: seen.extend(p.name for p in partials) or insert(partials),
+    )
+
+    done = service.run_import_job(job_id)
+
+    assert seen == ["Item 3", "Item 4", "Item 5"]  # rows 1-2 are not re-read
+    assert (done.status, done.checkpoint, done.rows_parsed) == ("DONE", 5, 5)
+
+
+def test_run_import_job_reads_ofx_uploads(service, tmp_path):
+    path = tmp_path / "upload.qfx"
+    path.write_text(
+        "<OFX><CCACCTFROM><ACCTID>4242</CCACCTFROM>"
+        "<STMTTRN><DTPOSTED>20240105<TRNAMT>-9.99<FITID>A1<NAME>Music</STMTTRN>"
+        "</OFX>"
+    )
+    job_id = service.create_import_job("statement.QFX", str(path))
+
+    job = service.run_import_job(job_id)
+
+    assert (job.status, job.rows_inserted) == ("DONE", 1)
+    [txn] = service.store.transactions
+    assert (txn.name, txn.amount, txn.external_id) == ("Music", 9.99, "ofx:4242:A1")
+
+
+def test_run_import_job_skips_running_or_finished_jobs(service, tmp_path):
+    path = _write_csv(tmp_path, ["2023-06-01,Lunch,-12,Checking,\n"])
+    job_id = service.create_import_job("upload.csv", path)
+    service.store.claim_import_job(job_id)
+
+    assert service.run_import_job(job_id).status == "PROCESSING"
+    assert service.store.transactions == []
+
+
+def test_run_import_job_without_rows_fails(service, tmp_path):
+    job_id = service.create_import_job("upload.csv", _write_csv(tmp_path, []))
+
+    job = service.run_import_job(job_id)
+
+    assert (job.status, job.error) == ("FAILED", "No valid rows to import.")
+
+
+def test_resume_import_jobs_restarts_interrupted_jobs(service, tmp_path):
+    path = _write_csv(tmp_path, ["2023-06-01,Lunch,-12,Checking,\n"])
+    job_id = service.create_import_job("upload.csv", path)
+    service.store.claim_import_job(job_id)  # interrupted by a restart
+
+    assert service.resume_import_jobs() == 1
+    assert service.get_import_job(job_id).status == "DONE"
 
 
 def test_assign_transaction_to_budget_parses_string_date(service):
@@ -597,3 +1330,300 @@ def test_assign_transaction_to_budget_parses_string_date(service):
     service.assign_transaction_to_budget(1, 0, 9, 2023)
 
     assert service.store.inserted_budget_transactions == [(1, 0)]
+
+
+def _september_transactions(count):
+    return [
+        Transaction(
+            id=n,
+            name=f"Txn {n}",
+            amount=25,
+            direction=TransactionDirection.OUT,
+            occurred_at=f"2023-09-{n + 1:02}",
+            account_id=1,
+            external_id=None,
+            note=None,
+        )
+        for n in range(count)
+    ]
+
+
+def test_assign_transactions_to_budget_recomputes_once(service):
+    service.store.transactions = _september_transactions(3)
+    service.store.budgets = [
+        Budget(1, "Services", 900, 0, 0, datetime.datetime(2023, 9, 1))
+    ]
+
+    assert service.assign_transactions_to_budget(1, [0, 1, 2], 9, 2023) == 3
+
+    assert service.store.inserted_budget_transactions == [(1, 0), (1, 1), (1, 2)]
+    assert [update.id for update in service.store.budget_updates] == [1]
+
+
+@pytest.mark.parametrize(
+    ("ids", "month", "message"),
+    [([0, 7], 9, "Unknown transactions: [7]"), ([0, 1], 10, "outside")],
+)
+def test_assign_transactions_to_budget_links_nothing_when_invalid(
+    service, ids, month, message
+):
+    service.store.transactions = _september_transactions(2)
+
+    with pytest.raises(ValueError, match=re.escape(message)):
+        service.assign_transactions_to_budget(1, ids, month, 2023)
+
+    assert service.store.inserted_budget_transactions == []
+    assert service.store.budget_updates == []
+
+
+def test_unassign_transactions_recomputes_each_budget_once(service):
+    service.store.budgets = [
+        Budget(1, "Services", 900, 0, 0, datetime.datetime(2023, 9, 1)),
+        Budget(2, "Food", 500, 0, 0, datetime.datetime(2023, 9, 1)),
+    ]
+    service.store.budget_links = [(2, 0), (1, 1), (2, 2), (2, 5)]
+
+    assert service.unassign_transactions([0, 1, 2]) == 3
+    assert service.store.deleted_budget_transactions == [(2, 0), (1, 1), (2, 2)]
+    assert [update.id for update in service.store.budget_updates] == [1, 2]
+
+    assert service.unassign_transactions([0, 1, 2], budget_id=1) == 1
+    assert service.store.deleted_budget_transactions[-1] == (1, 1)
+
+
+def test_refresh_account_balances_uses_cache_and_batches(service, monkeypatch):
+    from core.datasource.model import PlaidAccountBase
+
+    calls = []
+    updates = []
+
+    def retrieve_accounts(access_token):
+        calls.append(access_token)
+        return [
+            PlaidAccountBase("plaid-acc", "Credit Card", "f1", "credit", 12.5),
+            PlaidAccountBase("plaid-checking", "Checking", "f2", "depository", 0),
+            PlaidAccountBase("plaid-missing", "Gone", "f3", "depository", 3),
+        ]
+
+    monkeypatch.setattr(service.plaid_client, "retrieve_accounts", retrieve_accounts)
+    service.store.update_account_balances = updates.append
+
+    assert service.refresh_account_balances() == 1
+    assert service.refresh_account_balances() == 1
+
+    assert calls == ["token-1"]
+    assert updates == [{1: 1250}, {1: 1250}]
+
+    service.balance_cache.invalidate()
+    service.refresh_account_balances()
+    assert calls == ["token-1", "token-1"]
+
+
+def test_sync_plaid_item_syncs_only_that_item(service):
+    service.sync_plaid_item(1)
+
+    assert len(service.store.transactions) == 3
+    assert service.get_plaid_item_ids() == [1]
+
+
+def test_sync_plaid_item_ignores_unknown_item(service, monkeypatch):
+    monkeypatch.setattr(service.store, "select_plaid_account", lambda _id: None)
+
+    service.sync_plaid_item(42)
+
+    assert service.store.transactions == []
+
+
+def test_concurrent_item_syncs_share_one_plaid_download(service, monkeypatch):
+    import threading
+    import time
+
+    release = threading.Event()
+    downloads = []
+    original = service.plaid_client.retrieve_transaction_pages
+
+    def slow_retrieve(access_token, cursor=None):
+        downloads.append(access_token)
+        release.wait(5)
+        return original(access_token, cursor)
+
+    monkeypatch.setattr(
+        service.plaid_client, "retrieve_transaction_pages", slow_retrieve
+    )
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.sync_plaid_item(1)))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    while not service.item_sync_flight.in_flight(1):
+        pass
+    time.sleep(0.05)  # let the second caller reach the wait
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert downloads == ["token-1"]
+    assert results == [3, 3]
+    assert service.sync_all_transactions() == 0
+    assert downloads == ["token-1", "token-1"]
+
+
+def test_plaid_sync_stages_pages_and_resumes_from_cursor(service):
+    service.sync_all_transactions()
+
+    assert [page[1:3] for page in service.store.sync_pages] == [
+        ("", "c-1"),
+        ("c-1", "c-2"),
+    ]
+
+    # Next run starts after the last staged cursor, so nothing is re-read
+    service.sync_all_transactions()
+    assert len(service.store.sync_pages) == 2
+
+
+def test_replay_plaid_pages_reprocesses_without_network(service, monkeypatch):
+    service.sync_all_transactions()
+    service.store.transactions.clear()
+    service.store.transaction_fingerprints.clear()
+    service.store.transaction_external_ids.clear()
+
+    def offline(*_args):
+        raise AssertionError("replay must not call Plaid")
+
+    monkeypatch.setattr(service.plaid_client, "retrieve_transaction_pages", offline)
+
+    result = service.replay_plaid_pages()
+
+    assert result == {"pages": 2, "inserted": 3, "updated": 0}
+    assert {t.name for t in service.store.transactions} == {
+        "Merchant A",
+        "Store B",
+        "Utility",
+    }
+    assert service.replay_plaid_pages(plaid_id=1) == {
+        "pages": 2,
+        "inserted": 0,
+        "updated": 0,
+    }
+    assert service.store.recomputed_ranges == []
+
+
+def test_replay_plaid_pages_rewrites_rows_from_an_older_transform(service):
+    service.sync_all_transactions()
+    # Stored by a transform that read the sign backwards for checking
+    utility = service.store.transaction_external_ids["t-3"]
+    service.store.transactions[utility] = replace(
+        service.store.transactions[utility],
+        name="UTILITY CO",
+        direction=TransactionDirection.IN,
+    )
+
+    result = service.replay_plaid_pages()
+
+    assert result == {"pages": 2, "inserted": 0, "updated": 1}
+    rebuilt = service.store.transactions[utility]
+    assert (rebuilt.name, rebuilt.direction) == ("Utility", TransactionDirection.OUT)
+    assert service.store.recomputed_ranges == [(None, None)]
+
+
+def _sign_webhook(body: bytes, key=WEBHOOK_KEY, age: float = 0, kid="kid-1"):
+    claims = {
+        "iat": int(time.time() - age),
+        "request_body_sha256": hashlib.sha256(body).hexdigest(),
+    }
+    return jwt.encode(claims, key, algorithm="ES256", headers={"kid": kid})
+
+
+def test_verify_plaid_webhook_accepts_signed_body(service):
+    body = b'{"webhook_type": "TRANSACTIONS", "item_id": "item-a"}'
+    token = _sign_webhook(body)
+
+    assert service.verify_plaid_webhook(body, token)
+    assert service.verify_plaid_webhook(body, token)
+    assert service.plaid_client.key_requests == ["kid-1"]  # key is cached
+
+
+def test_verify_plaid_webhook_rejects_forged_body(service):
+    token = _sign_webhook(b'{"item_id": "item-a"}')
+
+    assert not service.verify_plaid_webhook(b'{"item_id": "item-b"}', token)
+
+
+def test_verify_plaid_webhook_rejects_stale_iat(service):
+    body = b'{"item_id": "item-a"}'
+    token = _sign_webhook(body, age=Service.PLAID_WEBHOOK_MAX_AGE + 60)
+
+    assert not service.verify_plaid_webhook(body, token)
+
+
+def test_verify_plaid_webhook_rejects_bad_signature(service):
+    body = b'{"item_id": "item-a"}'
+    other_key = ec.generate_private_key(ec.SECP256R1())
+
+    assert not service.verify_plaid_webhook(body, _sign_webhook(body, other_key))
+    assert not service.verify_plaid_webhook(body, _sign_webhook(body, kid="kid-x"))
+    unsigned = jwt.encode(
+        {"iat": int(time.time()), "request_body_sha256": "x"},
+        "shared-secret-of-32-bytes-or-more",
+        algorithm="HS256",
+        headers={"kid": "kid-1"},
+    )
+    assert not service.verify_plaid_webhook(body, unsigned)
+    assert not service.verify_plaid_webhook(body, None)
+    assert not service.verify_plaid_webhook(body, "not-a-jwt")
+
+
+def test_resolve_plaid_webhook_maps_item_id(service):
+    service.store.plaid_accounts = [
+        PlaidAccount(1, "access-a", "item-a"),
+        PlaidAccount(2, "access-b", "item-b"),
+    ]
+
+    plaid_id = service.resolve_plaid_webhook(
+        {
+            "webhook_type": "TRANSACTIONS",
+            "webhook_code": "SYNC_UPDATES_AVAILABLE",
+            "item_id": "item-b",
+        }
+    )
+
+    assert plaid_id == 2
+
+
+def test_resolve_plaid_webhook_ignores_other_events(service):
+    service.store.plaid_accounts = [PlaidAccount(1, "access-a", "item-a")]
+
+    assert (
+        service.resolve_plaid_webhook(
+            {"webhook_type": "ITEM", "webhook_code": "ERROR", "item_id": "item-a"}
+        )
+        is None
+    )
+    assert (
+        service.resolve_plaid_webhook(
+            {"webhook_type": "TRANSACTIONS", "webhook_code": "SYNC_UPDATES_AVAILABLE"}
+        )
+        is None
+    )
+
+
+def test_resolve_plaid_webhook_backfills_legacy_items(service):
+    service.store.plaid_accounts = [
+        PlaidAccount(1, "access-a"),
+        PlaidAccount(2, "access-b"),
+    ]
+    payload = {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": "SYNC_UPDATES_AVAILABLE",
+        "item_id": "item-b",
+    }
+
+    assert service.resolve_plaid_webhook(payload) == 2
+    assert [item.item_id for item in service.store.plaid_accounts] == [
+        "item-a",
+        "item-b",
+    ]
+    assert service.resolve_plaid_webhook({**payload, "item_id": "item-x"}) is None
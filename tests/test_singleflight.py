@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    results = [None] * count
+
+    def worker(index):
+        results[index] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    threads, results = _run_concurrently(4, lambda: flight.do("item", slow))
+    while not flight.in_flight("item"):
+        pass
+    time.sleep(0.05)  # let the other callers reach the wait
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["done"] * 4
+    assert not flight.in_flight("item")
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = []
+
+    def slow(key):
+        started.append(key)
+        release.wait(5)
+        return key
+
+    threads = [
+        threading.Thread(target=flight.do, args=(key, slow, key)) for key in (1, 2)
+    ]
+    for thread in threads:
+        thread.start()
+    while len(started) < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(started) == [1, 2]
+
+
+def test_errors_propagate_and_release_the_key():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("nope")
+
+    with pytest.raises(RuntimeError):
+        flight.do("item", boom)
+
+    assert flight.do("item", lambda: 3) == 3
+
+
+def test_waiters_receive_the_leaders_error():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def boom():
+        release.wait(5)
+        raise RuntimeError("nope")
+
+    def call():
+        try:
+            flight.do("item", boom)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while not flight.in_flight("item"):
+        pass
+    time.sleep(0.05)  # let the other callers reach the wait
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert len({id(exc) for exc in errors}) == 1
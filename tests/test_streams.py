@@ -0,0 +1,72 @@
+import gzip
+
+import pytest
+from pydantic import BaseModel
+
+from core.streams import chunked, gunzip, iter_lines, iter_text_lines, parse_ndjson
+
+
+class Row(BaseModel):
+    id: int
+    name: str
+
+
+def _split(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_gunzip_inflates_across_chunk_boundaries():
+    raw = b"".join(b"line %d\n" % n for n in range(5000))
+
+    inflated = b"".join(gunzip(_split(gzip.compress(raw), 7)))
+
+    assert inflated == raw
+
+
+def test_gunzip_rejects_bad_and_truncated_streams():
+    with pytest.raises(ValueError, match="Invalid gzip"):
+        list(gunzip([b"not gzip at all"]))
+
+    with pytest.raises(ValueError, match="Truncated"):
+        list(gunzip([gzip.compress(b"x" * 1000)[:-10]]))
+
+
+def test_iter_lines_rejoins_split_lines():
+    chunks = [b"al", b"pha\nbe", b"ta\n", b"\ngamma"]
+
+    assert list(iter_lines(chunks)) == [b"alpha", b"beta", b"", b"gamma"]
+
+
+def test_parse_ndjson_validates_each_line():
+    body = b'{"id": 1, "name": "a"}\n\n{"id": 2, "name": "b"}\n'
+
+    rows = list(parse_ndjson(_split(body, 5), Row))
+
+    assert rows == [Row(id=1, name="a"), Row(id=2, name="b")]
+
+
+def test_parse_ndjson_reports_the_bad_line():
+    body = b'{"id": 1, "name": "a"}\n{"id": "x"}\n'
+    rows = parse_ndjson([body], Row)
+
+    assert next(rows).id == 1
+    with pytest.raises(ValueError, match="Line 2"):
+        next(rows)
+
+
+def test_chunked_yields_bounded_batches():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
+
+
+def test_iter_text_lines_decodes_split_characters_and_bom():
+    data = "\ufeffDate,Name\r\n2024-01-01,Café\r\n2024-01-02,Crème".encode()
+
+    lines = list(iter_text_lines(_split(data, 1)))
+
+    assert lines == ["Date,Name\r\n", "2024-01-01,Café\r\n", "2024-01-02,Crème"]
+
+
+def test_iter_text_lines_rejects_invalid_utf8():
+    with pytest.raises(UnicodeDecodeError):
+        list(iter_text_lines([b"ok\n", b"\xff\xfe\xfa"]))
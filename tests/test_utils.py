@@ -1,3 +1,4 @@
+import hashlib
 from datetime import date
 
 import pytest
@@ -9,7 +10,9 @@ from core.utils import (
     derive_direction,
     derive_month_context,
     dollars_to_cents,
+    legacy_fingerprint_from_hex,
     normalize,
+    parse_cents,
 )
 
 
@@ -30,6 +33,61 @@ class TestDollarsToCents:
     def test_negative_amount(self):
         assert dollars_to_cents(-2.34) == -234
 
+    def test_half_cent_ties_round_away_from_zero(self):
+        assert dollars_to_cents(2.675) == 268
+        assert dollars_to_cents(-0.005) == -1
+        assert dollars_to_cents(12345678.995) == 1234567900
+
+    def test_large_amount(self):
+        assert dollars_to_cents(1e16) == 10**18
+
+
+class TestParseCents:
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("12.34", 1234),
+            ("-12.34", -1234),
+            ("+5", 500),
+            (".5", 50),
+            ("$1,234.56", 123456),
+            ("-$1.20", -120),
+            ("$-1.20", -120),
+            ("(1,234.56)", -123456),
+            ("( $12.345 )", -1235),
+            ("1.005", 101),
+            ("-1.005", -101),
+            ("-0.004", 0),
+            ("  7 ", 700),
+            ("12.34-", -1234),
+            ("$1,234.56 -", -123456),
+            ("5+", 500),
+        ],
+    )
+    def test_parses_text(self, text, expected):
+        assert parse_cents(text) == expected
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "",
+            "$",
+            "abc",
+            "1.2.3",
+            "(1",
+            "(-1)",
+            "nan",
+            "inf",
+            "1_000",
+            "-",
+            "-1-",
+            "(1-)",
+        ],
+    )
+    def test_rejects_invalid(self, text):
+        with pytest.raises(ValueError, match="Invalid amount"):
+            parse_cents(text)
+
 
 class TestCentsToDollars:
     def test_integer_amount(self):
@@ -113,6 +171,9 @@ class TestNormalize:
     def test_mixed_case_and_tabs(self):
         assert normalize("  HeLLo\tWoRLD ") == "hello world"
 
+    def test_unicode_whitespace(self):
+        assert normalize("\u00a0Caf\u00e9\u2003\n Bar\u3000") == "caf\u00e9 bar"
+
 
 class TestBuildFingerprint:
     def test_same_inputs_produce_same_fingerprint(self):
@@ -129,3 +190,18 @@ class TestBuildFingerprint:
         fp1 = build_fingerprint("acc", "2025-01-01", "1000", "walmart")
         fp2 = build_fingerprint("acc", "2025-01-01", "1000", "walmart")
         assert fp1 == fp2
+
+    def test_is_version_byte_and_16_byte_digest(self):
+        fp = build_fingerprint("acc", "walmart")
+        assert len(fp) == 17
+        assert fp[0] == 2
+
+    def test_legacy_version_matches_stored_hex(self):
+        # Version 1 rows were stored as the SHA-256 hex of the normalized,
+        # pipe-joined values
+        stored = hashlib.sha256(b"acc|walmart|").hexdigest()
+        legacy = build_fingerprint(" ACC ", "Walmart", None, version=1)
+
+        assert legacy == legacy_fingerprint_from_hex(stored)
+        assert legacy[0] == 1
+        assert legacy != build_fingerprint(" ACC ", "Walmart", None)